@@ -2,11 +2,16 @@ import os
 import json
 import time
 import base64
-from difflib import SequenceMatcher
 
 from utils import logger
+from utils.memo import memo
 from maa.context import Context
+from utils.fuzzy import FuzzyIndex, similarity
+from utils.cancel import sleep
+from utils.frames import screencap
+from utils.watchdog import Watchdog, StallDetected
 from maa.custom_action import CustomAction
+from utils.input_queue import tap
 from maa.agent.agent_server import AgentServer
 
 
@@ -16,6 +21,7 @@ class SupportCardsAuto(CustomAction):
     自动识别支持卡牌列表
     遍历3列4行的卡牌网格，识别每张卡牌的右上角文字
     识别完一页后向下滑动到下一页，直到所有卡片识别完成
+    翻页循环由看门狗限制页数与时长，超出预算（或开启卡住检查时画面长时间不变）时停止并保存已识别的结果
     """
 
     GRID_COLS = 3
@@ -27,11 +33,21 @@ class SupportCardsAuto(CustomAction):
     CARD_HEIGHT = 128
     ACTION_DELAY = 0.5
 
+    # 看门狗：最多识别的页数与翻页循环的时间预算（秒，远大于正常耗时，只作兜底），画面不变视为卡住的时长（秒）
+    MAX_PAGES = 100
+    PAGE_BUDGET = 1800.0
+    STALL_TIME = 30.0
+
     # 支持卡牌数据文件路径
     SUPPORT_CARDS_FILE = "data/support_cards.json" if os.path.exists("data/support_cards.json") else "assets/data/support_cards.json"
     # 相似度阈值
     SIMILARITY_THRESHOLD = 0.7
 
+    # 卡牌数据与名称模糊匹配索引，每个进程只在数据文件变化时重新加载
+    _card_data: dict = {}
+    _card_data_mtime: float = 0.0
+    _name_index: FuzzyIndex | None = None
+
     def run(self, context: Context, argv: CustomAction.RunArg) -> bool:
         logger.success("事件: 识别支持卡牌")
 
@@ -44,28 +60,33 @@ class SupportCardsAuto(CustomAction):
         all_cards = []
         seen_names = set()
         page_index = 0
+        with Watchdog("SupportCardsAuto", budget=self.PAGE_BUDGET, max_iterations=self.MAX_PAGES, stall_time=self.STALL_TIME) as watchdog:
+            while True:
+                image = screencap(context, newer_than=time.perf_counter())
+                try:
+                    watchdog.tick(image)
+                except StallDetected:
+                    logger.warning("翻页没有进展，停止识别")
+                    break
+                page_cards, should_stop = self._recognize_page_cards(context, image, page_index, seen_names, card_data)
+
+                if should_stop:
+                    all_cards.extend(page_cards)
+                    break
+
+                if not page_cards:
+                    logger.info("当前页无新卡牌，停止识别")
+                    break
 
-        while True:
-            image = context.tasker.controller.post_screencap().wait().get()
-            page_cards, should_stop = self._recognize_page_cards(context, image, page_index, seen_names, card_data)
-
-            if should_stop:
                 all_cards.extend(page_cards)
-                break
-
-            if not page_cards:
-                logger.info("当前页无新卡牌，停止识别")
-                break
-
-            all_cards.extend(page_cards)
-            logger.info(f"第{page_index + 1}页识别到 {len(page_cards)} 张卡牌")
+                logger.info(f"第{page_index + 1}页识别到 {len(page_cards)} 张卡牌")
 
-            page_index += 1
-            if not self._swipe_to_next_page(context):
-                logger.info("滑动失败或已到最后一页")
-                break
+                page_index += 1
+                if not self._swipe_to_next_page(context):
+                    logger.info("滑动失败或已到最后一页")
+                    break
 
-            time.sleep(self.ACTION_DELAY)
+                sleep(context, self.ACTION_DELAY)
 
         logger.success(f"识别完成，共 {len(all_cards)} 张卡牌")
 
@@ -92,15 +113,21 @@ class SupportCardsAuto(CustomAction):
         return True
 
     def load_card_data(self) -> dict:
-        """加载支持卡牌数据"""
+        """加载支持卡牌数据并建立名称索引，数据文件未变化时直接使用已加载的数据"""
+        cls = type(self)
         try:
+            mtime = os.path.getmtime(self.SUPPORT_CARDS_FILE)
+            if cls._card_data and mtime == cls._card_data_mtime:
+                return cls._card_data
             with open(self.SUPPORT_CARDS_FILE, "r", encoding="utf-8") as f:
                 cards = json.load(f)
             # 构建名称到ID的映射
-            return {card["name"]: card["id"] for card in cards}
+            card_data = {card["name"]: card["id"] for card in cards}
         except Exception as e:
             logger.error(f"加载卡牌数据失败: {e}")
             return {}
+        cls._card_data, cls._card_data_mtime, cls._name_index = card_data, mtime, FuzzyIndex(card_data)
+        return card_data
 
     def match_card(self, name: str, star: int, card_data: dict) -> str | None:
         """匹配单张卡牌并处理ID"""
@@ -108,27 +135,20 @@ class SupportCardsAuto(CustomAction):
         if name in card_data:
             return self.process_card_id(card_data[name], star)
 
-        # 模糊匹配
-        best_similarity = 0
-        best_card_id = None
-        best_card_name = None
-        for card_name, card_id in card_data.items():
-            similarity = self.calculate_similarity(name, card_name)
-            if similarity > best_similarity:
-                best_similarity = similarity
-                best_card_id = card_id
-                best_card_name = card_name
-
-        if best_similarity >= self.SIMILARITY_THRESHOLD and best_card_id is not None:
+        # 模糊匹配：通过名称索引只计算可能达到阈值的名称，结果与逐个比较相同
+        index = self._name_index if card_data is self._card_data and self._name_index is not None else FuzzyIndex(card_data)
+        found = index.best(name, self.SIMILARITY_THRESHOLD)
+        if found is not None:
+            best_card_name, best_similarity = found
             logger.info(f"模糊匹配: '{name}' -> '{best_card_name}' (相似度: {best_similarity:.2f})")
-            return self.process_card_id(best_card_id, star)
+            return self.process_card_id(card_data[best_card_name], star)
 
         return None
 
     @staticmethod
     def calculate_similarity(name1: str, name2: str) -> float:
         """计算两个字符串的相似度"""
-        return SequenceMatcher(None, name1, name2).ratio()
+        return similarity(name1, name2)
 
     @staticmethod
     def process_card_id(card_id: str, star: int) -> str:
@@ -152,27 +172,30 @@ class SupportCardsAuto(CustomAction):
         should_stop = False
 
         # 先识别所有卡牌名称（不检查重复）
-        for row in range(self.GRID_ROWS):
-            for col in range(self.GRID_COLS):
-                if context.tasker.stopping:
-                    logger.info("任务中断")
-                    return page_cards, False
-
-                card_x = self.GRID_ROI[0] + col * self.CARD_WIDTH + self.CARD_WIDTH // 2
-                card_y = self.GRID_ROI[1] + row * self.CARD_HEIGHT + 100
-
-                if page_index == 0 and row == 0 and col == 0:
-                    pass
-                else:
-                    context.tasker.controller.post_click(card_x, card_y).wait()
-                    time.sleep(self.ACTION_DELAY)
-
-                card_name = self._recognize_card_name(context)
-                star_count = self._recognize_star_count(context)
-
-                if card_name:
-                    page_names.append((card_name, star_count))
-                    logger.info(f"已识别: {card_name}")
+        positions = [
+            (self.GRID_ROI[0] + col * self.CARD_WIDTH + self.CARD_WIDTH // 2, self.GRID_ROI[1] + row * self.CARD_HEIGHT + 100)
+            for row in range(self.GRID_ROWS)
+            for col in range(self.GRID_COLS)
+        ]
+        # 第一页的第一张卡牌默认已选中，不需要点击
+        job = None if page_index == 0 else tap(context, *positions[0], settle=self.ACTION_DELAY)
+        for index in range(len(positions)):
+            if context.tasker.stopping:
+                logger.info("任务中断")
+                return page_cards, False
+
+            if job is not None:
+                job.wait()
+            # 名称与星级从同一张截图识别
+            image = screencap(context, newer_than=time.perf_counter())
+            # 先点击下一张卡牌，等待其详情显示的同时识别本张
+            job = tap(context, *positions[index + 1], settle=self.ACTION_DELAY) if index + 1 < len(positions) else None
+            card_name = self._recognize_card_name(context, image)
+            star_count = self._recognize_star_count(context, image)
+
+            if card_name:
+                page_names.append((card_name, star_count))
+                logger.info(f"已识别: {card_name}")
 
         # 本页识别完成后检查重复，继续处理所有卡牌
         for card_name, star_count in page_names:
@@ -193,20 +216,18 @@ class SupportCardsAuto(CustomAction):
         return page_cards, should_stop
 
     @staticmethod
-    def _recognize_card_name(context: Context) -> str:
+    def _recognize_card_name(context: Context, image) -> str:
         """识别卡牌右上角的文字"""
-        image = context.tasker.controller.post_screencap().wait().get()
-        reco_detail = context.run_recognition("SupportCardsOCR", image)
+        reco_detail = memo.run_recognition(context, "SupportCardsOCR", image)
         if reco_detail and reco_detail.hit:
             text = "".join(item.text for item in reco_detail.filtered_results)
             return text.strip()
         return ""
 
     @staticmethod
-    def _recognize_star_count(context: Context) -> int:
+    def _recognize_star_count(context: Context, image) -> int:
         """识别卡牌star数量"""
-        image = context.tasker.controller.post_screencap().wait().get()
-        reco_detail = context.run_recognition("SupportCardsStar", image)
+        reco_detail = memo.run_recognition(context, "SupportCardsStar", image)
         if reco_detail and reco_detail.hit:
             return len(reco_detail.filtered_results)
         return 0
@@ -4,6 +4,7 @@ import random
 from utils import logger
 from maa.context import Context
 from maa.custom_action import CustomAction
+from utils.recognition import RecognitionSpec, run_recognitions
 from maa.agent.agent_server import AgentServer
 
 
@@ -58,13 +59,14 @@ class ChallengeAuto(CustomAction):
 
         elif mode in ["auto", "max", "min"]:
             image = context.tasker.controller.post_screencap().wait().get()
-            reco_detail = context.run_recognition(
-                "ChallengeRating",
-                image,
-                pipeline_override={
-                    "ChallengeRating": {"recognition": "OCR", "expected": "^\\d{3,6}$", "roi": [54, 634, 233, 447], "order_by": "Vertical"}
-                },
-            )
+            rating_override = {"recognition": "OCR", "expected": "^\\d{3,6}$", "order_by": "Vertical"}
+            specs = [RecognitionSpec("ratings", "ChallengeRating", [54, 634, 233, 447], rating_override)]
+            if mode == "auto":
+                # auto 模式还需要自身评分，与挑战评分在同一张截图上识别
+                specs.append(RecognitionSpec("self_rating", "ChallengeRating", [172, 505, 195, 69], rating_override))
+            reco_details = run_recognitions(context, image, specs)
+
+            reco_detail = reco_details["ratings"]
             if reco_detail and reco_detail.hit:
                 ratings = [result.text for result in reco_detail.filtered_results]
                 index = 1
@@ -85,18 +87,7 @@ class ChallengeAuto(CustomAction):
                     index = ratings_int.index(min(ratings_int))
                     logger.info(f"选择挑战评分最低的第 {index + 1} 位")
                 else:  # auto
-                    reco_detail = context.run_recognition(
-                        "ChallengeRating",
-                        image,
-                        pipeline_override={
-                            "ChallengeRating": {
-                                "recognition": "OCR",
-                                "expected": "^\\d{3,6}$",
-                                "roi": [172, 505, 195, 69],
-                                "order_by": "Vertical",
-                            }
-                        },
-                    )
+                    reco_detail = reco_details["self_rating"]
                     if reco_detail and reco_detail.hit:
                         self_rating_score = reco_detail.best_result.text
                         try:
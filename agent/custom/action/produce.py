@@ -1,14 +1,26 @@
 import json
 import time
 import random
-from typing import Any, Dict, List, Optional
-from collections import Counter
+from typing import Any, Dict, List, Optional, NamedTuple
 
-from utils import logger
+import numpy as np
+from utils import logger, watchdog, input_queue
+from utils.memo import memo
+from utils.wait import Backoff, wait_until_settled
 from maa.context import Context
+from utils.cancel import sleep
+from utils.frames import screencap
+from utils.tracker import BoxTracker
+from utils.template import TemplateScan, TemplateMatcher
+from utils.variants import variant, run_recognition
+from utils.watchdog import Watchdog
+from utils.ocr_cache import ocr_cache
 from maa.custom_action import CustomAction
+from utils.input_queue import tap, multi_tap, double_tap
 from maa.agent.agent_server import AgentServer
 
+from .produce_hud import Score, ProduceHudSnapshot
+
 
 class ProduceChooseEventBase(CustomAction):
     """
@@ -29,8 +41,11 @@ class ProduceChooseEventBase(CustomAction):
     SUGGESTION_CONFIG: dict = {}
     EVENT_CONFIG: dict = {}
     RUN_TASK_MAP: dict = {}
-    SUGGESTION_ROI: list = [270, 160, 350, 80]
-    REST_COUNT_ROI = [580, 755, 135, 75]
+    EVENT_ROI = [0, 880, 720, 220]
+    SP_TEMPLATE = "produce/sp.png"
+    EVENT_NODE = variant("ProduceRecognitionEvent", "TemplateMatch", roi=EVENT_ROI)
+    SP_NODE = variant("ProduceChooseEventSp", "TemplateMatch", template=SP_TEMPLATE)
+    SP_ROI_LIST = [[70, 900, 80, 80], [250, 900, 80, 80], [430, 900, 80, 80]]
 
     # 阈值常量
     CLICK_DELAY = 0.5
@@ -41,6 +56,9 @@ class ProduceChooseEventBase(CustomAction):
     LOW_HEALTH_RATIO = 0.2
     LOW_HEALTH_VALUE = 8
 
+    # 各子类的事件模板匹配器，首次使用时加载
+    _event_matchers: dict = {}
+
     def __init__(self):
         super().__init__()
         self.first = "Vi"
@@ -55,29 +73,22 @@ class ProduceChooseEventBase(CustomAction):
         logger.info(f"第一属性: {self.first}, 第二属性: {self.second}")
 
         image = self._get_screenshot(context)
+        # 各项数据按需识别：只有决策走到需要它的分支时才读取
+        snapshot = ProduceHudSnapshot(context, image, owner=self)
 
-        suggestion = ""
-        if context.get_node_data("ProduceSuggestion").get("enabled", True):
-            suggestion = self._get_suggestion(context, image)
+        best_event = self._choose_best_event(snapshot)
 
-        health_data = self._get_health(context, image) or {"current": 34, "max": 34, "ratio": 1.0}
-        points = self._get_current_points(context, image) or 0
-        score = self._get_current_score(context, image) or {"Vo": 0, "Da": 0, "Vi": 0, "max": 1}
-        events = self._get_available_events(context, image)
+        # 休息前检查：次数用完（检测到"あと0回"）时不可休息，改选其他事件
+        if best_event and best_event.get("run_task") == "ProduceChooseRest" and not snapshot.rest_available():
+            logger.warning("休息次数已用完，改选其他事件")
+            best_event = self._choose_best_event(snapshot, allow_rest=False)
 
-        best_event = self._choose_best_event(suggestion, health_data, points, score, events)
+        logger.debug(f"本回合读取: {', '.join(snapshot.fields)}，识别 {snapshot.recognition_count} 次，OCR 缓存命中 {snapshot.cache_hits} 次")
+        ocr_cache.log_stats()
         if not best_event:
             logger.info("无可用事件")
             return True
 
-        # 休息前检查：次数用完（检测到"あと0回"）时不可休息，改选其他事件
-        if best_event.get("run_task") == "ProduceChooseRest" and not self._is_rest_available(context, image):
-            logger.warning("休息次数已用完，改选其他事件")
-            best_event = self._choose_best_event(suggestion, health_data, points, score, events, allow_rest=False)
-            if not best_event:
-                logger.info("无可用事件")
-                return True
-
         box = best_event["box"]
         logger.info(f"选择事件: {best_event['name']}, 坐标: ({box[0] + box[2] // 2}, {box[1] + box[3] // 2})")
 
@@ -94,46 +105,37 @@ class ProduceChooseEventBase(CustomAction):
             logger.warning("偏好设置解析失败，使用默认值")
             return {"first": "Vi", "second": "Da"}
 
-    def _is_rest_available(self, context: Context, image) -> bool:
-        """检测休息是否可用：休息按钮剩余次数区域出现「あと0回」时不可休息。"""
-        reco_detail = context.run_recognition(
-            "ProduceRecognitionRestCount",
-            image,
-            pipeline_override={
-                "ProduceRecognitionRestCount": {
-                    "recognition": "OCR",
-                    "roi": self.REST_COUNT_ROI,
-                    "expected": ["あと[0０]回", "剩余[0０]次"],  # 兼容全角/半角 0
-                }
-            },
-        )
-        if reco_detail and reco_detail.hit:
-            logger.info("休息次数已用完")
-            return False
-        return True
-
-    def _choose_best_event(
-        self, suggestion: str, health_data: dict, points: int, score: dict, events: list, allow_rest: bool = True
-    ) -> Optional[dict]:
+    def _choose_best_event(self, snapshot: ProduceHudSnapshot, allow_rest: bool = True) -> Optional[dict]:
         """
-        根据获取到的信息从可用事件中选择最佳事件。
+        按优先级从可用事件中选择最佳事件。
+
+        体力、积分、得分、老师建议、事件列表均从 snapshot 按需读取，
+        只有决策走到需要它的分支时才会识别，同一帧内不会重复识别。
 
         Returns:
             dict: {"name": str, "box": [x, y, w, h], "run_task": str}，None表示无事件可选
         """
-        max_score = score.get("max", 1)
-        first_ratio = score.get(self.first, 0) / max_score if max_score > 0 else 0
-        second_ratio = score.get(self.second, 0) / max_score if max_score > 0 else 0
-        is_first_near_full = first_ratio >= self.FIRST_NEAR_FULL_RATIO
-        is_first_stopped = first_ratio >= self.ATTR_STOP_RATIO
-        is_second_stopped = second_ratio >= self.ATTR_STOP_RATIO
-
-        # 0. 低体力处理
-        current_health = health_data["current"] if health_data else 0
-        ratio_health = health_data["ratio"] if health_data else 1.0
-        if current_health < self.LOW_HEALTH_VALUE or ratio_health < self.LOW_HEALTH_RATIO:
-            go_out = self._find_event_by_name(events, "外出")
-            if go_out and points >= 100:
+
+        def events() -> list:
+            return list(snapshot.events())
+
+        def points() -> int:
+            return snapshot.points() or 0
+
+        def attr_ratio(attr: str) -> float:
+            score = snapshot.score() or Score(0, 0, 0, 1)
+            return score.get(attr, 0) / score.max if score.max > 0 else 0
+
+        def is_stopped(attr: str) -> bool:
+            return attr_ratio(attr) >= self.ATTR_STOP_RATIO
+
+        # 0. 低体力处理（OCR 与体力槽都读不出时跳过）
+        health = snapshot.health()
+        if health is None:
+            logger.warning("体力识别失败，跳过低体力判断")
+        elif (health.current is not None and health.current < self.LOW_HEALTH_VALUE) or health.ratio < self.LOW_HEALTH_RATIO:
+            go_out = self._find_event_by_name(events(), "外出")
+            if go_out and points() >= 100:
                 return self._make_event("外出", go_out)
             if allow_rest:
                 logger.info("体力过低，选择休息")
@@ -141,75 +143,75 @@ class ProduceChooseEventBase(CustomAction):
             # 休息不可用（次数用完），继续走后续优先级
 
         # 1. 老师建议
-        suggestion_attr = self._parse_suggestion(suggestion)
+        suggestion_attr = self._parse_suggestion(snapshot.suggestion())
         if suggestion_attr:
-            event = self._find_attr_event(events, suggestion_attr)
+            event = self._find_attr_event(events(), suggestion_attr)
             if event:
                 return self._make_event(suggestion_attr, event)
 
         # 2. SP（第一属性，仅当属性未达80%时）
-        if not is_first_stopped:
-            event = self._find_attr_event(events, self.first, need_sp=True)
+        if not is_stopped(self.first):
+            event = self._find_attr_event(events(), self.first, need_sp=True)
             if event:
                 return self._make_event(f"{self.first}_SP", event)
 
         # 3. SP（第二属性，仅当属性未达80%时）
-        if not is_second_stopped:
-            event = self._find_attr_event(events, self.second, need_sp=True)
+        if not is_stopped(self.second):
+            event = self._find_attr_event(events(), self.second, need_sp=True)
             if event:
                 return self._make_event(f"{self.second}_SP", event)
 
         # 钩子：SP之后、属性课程之前的额外优先事件（NIA的"营业"）
-        extra = self._choose_extra_before_attrs(events)
+        extra = self._choose_extra_before_attrs(events())
         if extra:
             return extra
 
         # 4. 第一属性课程（属性未达80%时）
-        if not is_first_stopped:
-            event = self._find_attr_event(events, self.first, need_sp=False)
+        if not is_stopped(self.first):
+            event = self._find_attr_event(events(), self.first, need_sp=False)
             if event:
                 return self._make_event(self.first, event)
 
         # 5. 第二属性课程（第一属性停止或快满时，且第二属性未达80%）
-        if (is_first_stopped or is_first_near_full) and not is_second_stopped:
-            event = self._find_attr_event(events, self.second, need_sp=False)
+        if (is_stopped(self.first) or attr_ratio(self.first) >= self.FIRST_NEAR_FULL_RATIO) and not is_stopped(self.second):
+            event = self._find_attr_event(events(), self.second, need_sp=False)
             if event:
                 return self._make_event(self.second, event)
 
         # 6. 交谈/活动（优先交谈，不满足则活动）
-        if points >= 100:
-            event = self._find_event_by_name(events, "交谈")
+        if points() >= 100:
+            event = self._find_event_by_name(events(), "交谈")
             if event:
                 return self._make_event("交谈", event)
-        event = self._find_event_by_name(events, "活动")
+        event = self._find_event_by_name(events(), "活动")
         if event:
             return self._make_event("活动", event)
 
         # 7. 上课（部分子类无此事件，由EVENT_CONFIG控制）
-        event = self._find_event_by_name(events, "上课")
+        event = self._find_event_by_name(events(), "上课")
         if event:
             return self._make_event("上课", event)
 
         # 8. 外出
-        event = self._find_event_by_name(events, "外出")
+        event = self._find_event_by_name(events(), "外出")
         if event:
             return self._make_event("外出", event)
 
         # 钩子：外出之后、其他属性SP之前的额外优先事件（NIA的"指导"）
-        extra = self._choose_extra_after_outing(events)
+        extra = self._choose_extra_after_outing(events())
         if extra:
             return extra
 
         # 9. SP（其他属性）
         for attr in ["Vo", "Da", "Vi"]:
             if attr not in [self.first, self.second]:
-                event = self._find_attr_event(events, attr, need_sp=True)
+                event = self._find_attr_event(events(), attr, need_sp=True)
                 if event:
                     return self._make_event(f"{attr}_SP", event)
 
         # 保底：从剩余事件中随机选择
-        if events:
-            fallback = self._find_any_event(events)
+        if events():
+            fallback = self._find_any_event(events())
             if fallback:
                 logger.warning(f"所有优先级未命中，保底选择: {fallback['name']}")
                 return fallback
@@ -225,16 +227,16 @@ class ProduceChooseEventBase(CustomAction):
         return None
 
     def _execute_event(self, context: Context, event: dict) -> bool:
-        """执行事件：双击坐标，等待动画后执行后续任务（如果有）。"""
+        """执行事件：双击坐标，等待动画结束后执行后续任务（如果有）"""
         run_task = event.get("run_task")
         box = event["box"]
 
         x = box[0] + box[2] // 2
         y = box[1] + box[3] // 2
-        context.tasker.controller.post_click(x, y).wait()
-        time.sleep(self.CLICK_DELAY)
-        context.tasker.controller.post_click(x, y).wait()
-        time.sleep(self.ACTION_DELAY)
+        # 两次点击至少间隔 CLICK_DELAY，过早的第二次点击会只命中一次；点击完成后再截图确认
+        double_tap(context, x, y, interval=self.CLICK_DELAY).wait()
+        # 等待切换动画开始并结束，最多等待 ACTION_DELAY
+        wait_until_settled(context, timeout=self.ACTION_DELAY, require_change=True)
         if run_task:
             logger.info(f"执行任务{run_task}")
             context.run_task(run_task)
@@ -283,123 +285,82 @@ class ProduceChooseEventBase(CustomAction):
     @staticmethod
     def _get_screenshot(context: Context):
         """获取屏幕截图"""
-        return context.tasker.controller.post_screencap().wait().get()
-
-    def _get_suggestion(self, context: Context, image) -> str:
-        """获取建议课程"""
-        reco_detail = context.run_recognition(
-            "ProduceChooseEventSuggestion",
-            image,
-            pipeline_override={"ProduceChooseEventSuggestion": {"recognition": "OCR", "roi": self.SUGGESTION_ROI}},
-        )
+        return screencap(context, newer_than=time.perf_counter())
 
-        if not (reco_detail and reco_detail.hit):
-            return ""
+    @classmethod
+    def _get_event_matcher(cls) -> Optional[TemplateMatcher]:
+        """获取事件模板匹配器，EVENT_CONFIG 与 SP 模板每个子类只加载一次；加载失败时返回 None"""
+        if cls not in cls._event_matchers:
+            try:
+                cls._event_matchers[cls] = TemplateMatcher(dict(cls.EVENT_CONFIG, SP=cls.SP_TEMPLATE), cls.EVENT_ROI)
+            except (OSError, ValueError) as e:
+                logger.warning(f"事件模板加载失败，改用逐个识别: {e}")
+                cls._event_matchers[cls] = None
+        return cls._event_matchers[cls]
 
-        suggestion_text = "".join(item.text for item in reco_detail.filtered_results)
-        logger.info(f"老师建议: {suggestion_text}")
-        return suggestion_text
+    def _get_available_events(self, context: Context, image) -> List[Dict[str, Any]]:
+        """获取可用事件列表"""
+        start_time = time.perf_counter()
+        matcher = self._get_event_matcher()
+        if matcher is not None:
+            available_events, available_events_name = self._match_events(matcher.scan(image))
+        else:
+            available_events, available_events_name = self._match_events_by_pipeline(context, image)
 
-    @staticmethod
-    def _get_health(context: Context, image) -> Optional[dict]:
-        """获取体力比例"""
-        reco_detail = context.run_recognition("ProduceRecognitionHealth", image)
-        if not (reco_detail and reco_detail.hit):
-            return None
+        logger.info(f"可用事件: {available_events_name.rstrip(', ')}")
+        logger.debug(f"事件识别耗时: {(time.perf_counter() - start_time) * 1000:.1f}ms")
+        logger.debug(available_events)
+        return available_events
 
-        try:
-            health_parts = reco_detail.best_result.text.split("/")
-            current_health = int("".join(filter(str.isdigit, health_parts[0])))
-            max_health = int("".join(filter(str.isdigit, health_parts[1])))
-            ratio = current_health / max_health
-            logger.info(f"体力: {current_health}/{max_health} ({ratio:.2%})")
-            return {"current": current_health, "max": max_health, "ratio": ratio}
-        except (ValueError, IndexError, ZeroDivisionError):
-            logger.warning("体力数据解析失败")
-            return None
+    def _match_events(self, scan: TemplateScan) -> tuple:
+        """从一次模板扫描结果中读取所有事件及SP标记"""
+        available_events = []
+        available_events_name = ""
 
-    @staticmethod
-    def _get_current_points(context: Context, image) -> Optional[int]:
-        """获取当前积分"""
-        reco_detail = context.run_recognition(
-            "ProduceRecognitionPoint",
-            image,
-            pipeline_override={"ProduceRecognitionPoint": {"roi": [320, 90, 130, 54]}},
-        )
-        if not (reco_detail and reco_detail.hit):
-            return None
-        try:
-            points = int(reco_detail.best_result.text.replace(",", ""))
-            logger.info(f"积分: {points}")
-            return points
-        except ValueError:
-            logger.warning("积分数据解析失败")
-            return None
+        for event_name in self.EVENT_CONFIG:
+            hit = scan.best(event_name)
+            if hit:
+                if event_name in ["Da", "Vi", "Vo"]:
+                    available_events_name = "Vo, Da, Vi"
+                    sp_list = [scan.best("SP", roi) is not None for roi in self.SP_ROI_LIST]
+                    for roi, has_sp in zip(self.SP_ROI_LIST, sp_list):
+                        if has_sp:
+                            logger.debug(f"{roi}存在SP课程")
+                    available_events = [
+                        {"Vo": [190, 1000, 1, 1], "SP": sp_list[0]},
+                        {"Da": [360, 1000, 1, 1], "SP": sp_list[1]},
+                        {"Vi": [530, 1000, 1, 1], "SP": sp_list[2]},
+                    ]
+                    break
+                available_events.append({event_name: hit.box})
+                available_events_name += f"{event_name}, "
 
-    @staticmethod
-    def _get_current_score(context: Context, image) -> Optional[dict]:
-        """获取当前得分"""
-        score = {
-            "Vo": 0,
-            "Da": 0,
-            "Vi": 0,
-            "max": 0,
-        }
-        for i in range(3):
-            reco_detail = context.run_recognition(
-                "ProduceRecognitionScore",
-                image,
-                pipeline_override={"ProduceRecognitionScore": {"roi": [150 + i * 150, 668, 136, 80]}},
-            )
-            if reco_detail and reco_detail.hit and len(reco_detail.filtered_results) == 2:
-                current_score = int("".join(filter(lambda c: c.isdigit(), reco_detail.filtered_results[0].text)))
-                max_score = int("".join(filter(lambda c: c.isdigit(), reco_detail.filtered_results[1].text.replace("/", ""))))
-                logger.debug(f"第{i + 1}列得分: {current_score} / {max_score}")
-                score[["Vo", "Da", "Vi"][i]] = current_score
-                score["max"] = max_score if score["max"] < max_score < 9999 else score["max"]
-        try:
-            logger.info(f"当前得分: Vo={score['Vo']}, Da={score['Da']}, Vi={score['Vi']}, Max={score['max']}")
-            return score
-        except ValueError:
-            logger.warning("积分数据解析失败")
-            return None
+        return available_events, available_events_name
 
-    def _get_available_events(self, context: Context, image) -> List[Dict[str, Any]]:
-        """获取可用事件列表"""
+    def _match_events_by_pipeline(self, context: Context, image) -> tuple:
+        """逐个模板调用识别节点获取事件（模板加载失败时的回退方案）"""
         available_events = []
         available_events_name = ""
 
         for event_name, event_img in self.EVENT_CONFIG.items():
-            reco_detail = context.run_recognition(
-                "ProduceRecognitionEvent",
-                image,
-                pipeline_override={
-                    "ProduceRecognitionEvent": {"recognition": "TemplateMatch", "template": event_img, "roi": [0, 880, 720, 220]}
-                },
-            )
+            reco_detail = run_recognition(context, self.EVENT_NODE, image, template=event_img)
             if reco_detail and reco_detail.hit:
                 if event_name in ["Da", "Vi", "Vo"]:
                     available_events_name = "Vo, Da, Vi"
                     available_events = [
-                        {"Vo": [190, 1000, 1, 1], "SP": self._get_sp_course(context, image, [70, 900, 80, 80])},
-                        {"Da": [360, 1000, 1, 1], "SP": self._get_sp_course(context, image, [250, 900, 80, 80])},
-                        {"Vi": [530, 1000, 1, 1], "SP": self._get_sp_course(context, image, [430, 900, 80, 80])},
+                        {"Vo": [190, 1000, 1, 1], "SP": self._get_sp_course(context, image, self.SP_ROI_LIST[0])},
+                        {"Da": [360, 1000, 1, 1], "SP": self._get_sp_course(context, image, self.SP_ROI_LIST[1])},
+                        {"Vi": [530, 1000, 1, 1], "SP": self._get_sp_course(context, image, self.SP_ROI_LIST[2])},
                     ]
                     break
                 available_events.append({event_name: reco_detail.best_result.box})
                 available_events_name += f"{event_name}, "
 
-        logger.info(f"可用事件: {available_events_name.rstrip(', ')}")
-        logger.debug(available_events)
-        return available_events
+        return available_events, available_events_name
 
     def _get_sp_course(self, context: Context, image, sp_roi: List[int]) -> bool:
         """获取SP课程选择"""
-        reco_detail = context.run_recognition(
-            "ProduceChooseEventSp",
-            image,
-            pipeline_override={"ProduceChooseEventSp": {"recognition": "TemplateMatch", "template": "produce/sp.png", "roi": sp_roi}},
-        )
+        reco_detail = run_recognition(context, self.SP_NODE, image, roi=sp_roi)
         if reco_detail and reco_detail.hit:
             logger.debug(f"{sp_roi}存在SP课程")
             return True
@@ -515,23 +476,54 @@ class ProduceChooseNIAEventAuto(ProduceChooseEventBase):
         return None
 
 
+class CardBattleState(NamedTuple):
+    """出牌场景单帧状态"""
+
+    playable: bool  # 跳过回合按钮可见，可以出牌
+    health_visible: bool  # 体力槽可见，仍处于出牌场景
+    stray_button: bool  # 出现需要点掉的按钮（误触弹窗等）
+    move_cards_dialog: bool  # 出现移动卡牌界面
+
+
 @AgentServer.custom_action("ProduceCardsAuto")
 class ProduceCardsAuto(CustomAction):
     """
     自动识别根据系统提示出牌
-    15秒未检测到提示牌，则打出最高分的牌
+    手牌检测结果经多帧跟踪，连续检测到 CONFIRM_FRAMES 帧才视为确认，避免模型闪烁导致误操作
+    手牌稳定 STABLE_TIME_OUT 秒仍无提示牌，或 15 秒未检测到提示牌，则打出最高分的牌
     识别不到体力退出函数
     处理是否打出该牌的弹窗
+    出牌与等待循环由看门狗限制时长；开启卡住检查时，画面长时间不变或反复打出同一位置的牌时先尝试点掉弹窗，仍无进展则中止
     """
 
     # 阈值常量
     CLICK_DELAY = 0.3
     TIME_OUT = 15.0
+    STABLE_TIME_OUT = 8.0
+    CONFIRM_FRAMES = 2
+    # 等待可出牌时的轮询间隔：状态不变时从 POLL_MIN 逐步拉长到 POLL_MAX
+    POLL_MIN = 0.2
+    POLL_MAX = 1.0
 
     # 卡牌Y轴位置边界（超出范围视为识别异常，不点击）
     CARD_Y_MIN = 840
     CARD_Y_MAX = 1000
 
+    # 移动卡牌界面中卡牌列表所在区域 [x, y, w, h]，以及卡牌的最小尺寸
+    MOVE_CARDS_AREA = [40, 440, 640, 660]
+    MOVE_CARD_MIN_SIZE = 60
+    # 直接点击时最多尝试的卡牌数，均未选中时退回网格点击
+    MOVE_CARD_MAX_TRIES = 3
+    # 是否按定位结果直接点击卡牌；定位的饱和度与亮度阈值尚未用实机截图验证，默认只记录定位结果，仍按网格点击
+    # （可用 tools/benchmark/move_cards.py 在实机截图上检查定位结果）
+    MOVE_CARD_LOCATE = False
+
+    # 看门狗：整场出牌与单次等待的时间预算（秒，远大于正常耗时，只作兜底），画面不变视为卡住的时长（秒），画面不变时重复同一操作的次数上限
+    BATTLE_BUDGET = 1800.0
+    WAIT_BUDGET = 600.0
+    STALL_TIME = 60.0
+    MAX_REPEATS = 3
+
     def __init__(self):
         super().__init__()
         self.start_time = time.time()
@@ -541,10 +533,11 @@ class ProduceCardsAuto(CustomAction):
         context: Context,
         argv: CustomAction.RunArg,
     ) -> bool:
+        memo.reset_stats()
         # 使用饮料
         self._wait_until_playable(context)
-        image = context.tasker.controller.post_screencap().wait().get()
-        reco_detail = context.run_recognition("ProduceCheckDrinkButton", image)
+        image = screencap(context, newer_than=time.perf_counter())
+        reco_detail = memo.run_recognition(context, "ProduceCheckDrinkButton", image)
         hit_count = len(reco_detail.filtered_results)  # 获取饮料数
         logger.info(f"识别到{hit_count}瓶饮料")
         for _ in range(hit_count):
@@ -553,101 +546,101 @@ class ProduceCardsAuto(CustomAction):
 
         # 开始出牌
         self.start_time = time.time()
-        while True:
-            # 处理手动终止任务
-            if context.tasker.stopping:
-                logger.info("任务中断")
-                return True
+        frame_time = time.perf_counter()
+        tracker = BoxTracker(confirm_frames=self.CONFIRM_FRAMES)
+        hand_ids, hand_stable_since = set(), time.time()
+        with Watchdog(
+            "ProduceCardsAuto",
+            budget=self.BATTLE_BUDGET,
+            stall_time=self.STALL_TIME,
+            max_repeats=self.MAX_REPEATS,
+            escalate=lambda: context.run_task("ProduceButton"),
+        ) as watchdog:
+            while True:
+                # 处理手动终止任务
+                if context.tasker.stopping:
+                    logger.info("任务中断")
+                    return True
 
-            # 截图
-            image = context.tasker.controller.post_screencap().wait().get()
+                # 截图（启用后台截图时直接取上一帧之后的最新画面）
+                image = screencap(context, newer_than=frame_time)
+                frame_time = time.perf_counter()
 
-            # 通过检测体力槽判断是否处于出牌场景
-            if not self._is_playing_card(context, image):
-                logger.info("未检测到体力")
-                logger.success("事件: 退出出牌")
-                break
+                # 通过检测体力槽判断是否处于出牌场景
+                if not self._is_playing_card(context, image):
+                    logger.info("未检测到体力")
+                    logger.success("事件: 退出出牌")
+                    break
 
-            # 识别手牌
-            reco_detail = context.run_recognition("ProduceRecognitionCards", image)
-            if reco_detail and reco_detail.hit:
-                # 目前模型识别的准确度不够高，暂时使用all_results
-                results = reco_detail.all_results
+                # 识别手牌
+                reco_detail = memo.run_recognition(context, "ProduceRecognitionCards", image)
+                if reco_detail and reco_detail.hit:
+                    # 目前模型识别的准确度不够高，暂时使用all_results
+                    # Y轴超出范围的框视为识别异常直接丢弃，其余检测结果经多帧跟踪平滑
+                    tracker.update(
+                        [(result.label, result.box, result.score) for result in reco_detail.all_results if self._in_card_area(result.box)]
+                    )
+                else:
+                    tracker.update([])
 
-                # 获取卡牌信息
-                suggestions, useless, cards, suggestions_box, best_box = self._get_card_info(results)
-                # print(f"卡片数量:{suggestions}/{cards}/{useless}")
+                # 手牌（存活的轨迹）发生变化时重新计算稳定时间
+                current_ids = {track.id for track in tracker.alive()}
+                if current_ids != hand_ids:
+                    hand_ids, hand_stable_since = current_ids, time.time()
+
+                suggestions = tracker.confirmed("suggestions")
+                cards = tracker.confirmed("cards")
+                played = False
+                target = None
 
                 # 有推荐牌时，打出推荐牌
-                if suggestions > 0:
-                    if suggestions_box[1] < self.CARD_Y_MIN or suggestions_box[1] > self.CARD_Y_MAX:
-                        continue
-                    self._play_a_card(context, suggestions_box)
+                if suggestions:
+                    target = suggestions[0].box
+                    played = self._play_a_card(context, target)
                 # 只有一张可用牌时，直接打出该牌
-                elif cards == 1:
-                    if best_box[1] < self.CARD_Y_MIN or best_box[1] > self.CARD_Y_MAX:
-                        continue
-                    time.sleep(1)  # 防止点击过早导致只命中一次
-                    self._play_a_card(context, best_box)
+                elif len(cards) == 1 and len(tracker.alive("cards")) == 1:
+                    target = cards[0].box
+                    sleep(context, 1)  # 防止点击过早导致只命中一次
+                    played = self._play_a_card(context, target)
                 # 没有可用牌时，先判断是否处于出牌场景，确认处于出牌场景后，再跳过回合
-                elif useless > 0 and suggestions == 0 and cards == 0:
+                elif tracker.confirmed("useless") and not tracker.alive("suggestions") and not tracker.alive("cards"):
                     logger.warning("!!!!!!!!无可用牌!!!!!!!!!!!")
                     context.run_task("ProduceRecognitionSkipRound")
                     self._wait_until_playable(context)
                     self.start_time = time.time()
-
-                end_time = time.time()
-                if end_time - self.start_time > self.TIME_OUT:
-                    if best_box[1] < self.CARD_Y_MIN or best_box[1] > self.CARD_Y_MAX:
-                        continue
-
+                    played = True
+                # 手牌稳定一段时间或检测超时仍无提示牌时，打出得分最高的牌
+                elif cards and (time.time() - hand_stable_since > self.STABLE_TIME_OUT or time.time() - self.start_time > self.TIME_OUT):
                     logger.warning("检测超时")
-                    self._play_a_card(context, best_box)
-
-            else:
-                reco_detail = context.run_recognition("ProduceRecognitionNoCards", image)
-                if reco_detail.hit:
-                    logger.info("无手牌")
-                    context.run_task("ProduceRecognitionSkipRound")
-                    self._wait_until_playable(context)
-                    self.start_time = time.time()
+                    target = cards[0].box
+                    played = self._play_a_card(context, target)
+                elif not tracker.alive():
+                    reco_detail = memo.run_recognition(context, "ProduceRecognitionNoCards", image)
+                    if reco_detail.hit:
+                        logger.info("无手牌")
+                        context.run_task("ProduceRecognitionSkipRound")
+                        self._wait_until_playable(context)
+                        self.start_time = time.time()
+                        played = True
+
+                # 出牌决策按卡牌位置量化，检测框的轻微抖动视为同一决策
+                watchdog.tick(image, (target[0] + target[2] // 2) // 40 if target is not None else None)
+
+                if played:
+                    # 手牌已变化，重新跟踪
+                    tracker.reset()
+                    hand_ids, hand_stable_since = set(), time.time()
+                    frame_time = time.perf_counter()
+                    continue
 
-            time.sleep(self.CLICK_DELAY)
+                sleep(context, self.CLICK_DELAY)
 
+        memo.log_stats("出牌识别缓存")
         return True
 
-    @staticmethod
-    def _get_card_info(results: list):
-        """
-        从识别结果中获取卡牌信息
-
-        Args:
-            results (list): 识别结果列表
-
-        Returns:
-            suggestions (int): 建议牌数量
-            useless (int): 无用牌数量
-            cards (int): 可用牌数量
-            suggestions_box (list): 建议牌区域，格式为[x, y, w, h]（x、y为区域左上角的坐标）
-            best_box (list): 可用牌区域，格式为[x, y, w, h]（x、y为区域左上角的坐标）
-        """
-        label_counts = Counter()
-        suggestions_box = [0, 0, 1, 1]
-        best_box = [0, 0, 1, 1]
-        best_score = 0
-        for result in results:
-            label_counts[result.label] += 1
-            if result.label == "suggestions":
-                suggestions_box = result.box
-            if result.label == "cards":
-                # 选出识别分数最高分的卡牌，避免错误
-                if result.score > best_score:
-                    best_score = result.score
-                    best_box = result.box
-        suggestions = label_counts["suggestions"]
-        useless = label_counts["useless"]
-        cards = label_counts["cards"]
-        return suggestions, useless, cards, suggestions_box, best_box
+    def _in_card_area(self, box: list) -> bool:
+        """卡牌框的Y轴位置是否在手牌区域内"""
+        return self.CARD_Y_MIN <= box[1] <= self.CARD_Y_MAX
 
     def _play_a_card(self, context: Context, box: list) -> bool:
         """
@@ -663,22 +656,21 @@ class ProduceCardsAuto(CustomAction):
 
         # 出牌
         # context.tasker.controller.post_click(box[0] + 100, box[1] + 140).wait()
-        context.tasker.controller.post_click(box[0] + box[2] // 2, box[1] + box[3] // 2).wait()
-        time.sleep(self.CLICK_DELAY)
-        context.tasker.controller.post_click(box[0] + box[2] // 2, box[1] + box[3] // 2).wait()
+        # 两次点击至少间隔 CLICK_DELAY，点击完成后再截图等待出牌动画
+        double_tap(context, box[0] + box[2] // 2, box[1] + box[3] // 2, interval=self.CLICK_DELAY).wait()
         logger.info("出牌 耗时:{:.2f}秒".format(time.time() - self.start_time))
 
-        # 等待回到可出牌状态后，重置计时
-        time.sleep(1)
-        self._wait_until_playable(context)
+        # 等待出牌动画开始并结束（最多1秒）后，等待回到可出牌状态，重置计时
+        image = wait_until_settled(context, timeout=1.0, require_change=True)
+        self._wait_until_playable(context, image=image)
         self.start_time = time.time()
 
         return True
 
-    @staticmethod
-    def _handle_move_cards(context: Context, image=None) -> bool:
+    @classmethod
+    def _handle_move_cards(cls, context: Context, image=None) -> bool:
         """
-        一种处理移动卡片界面的笨方法
+        处理移动卡牌界面：开启 MOVE_CARD_LOCATE 时先直接定位卡牌点击，定位失败时退回网格点击
 
         Args:
             context: maa的Context类
@@ -689,28 +681,92 @@ class ProduceCardsAuto(CustomAction):
                 如果没有出现移动卡牌界面或处理过程出现问题，返回False。
         """
         if image is None:
-            image = context.tasker.controller.post_screencap().wait().get()
+            image = screencap(context, newer_than=time.perf_counter())
 
-        reco_detail = context.run_recognition("ProduceRecognitionChooseMoveCards", image)
-        if reco_detail.hit:
-            y = 450
-            while y < 1100:
-                # for x in [140, 285, 440, 585]:
-                for x in [140, 285]:
-                    context.tasker.controller.post_click(x, y).wait()
-                    time.sleep(0.2)
-                    context.tasker.controller.post_click(x, y).wait()
-                    time.sleep(0.2)
-                image = context.tasker.controller.post_screencap().wait().get()
-                reco_detail = context.run_recognition("ProduceRecognitionChooseMoveCards", image)
-                if not reco_detail.hit:
-                    context.run_task("ProduceMoveCards")
-                    return True
-                else:
-                    y = y + 100
-                # 检测任务中止的情况，防止卡死，检测成功时返回False
-                if context.tasker.stopping:
-                    return False
+        reco_detail = memo.run_recognition(context, "ProduceRecognitionChooseMoveCards", image)
+        if not (reco_detail and reco_detail.hit):
+            return False
+
+        start_time = time.perf_counter()
+        slots = cls._find_move_card_slots(image)
+        logger.debug(f"移动卡牌: 定位到 {len(slots)} 张卡牌 {slots}")
+        if not cls.MOVE_CARD_LOCATE:
+            slots = []
+        for box in slots[: cls.MOVE_CARD_MAX_TRIES]:
+            if cls._select_move_card(context, box[0] + box[2] // 2, box[1] + box[3] // 2):
+                context.run_task("ProduceMoveCards")
+                logger.info(f"移动卡牌: 直接点击完成，耗时 {time.perf_counter() - start_time:.2f}秒")
+                return True
+            if context.tasker.stopping:
+                return False
+
+        if slots:
+            logger.warning("移动卡牌: 直接点击未能选中卡牌，改用网格点击")
+        handled = cls._handle_move_cards_by_grid(context)
+        logger.info(f"移动卡牌: 网格点击{'完成' if handled else '失败'}，耗时 {time.perf_counter() - start_time:.2f}秒")
+        return handled
+
+    @classmethod
+    def _find_move_card_slots(cls, image) -> List[List[int]]:
+        """
+        一次定位移动卡牌界面中的所有卡牌
+
+        卡牌列表背景为浅色，卡牌为彩色或深色区域：按行、列投影找出连续的非背景区域。
+
+        Returns:
+            list: 卡牌框 [x, y, w, h] 列表，按从上到下、从左到右排序
+        """
+        x0, y0, w, h = cls.MOVE_CARDS_AREA
+        area = image[y0 : y0 + h, x0 : x0 + w, :3].astype(np.int16)
+        saturation = area.max(axis=2) - area.min(axis=2)
+        mask = (saturation > 40) | (area.max(axis=2) < 150)
+
+        slots = []
+        for top, bottom in cls._runs(mask.mean(axis=1) > 0.1, cls.MOVE_CARD_MIN_SIZE):
+            for left, right in cls._runs(mask[top:bottom].mean(axis=0) > 0.3, cls.MOVE_CARD_MIN_SIZE):
+                slots.append([x0 + left, y0 + top, right - left, bottom - top])
+        return slots
+
+    @staticmethod
+    def _runs(flags, min_length: int) -> List[tuple]:
+        """返回布尔序列中长度不小于 min_length 的连续 True 区间 [start, end)"""
+        padded = np.concatenate(([False], flags, [False])).astype(np.int8)
+        edges = np.flatnonzero(np.diff(padded))
+        return [(int(start), int(end)) for start, end in zip(edges[::2], edges[1::2]) if end - start >= min_length]
+
+    @staticmethod
+    def _select_move_card(context: Context, x: int, y: int) -> bool:
+        """双击卡牌，返回是否已选中（「未选择卡牌」提示消失）"""
+        # 等待点击完成后再截图，否则截图会排在尚未发起的点击前面
+        double_tap(context, x, y, interval=0.2).wait()
+        image = wait_until_settled(context, timeout=1.0, require_change=True)
+        if image is None:
+            return False
+        reco_detail = memo.run_recognition(context, "ProduceRecognitionChooseMoveCards", image)
+        return not (reco_detail and reco_detail.hit)
+
+    @staticmethod
+    def _handle_move_cards_by_grid(context: Context) -> bool:
+        """
+        一种处理移动卡片界面的笨方法：按网格逐行点击，直到选中卡牌
+
+        Returns:
+            bool: 处理成功返回True；处理过程出现问题返回False。
+        """
+        y = 450
+        while y < 1100:
+            # for x in [140, 285, 440, 585]:
+            multi_tap(context, [(x, y) for x in [140, 285]], interval=0.2, taps=2, settle=0.2).wait()
+            image = screencap(context, newer_than=time.perf_counter())
+            reco_detail = memo.run_recognition(context, "ProduceRecognitionChooseMoveCards", image)
+            if not reco_detail.hit:
+                context.run_task("ProduceMoveCards")
+                return True
+            else:
+                y = y + 100
+            # 检测任务中止的情况，防止卡死，检测成功时返回False
+            if context.tasker.stopping:
+                return False
         return False
 
     @staticmethod
@@ -726,9 +782,9 @@ class ProduceCardsAuto(CustomAction):
             bool: 如果处于出牌场景，返回True；否则返回False。
         """
         if image is None:
-            image = context.tasker.controller.post_screencap().wait().get()
+            image = screencap(context, newer_than=time.perf_counter())
 
-        reco_detail = context.run_recognition("ProduceRecognitionHealthFlag", image)
+        reco_detail = memo.run_recognition(context, "ProduceRecognitionHealthFlag", image)
         if reco_detail and reco_detail.hit:
             return True
         # reco_detail = context.run_recognition('ProduceRecognitionChooseMoveCards', image)
@@ -736,54 +792,100 @@ class ProduceCardsAuto(CustomAction):
         #     return True
         return False
 
-    def _wait_until_playable(self, context: Context, confirmation_count=1):
+    @staticmethod
+    def _classify_battle_state(context: Context, image) -> CardBattleState:
+        """
+        一次判断出牌场景的状态，状态确定后不再执行后续识别
+
+        识别顺序：跳过回合按钮 → 体力槽 → 误触按钮 → 移动卡牌界面
+        - 可出牌时体力槽必然可见，且不会有弹窗，直接返回
+        - 出现误触按钮时先处理按钮，移动卡牌界面留到下一轮判断
+
+        Args:
+            context: maa的Context类
+            image: 截图
+
+        Returns:
+            CardBattleState: 未执行的识别对应字段为 False（可出牌时 health_visible 为 True）
+        """
+        reco_detail = memo.run_recognition(context, "ProduceRecognitionSkipRound", image)
+        if reco_detail and reco_detail.hit:
+            return CardBattleState(True, True, False, False)
+
+        reco_detail = memo.run_recognition(context, "ProduceRecognitionHealthFlag", image)
+        health_visible = bool(reco_detail and reco_detail.hit)
+
+        reco_detail = memo.run_recognition(context, "ProduceButton", image)
+        if reco_detail and reco_detail.hit:
+            return CardBattleState(False, health_visible, True, False)
+
+        reco_detail = memo.run_recognition(context, "ProduceRecognitionChooseMoveCards", image)
+        return CardBattleState(False, health_visible, False, bool(reco_detail and reco_detail.hit))
+
+    def _wait_until_playable(self, context: Context, confirmation_count=1, image=None):
         """
         等待直到处于可出牌状态
 
         Args:
             context: maa的Context类
             confirmation_count：重复核对的次数，用来应对识别对象一闪而过的假True情况（主要存在于喝饮料的时候）
+            image: 已有的最新截图，为 None 时重新截图
 
         Returns:
             bool: 处于出牌场景时，返回True；不处于出牌场景时，返回False
         """
         count_playable = 0
         count_exit = 0
-        while True:
-            image = context.tasker.controller.post_screencap().wait().get()
-
-            # 通过跳过回合按钮检测是否处于可出牌状态
-            reco_detail = context.run_recognition("ProduceRecognitionSkipRound", image)
-            if reco_detail and reco_detail.hit:
-                count_playable += 1
-                if count_playable >= confirmation_count:
-                    return True
+        backoff = Backoff(self.POLL_MIN, self.POLL_MAX)
+        last_state = None
+        # 画面 STALL_TIME 秒不变仍未回到可出牌状态，或反复点掉弹窗画面却不变时视为卡住
+        with Watchdog("ProduceWaitPlayable", budget=self.WAIT_BUDGET, stall_time=self.STALL_TIME, max_repeats=self.MAX_REPEATS) as watchdog:
+            while True:
+                if image is None:
+                    image = screencap(context, newer_than=time.perf_counter())
+
+                state = self._classify_battle_state(context, image)
+                watchdog.tick(image, "ProduceButton" if state.stray_button else None)
+
+                # 通过跳过回合按钮检测是否处于可出牌状态
+                if state.playable:
+                    count_playable += 1
+                    if count_playable >= confirmation_count:
+                        return True
+
+                # 检测血条是否存在，如连续n次检查不到血条，则认为已退出出牌场景
+                # 如果识别时间太长，2次就够了，主要避免CLEAR效果遮住血条的情况
+                # 如果识别时间太短，导致提前出函数，CLEAR转PERFECT的那一回合出牌计时会差很远。如果出现这种情况，就设置为3次
+                if not state.health_visible:
+                    count_exit += 1
+                    if count_exit >= 2:
+                        return False
+
+                # 解决莫名其妙的误触问题
+                if state.stray_button:
+                    context.run_task("ProduceButton")
+
+                # 处理移动卡片界面
+                if state.move_cards_dialog and self._handle_move_cards(context, image):
+                    count_playable = 0
+                    count_exit = 0
 
-            # 检测血条是否存在，如连续n次检查不到血条，则认为已退出出牌场景
-            # 如果识别时间太长，2次就够了，主要避免CLEAR效果遮住血条的情况
-            # 如果识别时间太短，导致提前出函数，CLEAR转PERFECT的那一回合出牌计时会差很远。如果出现这种情况，就设置为3次
-            reco_detail = context.run_recognition("ProduceRecognitionHealthFlag", image)
-            if not (reco_detail and reco_detail.hit):
-                count_exit += 1
-                if count_exit >= 2:
+                # 检测任务中止的情况，防止卡死，检测成功时返回False
+                if context.tasker.stopping:
                     return False
 
-            # 解决莫名其妙的误触问题
-            reco_detail = context.run_recognition("ProduceButton", image)
-            if reco_detail and reco_detail.hit:
-                context.run_task("ProduceButton")
-
-            # 处理移动卡片界面
-            if self._handle_move_cards(context, image):
-                count_playable = 0
-                count_exit = 0
-
-            # 检测任务中止的情况，防止卡死，检测成功时返回False
-            if context.tasker.stopping:
-                return False
-
-            # 睡一会
-            time.sleep(1)
+                # 状态变化或处理了弹窗：等画面静止后立即再检测（最多 POLL_MAX 秒），静止后的截图直接用于下一轮识别
+                # 状态不变：轮询间隔从 POLL_MIN 逐步拉长到 POLL_MAX
+                if state.stray_button or state.move_cards_dialog or state != last_state:
+                    backoff.reset()
+                    image = wait_until_settled(context, timeout=self.POLL_MAX, reference=image)
+                    if image is None:
+                        return False
+                else:
+                    sleep(context, backoff.delay)
+                    backoff.next()
+                    image = None
+                last_state = state
 
 
 @AgentServer.custom_action("ProduceChooseWorkAuto")
@@ -799,8 +901,11 @@ class ProduceChooseWorkAuto(CustomAction):
       - [2] → 选择第三个（位置3不扣体力）
       - [3] → 选择第二个（位置2不扣体力）
       - 其他情况 → 选择第一个
+    只读到体力槽且不知道上限时，按比例 ProduceChooseEventBase.LOW_HEALTH_RATIO 判断
     """
 
+    LOW_HEALTH_VALUE = 10
+
     def run(
         self,
         context: Context,
@@ -809,72 +914,34 @@ class ProduceChooseWorkAuto(CustomAction):
         first_roi = [100, 760]
         second_roi = [100, 880]
         third_roi = [100, 1000]
-        image = context.tasker.controller.post_screencap().wait().get()
-        health_data = self._get_health(context, image)
-        current = health_data["current"] if health_data else 0
+        image = screencap(context, newer_than=time.perf_counter())
+        snapshot = ProduceHudSnapshot(context, image)
+        hud = snapshot.capture("health", "health_positions")
+        health = hud.health
+        if health is None:
+            enough_health = False
+        elif health.current is not None:
+            enough_health = health.current > self.LOW_HEALTH_VALUE
+        else:
+            enough_health = health.ratio > ProduceChooseEventBase.LOW_HEALTH_RATIO
 
-        health_position = self._get_health_position(context, image)
+        health_position = hud.health_positions
 
-        if current > 10:
+        if enough_health:
             if health_position and len(health_position) == 1:
                 box = second_roi if health_position[0] == 2 else third_roi
             else:
                 box = random.choice([first_roi, second_roi, third_roi])
         else:
-            if health_position == [2]:
+            if health_position == (2,):
                 box = third_roi
-            elif health_position == [3]:
+            elif health_position == (3,):
                 box = second_roi
             else:
                 box = first_roi
-        context.tasker.controller.post_click(box[0], box[1]).wait()
+        tap(context, box[0], box[1]).wait()
         return True
 
-    @staticmethod
-    def _get_health(context: Context, image) -> Optional[dict]:
-        """获取当前体力数值"""
-        reco_detail = context.run_recognition("ProduceRecognitionHealth", image)
-        if not (reco_detail and reco_detail.hit):
-            return None
-
-        try:
-            health_parts = reco_detail.best_result.text.split("/")
-            current_health = int("".join(filter(str.isdigit, health_parts[0])))
-            max_health = int("".join(filter(str.isdigit, health_parts[1])))
-            ratio = current_health / max_health
-            logger.info(f"体力: {current_health}/{max_health} ({ratio:.2%})")
-            return {"current": current_health, "max": max_health, "ratio": ratio}
-        except (ValueError, IndexError, ZeroDivisionError):
-            logger.warning("体力数据解析失败")
-            return None
-
-    @staticmethod
-    def _get_health_position(context: Context, image) -> Optional[list]:
-        """
-        获取扣除体力的图标位置
-
-        Returns:
-            None: 未检测到扣体力图标
-            [2]: 第二个位置扣体力
-            [3]: 第三个位置扣体力
-            [2,3]: 第二和第三个位置都扣体力
-        """
-        reco_detail = context.run_recognition(
-            "ProduceRecognitionHealthFlag",
-            image,
-            pipeline_override={"ProduceRecognitionHealthFlag": {"roi": [370, 830, 320, 290]}},
-        )
-        if reco_detail.hit:
-            position = []
-            for result in reco_detail.filtered_results:
-                health_box_y = result.box[1]
-                if health_box_y > 970:
-                    position.append(3)
-                else:
-                    position.append(2)
-            return position
-        return None
-
 
 @AgentServer.custom_action("ProduceChooseOptionsAuto")
 class ProduceChooseOptionsAuto(CustomAction):
@@ -921,9 +988,11 @@ class ProduceChooseOptionsAuto(CustomAction):
         )
         self.first = preference["first"]
         self.second = preference["second"]
-        image = context.tasker.controller.post_screencap().wait().get()
-        score = self._get_current_score(context, image) or {"Vo": 0, "Da": 0, "Vi": 0, "max": 1}
-        options = self._get_available_options(context, image)
+        image = screencap(context, newer_than=time.perf_counter())
+        snapshot = ProduceHudSnapshot(context, image, owner=self)
+        dialog = snapshot.options_dialog()
+        score = dialog.score or Score(0, 0, 0, 1)
+        options = list(dialog.options)
 
         # 计算选择
         first_score = score.get(self.first, 0)
@@ -977,73 +1046,22 @@ class ProduceChooseOptionsAuto(CustomAction):
             # box 格式为 [x, y, w, h]，计算中心点
             center_x = target_box[0] + target_box[2] // 2
             center_y = target_box[1] + target_box[3] // 2
-            self._double_click(context, center_x, center_y)
+            # 返回前等待第二次点击完成，避免后续节点截到双击之间的画面
+            double_tap(context, center_x, center_y, interval=self.CLICK_DELAY).wait()
             logger.info(f"已选择选项: {choice}, 坐标: ({center_x}, {center_y})")
         else:
             logger.warning("没有可用选项，无法选择")
             return True  # 没有选项可选时默认返回True，避免卡死在这里
         return True
 
-    @staticmethod
-    def _get_current_score(context: Context, image) -> Optional[dict]:
-        """获取当前得分"""
-        score = {
-            "Vo": 0,
-            "Da": 0,
-            "Vi": 0,
-            "max": 0,
-        }
-        roi0_list = [[70 + i * 230, 430, 136, 80] for i in range(3)]
-        roi1_list = [[150 + i * 150, 325, 136, 80] for i in range(3)]
-        first_reco = context.run_recognition(
-            "ProduceRecognitionScore",
-            image,
-            pipeline_override={"ProduceRecognitionScore": {"roi": roi0_list[0]}},
-        )
-        use_roi_list = roi1_list if not (first_reco and first_reco.hit) else roi0_list
-
-        for i in range(3):
-            reco_detail = context.run_recognition(
-                "ProduceRecognitionScore",
-                image,
-                pipeline_override={"ProduceRecognitionScore": {"roi": use_roi_list[i]}},
-            )
-            if reco_detail and reco_detail.hit and len(reco_detail.filtered_results) == 2:
-                current_score = int("".join(filter(lambda c: c.isdigit(), reco_detail.filtered_results[0].text)))
-                max_score = int("".join(filter(lambda c: c.isdigit(), reco_detail.filtered_results[1].text.replace("/", ""))))
-                logger.debug(f"第{i + 1}列得分: {current_score} / {max_score}")
-                score[["Vo", "Da", "Vi"][i]] = current_score
-                score["max"] = max_score if score["max"] < max_score < 9999 else score["max"]
-        try:
-            logger.info(f"当前得分: Vo={score['Vo']}, Da={score['Da']}, Vi={score['Vi']}, Max={score['max']}")
-            return score
-        except ValueError:
-            logger.warning("积分数据解析失败")
-            return None
 
-    def _get_available_options(self, context: Context, image) -> List[Dict[str, Any]]:
-        """获取可用选项列表"""
-        available_options = []
-        available_options_name = ""
-
-        for option_name, option_img in self.OPTIONS_CONFIG.items():
-            reco_detail = context.run_recognition(
-                "ProduceRecognitionWorkOptions",
-                image,
-                pipeline_override={"ProduceRecognitionWorkOptions": {"template": option_img, "focus": None}},
-            )
-            if reco_detail and reco_detail.hit:
-                available_options.append({option_name: reco_detail.best_result.box})
-                available_options_name += f"{option_name}, "
-
-        logger.info(f"可用选项: {available_options_name.rstrip(', ')}")
-        return available_options
+class MirrorScreen(NamedTuple):
+    """试镜选择画面的一次分析结果"""
 
-    def _double_click(self, context: Context, x: int, y: int):
-        """执行双击操作"""
-        context.tasker.controller.post_click(x, y).wait()
-        time.sleep(self.CLICK_DELAY)
-        context.tasker.controller.post_click(x, y).wait()
+    thresholds: List[int]  # 门槛分数（降序）
+    boxes: Dict[int, List[int]]  # 门槛分数 -> 分数文字坐标
+    locked: Dict[int, bool]  # 门槛分数 -> 是否锁定
+    focus_index: int  # 需要手动接管的镜号，0 表示不接管
 
 
 @AgentServer.custom_action("ProduceChooseMirrorAuto")
@@ -1059,19 +1077,31 @@ class ProduceChooseMirrorAuto(CustomAction):
     """
 
     CLICK_DELAY = 0.5
+    LOCK_TEMPLATE = "produce/lock.png"
+    LOCK_SCAN_ROI = [570, 650, 150, 400]  # 覆盖 ProduceRecognitionMirror 内所有门槛的锁定图标区域，扫描时收窄到实际门槛
+    MIRROR_FLAG_ROI = [12, 630, 696, 530]
+    MIRROR_FLAG_TEMPLATES = {i: f"produce/NIA/mirror_{i}.png" for i in range(1, 4)}
+    MIRROR_FLAG_THRESHOLD = 0.9
+    LOCK = variant("ProduceRecognitionLock", "TemplateMatch", template=LOCK_TEMPLATE, green_mask=True)
+    # 类作用域中的推导式无法访问类属性，用循环由上面的常量生成
+    MIRROR_FLAGS = []
+    for _i, _template in MIRROR_FLAG_TEMPLATES.items():
+        MIRROR_FLAGS.append(
+            variant(f"ProduceMirrorFlag_{_i}", "TemplateMatch", roi=MIRROR_FLAG_ROI, template=_template, threshold=MIRROR_FLAG_THRESHOLD)
+        )
+    del _i, _template
+    _matchers: dict = {}
 
     def run(
         self,
         context: Context,
         argv: CustomAction.RunArg,
     ) -> bool:
-        image = context.tasker.controller.post_screencap().wait().get()
+        image = screencap(context, newer_than=time.perf_counter())
         vote = self._get_current_vote(context, image) or 1
-        mirror = self._get_current_mirror(context, image)
         lowering_difficulty = self._get_lowering_difficulty(context, argv)
-
-        # 门槛分数降序排列
-        thresholds = sorted((int(k) for k in mirror.keys()), reverse=True)
+        screen = self._analyze_screen(context, image)
+        thresholds = screen.thresholds
 
         # 找到满足当前投票的最高门槛索引
         start_idx = 0
@@ -1086,22 +1116,20 @@ class ProduceChooseMirrorAuto(CustomAction):
         start = min(start_idx + lowering_difficulty, len(thresholds) - 1)
         for i in range(start, len(thresholds)):
             target_threshold = thresholds[i]
-            target_box = mirror[str(target_threshold)]
+            target_box = screen.boxes[target_threshold]
             x = target_box[0] + target_box[2] // 2
             y = target_box[1] + target_box[3] // 2
 
-            if target_threshold == 0:
-                break
-            if not self._check_lock(context, image, target_box):
+            if not screen.locked[target_threshold]:
                 break
 
             logger.info(f"分数 {target_threshold:,} 已锁定，继续降档")
 
         # 在点击前判断当前是第几镜，若启用 focus 则点击后进入手动接管
-        mirror_idx = self._get_focus_mirror_index(context, image)
+        mirror_idx = screen.focus_index
 
         logger.info(f"当前投票: {vote:,}, 目标分数: {target_threshold:,}, 点击坐标: ({x}, {y - 20})")
-        self._double_click(context, x, y - 20)
+        double_tap(context, x, y - 20, interval=self.CLICK_DELAY).wait()
 
         if not mirror_idx:
             return True
@@ -1124,8 +1152,54 @@ class ProduceChooseMirrorAuto(CustomAction):
 
         return True
 
-    @staticmethod
-    def _get_focus_mirror_index(context: Context, image) -> int:
+    @classmethod
+    def _get_matcher(cls, name: str) -> Optional[TemplateMatcher]:
+        """获取锁定图标（lock）或镜号标记（flag）的模板匹配器，每种只加载一次；加载失败时返回 None"""
+        if name not in cls._matchers:
+            try:
+                if name == "lock":
+                    cls._matchers[name] = TemplateMatcher({"lock": cls.LOCK_TEMPLATE}, cls.LOCK_SCAN_ROI, green_mask=True)
+                else:
+                    templates = {str(i): template for i, template in cls.MIRROR_FLAG_TEMPLATES.items()}
+                    cls._matchers[name] = TemplateMatcher(templates, cls.MIRROR_FLAG_ROI, threshold=cls.MIRROR_FLAG_THRESHOLD)
+            except (OSError, ValueError) as e:
+                logger.warning(f"试镜模板加载失败，改用逐个识别: {e}")
+                cls._matchers[name] = None
+        return cls._matchers[name]
+
+    @classmethod
+    def _analyze_screen(cls, context: Context, image) -> MirrorScreen:
+        """
+        一次分析试镜选择画面
+
+        锁定图标区域只扫描一次，各门槛的锁定状态从同一张得分图中按各自的区域读取，不再逐个门槛执行识别
+        """
+        start_time = time.perf_counter()
+        mirror = cls._get_current_mirror(context, image)
+        thresholds = sorted((int(k) for k in mirror.keys()), reverse=True)
+        boxes = {int(k): box for k, box in mirror.items()}
+
+        lock_rois = {t: cls._lock_roi(boxes[t]) for t in thresholds if t != 0}
+        locked = {t: False for t in thresholds}
+        matcher = cls._get_matcher("lock")
+        if matcher is not None and lock_rois:
+            # 只扫描各门槛锁定图标区域的并集，所有门槛共用一次扫描
+            x0 = min(roi[0] for roi in lock_rois.values())
+            y0 = min(roi[1] for roi in lock_rois.values())
+            x1 = max(roi[0] + roi[2] for roi in lock_rois.values())
+            y1 = max(roi[1] + roi[3] for roi in lock_rois.values())
+            scan = matcher.scan(image, [x0, y0, x1 - x0, y1 - y0])
+            locked.update({t: scan.best("lock", roi=roi) is not None for t, roi in lock_rois.items()})
+        elif lock_rois:
+            locked.update({t: cls._check_lock(context, image, boxes[t]) for t in lock_rois})
+
+        screen = MirrorScreen(thresholds, boxes, locked, cls._get_focus_mirror_index(context, image))
+        logger.debug(f"锁定门槛: {[t for t in thresholds if locked[t]]}")
+        logger.debug(f"试镜画面分析耗时: {(time.perf_counter() - start_time) * 1000:.1f}ms")
+        return screen
+
+    @classmethod
+    def _get_focus_mirror_index(cls, context: Context, image) -> int:
         """获取当前试镜对应的 focus 镜号。"""
         node_data = context.get_node_data("ProduceMirrorFlag")
         if not node_data:
@@ -1137,44 +1211,30 @@ class ProduceChooseMirrorAuto(CustomAction):
         if not has_focus:
             return 0
 
-        for i in range(1, 4):
-            reco_detail = context.run_recognition(
-                f"ProduceMirrorFlag_{i}",
-                image,
-                pipeline_override={
-                    f"ProduceMirrorFlag_{i}": {
-                        "recognition": "TemplateMatch",
-                        "roi": [12, 630, 696, 530],
-                        "template": f"produce/NIA/mirror_{i}.png",
-                        "threshold": 0.9,
-                    }
-                },
-            )
+        matcher = cls._get_matcher("flag")
+        if matcher is not None:
+            scan = matcher.scan(image)
+            hits = [hit for hit in (scan.best(str(i)) for i in cls.MIRROR_FLAG_TEMPLATES) if hit is not None]
+            if not hits:
+                return 0
+            i = int(max(hits, key=lambda hit: hit.score).name)
+            return i if attach.get(f"focus_{i}", False) else 0
+
+        for i, node in enumerate(cls.MIRROR_FLAGS, start=1):
+            reco_detail = run_recognition(context, node, image)
             if reco_detail and reco_detail.hit:
                 return i if attach.get(f"focus_{i}", False) else 0
         return 0
 
     @staticmethod
-    def _check_lock(context: Context, image, target_box) -> bool:
-        """检查目标分数附近是否有锁定图标"""
-        roi = [
-            target_box[0] + 330,
-            target_box[1] - 80,
-            100,
-            100,
-        ]
-        reco_detail = context.run_recognition(
-            "ProduceRecognitionLock",
-            image,
-            pipeline_override={
-                "ProduceRecognitionLock": {
-                    "recognition": "TemplateMatch",
-                    "roi": roi,
-                    "template": "produce/lock.png",
-                    "green_mask": True,
-                }
-            },
-        )
+    def _lock_roi(target_box) -> List[int]:
+        """目标分数右上方的锁定图标区域"""
+        return [target_box[0] + 330, target_box[1] - 80, 100, 100]
+
+    @classmethod
+    def _check_lock(cls, context: Context, image, target_box) -> bool:
+        """检查目标分数附近是否有锁定图标（模板加载失败时使用）"""
+        reco_detail = run_recognition(context, cls.LOCK, image, roi=cls._lock_roi(target_box))
         return reco_detail is not None and reco_detail.hit
 
     @staticmethod
@@ -1192,7 +1252,7 @@ class ProduceChooseMirrorAuto(CustomAction):
     def _get_current_mirror(context: Context, image):
         """获取当前试镜"""
         mirror = {"0": [360, 1050, 1, 1]}
-        reco_detail = context.run_recognition("ProduceRecognitionMirror", image)
+        reco_detail = memo.run_recognition(context, "ProduceRecognitionMirror", image)
         if reco_detail and reco_detail.hit:
             for result in reco_detail.filtered_results:
                 box = result.box
@@ -1205,7 +1265,7 @@ class ProduceChooseMirrorAuto(CustomAction):
     @staticmethod
     def _get_current_vote(context: Context, image) -> Optional[int]:
         """获取当前投票"""
-        reco_detail = context.run_recognition("ProduceRecognitionVote", image)
+        reco_detail = memo.run_recognition(context, "ProduceRecognitionVote", image)
         if reco_detail and reco_detail.hit:
             try:
                 vote = int(reco_detail.best_result.text.replace(",", ""))
@@ -1214,12 +1274,6 @@ class ProduceChooseMirrorAuto(CustomAction):
                 logger.warning("投票数据解析失败")
                 return None
 
-    def _double_click(self, context: Context, x: int, y: int):
-        """执行双击操作"""
-        context.tasker.controller.post_click(x, y).wait()
-        time.sleep(self.CLICK_DELAY)
-        context.tasker.controller.post_click(x, y).wait()
-
 
 @AgentServer.custom_action("ProduceKeepDrinkAuto")
 class ProduceKeepDrinkAuto(CustomAction):
@@ -1235,12 +1289,28 @@ class ProduceKeepDrinkAuto(CustomAction):
         context: Context,
         argv: CustomAction.RunArg,
     ) -> bool:
-        image = context.tasker.controller.post_screencap().wait().get()
-        reco_detail = context.run_recognition("ProduceRecognitionUncheckedMark", image)
+        image = screencap(context, newer_than=time.perf_counter())
+        reco_detail = memo.run_recognition(context, "ProduceRecognitionUncheckedMark", image)
         if reco_detail.hit:
-            for result in reco_detail.filtered_results:
-                box = result.box
-                context.tasker.controller.post_click(box[0] + int(box[2] / 2), box[1] + int(box[3] / 2)).wait()
-                time.sleep(0.1)
+            boxes = [result.box for result in reco_detail.filtered_results]
+            multi_tap(context, [(box[0] + box[2] // 2, box[1] + box[3] // 2) for box in boxes], interval=0.1, settle=0.1).wait()
             context.run_task("ProduceDrinkNoButton")
         return True
+
+
+@AgentServer.custom_action("ProduceEndStats")
+class ProduceEndStats(CustomAction):
+    """
+    培育演出结束后输出本次培育的输入调度与看门狗统计，并保存看门狗指标
+    """
+
+    def run(
+        self,
+        context: Context,
+        argv: CustomAction.RunArg,
+    ) -> bool:
+        input_queue.log_stats("本次培育输入调度")
+        input_queue.reset_stats()
+        watchdog.log_stats("本次培育看门狗")
+        watchdog.write_metrics()
+        return True
@@ -0,0 +1,451 @@
+import re
+from typing import Any, Dict, List, Optional, NamedTuple
+from dataclasses import dataclass
+
+from utils import logger, variants
+from utils.bar import fill_ratio
+from maa.context import Context
+from utils.cancel import check
+from utils.digits import read_digits
+from utils.template import TemplateMatcher
+from utils.ocr_cache import ocr_cache
+from utils.recognition import RecognitionSpec, run_recognitions
+
+
+class Health(NamedTuple):
+    current: Optional[int]  # 只读到体力槽且从未读到过上限时为 None
+    max: Optional[int]
+    ratio: float
+    source: str = "ocr"  # ocr / bar（体力槽）
+
+
+class Score(NamedTuple):
+    Vo: int
+    Da: int
+    Vi: int
+    max: int
+
+    def get(self, attr: str, default: int = 0) -> int:
+        return getattr(self, attr, default)
+
+
+class OptionsDialog(NamedTuple):
+    """选项窗口一帧的识别结果"""
+
+    options: tuple  # 可用选项，格式为 ({name: box}, ...)
+    layout: str  # 得分栏布局：options / options_compact
+    score: Score
+
+
+@dataclass(frozen=True)
+class ProduceHud:
+    """培育界面一帧的识别结果（不可变），未读取的字段为默认值"""
+
+    suggestion: str = ""
+    health: Optional[Health] = None
+    points: Optional[int] = None
+    score: Optional[Score] = None
+    events: tuple = ()
+    options: tuple = ()
+    health_positions: Optional[tuple] = None
+
+
+class ProduceHudSnapshot:
+    """
+    培育界面 HUD 快照
+
+    绑定一张截图，按需读取体力、积分、得分、老师建议、事件、选项等字段。
+    同一帧内每次识别只执行一次：体力与积分共用一次 OCR，
+    各字段的识别结果按 (节点, ROI) 缓存，重复读取不会再次识别。
+    """
+
+    # 体力与积分所在区域的并集，一次 OCR 同时读取两者
+    HUD_ROI = [276, 56, 174, 98]
+    # HEALTH_ROI 与 ProduceRecognitionHealth 一致；POINT_ROI 沿用原先对 ProduceRecognitionPoint 的 roi 覆盖（y=90），
+    # 两者在 y=90~106 处重叠
+    HEALTH_ROI = [276, 56, 170, 50]
+    POINT_ROI = [320, 90, 130, 54]
+    SUGGESTION_ROI = [270, 160, 350, 80]
+    REST_COUNT_ROI = [580, 755, 135, 75]
+    HEALTH_FLAG_ROI = [370, 830, 320, 290]
+    SUGGESTION_NODE = variants.variant("ProduceChooseEventSuggestion", "OCR", roi=SUGGESTION_ROI)
+    # 兼容全角/半角 0
+    REST_COUNT_NODE = variants.variant("ProduceRecognitionRestCount", "OCR", expected=["あと[0０]回", "剩余[0０]次"], roi=REST_COUNT_ROI)
+    # 体力数值上方的体力槽（槽内中间几行）与颜色范围（BGR），按 docs/img/button_example.png 标定，
+    # 仅有一张截图核对过（体力偏低时的颜色未知），只在 OCR 失败时使用；可用 tools/benchmark/health_bar.py 在更多截图上核对
+    HEALTH_BAR_ROI = [316, 41, 86, 6]
+    HEALTH_BAR_FILL = ([0, 220, 20], [90, 255, 110])
+    HEALTH_BAR_TRACK = ([70, 70, 70], [110, 110, 110])
+
+    SCORE_ROI_LIST = {
+        "event": [[150 + i * 150, 668, 136, 80] for i in range(3)],
+        "options": [[70 + i * 230, 430, 136, 80] for i in range(3)],
+        "options_compact": [[150 + i * 150, 325, 136, 80] for i in range(3)],
+    }
+    ATTRS = ["Vo", "Da", "Vi"]
+    # 与 ProduceRecognitionWorkOptions 一致
+    OPTIONS_ROI = [0, 640, 720, 320]
+    OPTIONS_THRESHOLD = 0.9
+
+    # 数字字形模板的字体名（image/digits/<字体>），没有模板或缺少部分数字的模板时直接使用 OCR
+    HUD_FONT = "produce_hud"
+    SCORE_FONT = "produce_score"
+
+    HEALTH_PATTERN = re.compile(r"(\d{1,2})\s*/\s*(\d{2})")
+    POINT_PATTERN = re.compile(r"^\d{1,3}(,\d{3})*$")
+
+    def __init__(self, context: Context, image, owner: Any = None):
+        """
+        Args:
+            context: maa的Context类
+            image: 截图
+            owner: 调用方 action 实例，读取事件列表 / 选项时使用其 EVENT_CONFIG / OPTIONS_CONFIG
+        """
+        self.context = context
+        self.image = image
+        self._owner = owner
+        self._details: Dict[tuple, Any] = {}
+        self._fields: Dict[str, Any] = {}
+        self.recognition_count = 0
+        self.cache_hits = 0
+
+    # 最近一次 OCR 读到的体力上限，只读到体力槽时用于折算当前体力
+    _health_max: Optional[int] = None
+    # 选项按钮的排布 -> 得分栏布局，同一排布的选项窗口只需探测一次
+    _options_layouts: Dict[tuple, str] = {}
+    # action 类 -> 选项模板匹配器（加载失败时为 None）
+    _options_matchers: Dict[type, Optional[TemplateMatcher]] = {}
+
+    @classmethod
+    def clear_shared_state(cls):
+        """清除跨帧共享的状态（体力上限、选项窗口布局），回放时保证每次运行互不影响"""
+        cls._health_max = None
+        cls._options_layouts.clear()
+
+    def capture(self, *fields: str) -> ProduceHud:
+        """读取指定字段并返回不可变记录"""
+        return ProduceHud(**{field: getattr(self, field)() for field in fields})
+
+    @property
+    def fields(self) -> List[str]:
+        """已读取的字段（按读取顺序）"""
+        return list(self._fields)
+
+    def _field(self, name: str, reader):
+        """字段缓存：每个字段在同一帧内只计算一次"""
+        if name not in self._fields:
+            self._fields[name] = reader()
+        return self._fields[name]
+
+    def _recognize(self, node: str, override: Optional[dict] = None, key: Any = None):
+        """执行识别并按 (节点, key) 缓存结果"""
+        cache_key = (node, key)
+        if cache_key not in self._details:
+            check(self.context)
+            self.recognition_count += 1
+            self._details[cache_key] = self.context.run_recognition(
+                node, self.image, pipeline_override=variants.override(self.context, node, **(override or {}))
+            )
+        return self._details[cache_key]
+
+    def _ocr(self, node: str, roi: List[int], override: Optional[dict] = None, stable: bool = False):
+        """
+        Args:
+            stable: 区域文字多帧不变（老师建议、得分、休息次数等），内容未变化时复用跨帧的 OCR 缓存
+        """
+        if not stable:
+            return self._recognize(node, dict(override or {}, roi=roi), key=tuple(roi))
+        return self._ocr_many(node, [roi], override, stable=True)[0]
+
+    def _ocr_many(self, node: str, roi_list: List[List[int]], override: Optional[dict] = None, stable: bool = False) -> list:
+        """对多个 ROI 执行同一节点的识别，未缓存的 ROI 依次识别"""
+        cache_keys = {}
+        specs = []
+        # 与 _recognize 一致经过 variants.override：变体节点未随资源加载时补全完整定义（expected 等）
+        node_override = variants.override(self.context, node, **(override or {})).get(node)
+        for i, roi in enumerate(roi_list):
+            if (node, tuple(roi)) in self._details:
+                continue
+            if stable:
+                reco_detail, cache_keys[tuple(roi)] = ocr_cache.get(node, self.image, roi, override)
+                if reco_detail is not None:
+                    self.cache_hits += 1
+                    self._details[(node, tuple(roi))] = reco_detail
+                    continue
+            specs.append(RecognitionSpec(str(i), node, roi, node_override))
+        if specs:
+            self.recognition_count += len(specs)
+            for spec, reco_detail in zip(specs, run_recognitions(self.context, self.image, specs).values()):
+                self._details[(node, tuple(spec.roi))] = reco_detail
+                if stable:
+                    ocr_cache.put(cache_keys[tuple(spec.roi)], reco_detail)
+        return [self._details[(node, tuple(roi))] for roi in roi_list]
+
+    def _hud_texts(self, field: str) -> str:
+        """从体力/积分共用 OCR 中取出属于 field（health / points）的文字（按 x 排序拼接）"""
+        reco_detail = self._ocr("ProduceRecognitionHud", self.HUD_ROI)
+        if not (reco_detail and reco_detail.hit):
+            return ""
+        texts = []
+        for result in reco_detail.filtered_results:
+            box = result.box
+            if self._hud_field(box[0] + box[2] // 2, box[1] + box[3] // 2) == field:
+                texts.append((box[0], result.text))
+        return "".join(text for _, text in sorted(texts))
+
+    def _hud_field(self, cx: int, cy: int) -> Optional[str]:
+        """
+        文字框中心点所属的字段：每个文字框只归属一个字段
+
+        中心点同时落在两个区域（重叠部分）时，归属离区域边缘更远（更靠内）的字段
+        """
+        owner, owner_depth = None, -1
+        for field, roi in (("health", self.HEALTH_ROI), ("points", self.POINT_ROI)):
+            depth = min(cx - roi[0], roi[0] + roi[2] - 1 - cx, cy - roi[1], roi[1] + roi[3] - 1 - cy)
+            if depth > owner_depth:
+                owner, owner_depth = field, depth
+        return owner
+
+    def suggestion(self) -> str:
+        """获取老师建议"""
+        return self._field("suggestion", self._read_suggestion)
+
+    def _read_suggestion(self) -> str:
+        if not self.context.get_node_data("ProduceSuggestion").get("enabled", True):
+            return ""
+        reco_detail = self._ocr(self.SUGGESTION_NODE, self.SUGGESTION_ROI, stable=True)
+        if not (reco_detail and reco_detail.hit):
+            return ""
+
+        suggestion_text = "".join(item.text for item in reco_detail.filtered_results)
+        logger.info(f"老师建议: {suggestion_text}")
+        return suggestion_text
+
+    def health(self) -> Optional[Health]:
+        """
+        获取体力
+
+        优先使用 OCR 读出的 cur/max；OCR 失败时退回体力槽填充比例，当前体力按最近一次读到的上限折算。
+        两者都失败时返回 None。
+        """
+        return self._field("health", self._read_health)
+
+    def health_bar(self) -> Optional[float]:
+        """体力槽填充比例（0-1），画面中没有体力槽时为 None"""
+        return self._field("health_bar", lambda: fill_ratio(self.image, self.HEALTH_BAR_ROI, *self.HEALTH_BAR_FILL, *self.HEALTH_BAR_TRACK))
+
+    def _read_health(self) -> Optional[Health]:
+        health = self._read_health_text()
+        if health is not None:
+            ProduceHudSnapshot._health_max = health.max
+        else:
+            ratio = self.health_bar()
+            if ratio is None:
+                return None
+            health_max = ProduceHudSnapshot._health_max
+            health = Health(round(ratio * health_max) if health_max else None, health_max, ratio, "bar")
+        logger.info(f"体力: {health.current}/{health.max} ({health.ratio:.2%}, {health.source})")
+        return health
+
+    def _read_health_text(self) -> Optional[Health]:
+        match = self.HEALTH_PATTERN.search(read_digits(self.image, self.HEALTH_ROI, self.HUD_FONT) or "")
+        if not match:
+            match = self.HEALTH_PATTERN.search(self._hud_texts("health"))
+        if not match:
+            # 共用 OCR 未能读出时，退回体力专用节点
+            reco_detail = self._recognize("ProduceRecognitionHealth")
+            if not (reco_detail and reco_detail.hit):
+                return None
+            match = self.HEALTH_PATTERN.search(reco_detail.best_result.text.replace(" ", ""))
+            if not match:
+                logger.warning("体力数据解析失败")
+                return None
+
+        current_health, max_health = int(match.group(1)), int(match.group(2))
+        if max_health == 0:
+            logger.warning("体力数据解析失败")
+            return None
+        return Health(current_health, max_health, current_health / max_health)
+
+    def points(self) -> Optional[int]:
+        """获取当前积分"""
+        return self._field("points", self._read_points)
+
+    def _read_points(self) -> Optional[int]:
+        text = read_digits(self.image, self.POINT_ROI, self.HUD_FONT) or ""
+        if not text.replace(",", "").isdigit():
+            text = self._hud_texts("points")
+        if not (self.POINT_PATTERN.match(text) or text.isdigit()):
+            reco_detail = self._ocr("ProduceRecognitionPoint", self.POINT_ROI)
+            if not (reco_detail and reco_detail.hit):
+                return None
+            text = reco_detail.best_result.text
+        try:
+            points = int(text.replace(",", ""))
+            logger.info(f"积分: {points}")
+            return points
+        except ValueError:
+            logger.warning("积分数据解析失败")
+            return None
+
+    def score(self, layout: str = "event") -> Optional[Score]:
+        """
+        获取当前得分
+
+        Args:
+            layout: 得分栏布局，event 为事件选择界面，options / options_compact 为选项窗口的两种布局
+        """
+        return self._field(f"score_{layout}", lambda: self._read_score(self.SCORE_ROI_LIST[layout]))
+
+    def _read_score(self, roi_list: List[List[int]]) -> Optional[Score]:
+        values = {"Vo": 0, "Da": 0, "Vi": 0, "max": 0}
+        columns = [self._read_score_digits(roi) for roi in roi_list]
+        # 字形模板读不出的列再用 OCR
+        missing = [roi for roi, column in zip(roi_list, columns) if column is None]
+        ocr_details = dict(zip(map(tuple, missing), self._ocr_many("ProduceRecognitionScore", missing, stable=True))) if missing else {}
+        for i, roi in enumerate(roi_list):
+            column = columns[i] or self._parse_score_column(ocr_details.get(tuple(roi)))
+            if column:
+                current_score, max_score = column
+                logger.debug(f"第{i + 1}列得分: {current_score} / {max_score}")
+                values[self.ATTRS[i]] = current_score
+                values["max"] = max_score if values["max"] < max_score < 9999 else values["max"]
+        score = Score(**values)
+        logger.info(f"当前得分: Vo={score.Vo}, Da={score.Da}, Vi={score.Vi}, Max={score.max}")
+        return score
+
+    def _read_score_digits(self, roi: List[int]) -> Optional[tuple]:
+        """用字形模板读取单列得分（两行：当前得分、/上限），返回 (当前得分, 上限)"""
+        lines = (read_digits(self.image, roi, self.SCORE_FONT) or "").split("\n")
+        if len(lines) != 2:
+            return None
+        current_score, max_score = ("".join(filter(str.isdigit, line)) for line in lines)
+        if not (current_score and max_score and lines[1].startswith("/")):
+            return None
+        return int(current_score), int(max_score)
+
+    @staticmethod
+    def _parse_score_column(reco_detail) -> Optional[tuple]:
+        """解析单列得分识别结果，返回 (当前得分, 上限)"""
+        if not (reco_detail and reco_detail.hit and len(reco_detail.filtered_results) == 2):
+            return None
+        try:
+            current_score = int("".join(filter(str.isdigit, reco_detail.filtered_results[0].text)))
+            max_score = int("".join(filter(str.isdigit, reco_detail.filtered_results[1].text.replace("/", ""))))
+        except ValueError:
+            logger.warning("得分数据解析失败")
+            return None
+        return current_score, max_score
+
+    def options_score(self) -> Optional[Score]:
+        """选项窗口得分"""
+        return self.options_dialog().score
+
+    def options_dialog(self) -> OptionsDialog:
+        """
+        识别选项窗口：可用选项、得分栏布局与得分
+
+        得分栏布局由选项按钮的排布决定：排布首次出现时探测第一列确定布局并记住，
+        之后直接按选项识别结果选择布局，不再探测；按记住的布局读不到得分时重新探测。
+        """
+        return self._field("options_dialog", self._read_options_dialog)
+
+    def _read_options_dialog(self) -> OptionsDialog:
+        options = self.options()
+        key = self._options_layout_key(options)
+        layout = ProduceHudSnapshot._options_layouts.get(key)
+        if layout is not None:
+            score = self.score(layout)
+            if score.max:
+                return OptionsDialog(options, layout, score)
+            logger.debug(f"按选项布局 {layout} 未读到得分，重新探测")
+
+        layout = self._probe_options_layout()
+        score = self.score(layout)
+        if score.max and key is not None:
+            ProduceHudSnapshot._options_layouts[key] = layout
+        return OptionsDialog(options, layout, score)
+
+    @staticmethod
+    def _options_layout_key(options: tuple) -> Optional[tuple]:
+        """选项按钮的排布：选项数与最上方选项的纵坐标（按 16 像素取整，容忍识别框的轻微偏移）"""
+        if not options:
+            return None
+        top = min(box[1] for option in options for box in option.values())
+        return len(options), top // 16
+
+    def _probe_options_layout(self) -> str:
+        """探测第一列确定得分栏布局，探测结果直接作为该布局的第一列复用"""
+        if self._read_score_digits(self.SCORE_ROI_LIST["options"][0]):
+            return "options"
+        probe = self._ocr("ProduceRecognitionScore", self.SCORE_ROI_LIST["options"][0], stable=True)
+        return "options" if probe and probe.hit else "options_compact"
+
+    def events(self) -> tuple:
+        """获取可用事件列表"""
+        return self._field("events", lambda: tuple(self._owner._get_available_events(self.context, self.image)))
+
+    def rest_available(self) -> bool:
+        """检测休息是否可用：休息按钮剩余次数区域出现「あと0回」时不可休息。"""
+        return self._field("rest_available", self._read_rest_available)
+
+    def _read_rest_available(self) -> bool:
+        reco_detail = self._ocr(self.REST_COUNT_NODE, self.REST_COUNT_ROI, stable=True)
+        if reco_detail and reco_detail.hit:
+            logger.info("休息次数已用完")
+            return False
+        return True
+
+    def health_positions(self) -> Optional[tuple]:
+        """
+        获取工作选择窗口中扣除体力的图标位置
+
+        Returns:
+            None: 未检测到扣体力图标
+            (2,): 第二个位置扣体力
+            (3,): 第三个位置扣体力
+            (2, 3): 第二和第三个位置都扣体力
+        """
+        return self._field("health_positions", self._read_health_positions)
+
+    def _read_health_positions(self) -> Optional[tuple]:
+        reco_detail = self._recognize("ProduceRecognitionHealthFlag", {"roi": self.HEALTH_FLAG_ROI}, key=tuple(self.HEALTH_FLAG_ROI))
+        if not (reco_detail and reco_detail.hit):
+            return None
+        return tuple(3 if result.box[1] > 970 else 2 for result in reco_detail.filtered_results)
+
+    def options(self) -> tuple:
+        """获取选项窗口中的可用选项，格式为 ({name: box}, ...)"""
+        return self._field("options", self._read_options)
+
+    def _options_matcher(self) -> Optional[TemplateMatcher]:
+        """选项模板匹配器，OPTIONS_CONFIG 每个 action 类只加载一次；加载失败时返回 None"""
+        owner = type(self._owner)
+        if owner not in self._options_matchers:
+            try:
+                self._options_matchers[owner] = TemplateMatcher(
+                    self._owner.OPTIONS_CONFIG, self.OPTIONS_ROI, self.OPTIONS_THRESHOLD, green_mask=True
+                )
+            except (OSError, ValueError) as e:
+                logger.warning(f"选项模板加载失败，改用逐个识别: {e}")
+                self._options_matchers[owner] = None
+        return self._options_matchers[owner]
+
+    def _read_options(self) -> tuple:
+        available_options = []
+        matcher = self._options_matcher()
+        if matcher is not None:
+            # 所有选项模板共用一次扫描
+            scan = matcher.scan(self.image)
+            for option_name in self._owner.OPTIONS_CONFIG:
+                hit = scan.best(option_name)
+                if hit is not None:
+                    available_options.append({option_name: hit.box})
+        else:
+            for option_name, option_img in self._owner.OPTIONS_CONFIG.items():
+                reco_detail = self._recognize("ProduceRecognitionWorkOptions", {"template": option_img, "focus": None}, key=option_img)
+                if reco_detail and reco_detail.hit:
+                    available_options.append({option_name: reco_detail.best_result.box})
+
+        logger.info(f"可用选项: {', '.join(name for option in available_options for name in option)}")
+        return tuple(available_options)
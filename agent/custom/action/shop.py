@@ -1,8 +1,14 @@
 import time
 
 from utils import logger
+from utils.memo import memo
 from maa.context import Context
+from utils.cancel import sleep
+from utils.frames import screencap
+from utils.variants import variant, run_recognition
 from maa.custom_action import CustomAction
+from utils.input_queue import tap
+from utils.recognition import RecognitionSpec, run_recognitions
 from maa.agent.agent_server import AgentServer
 
 
@@ -14,6 +20,10 @@ class ShoppingCoinGachaAuto(CustomAction):
     通过 OCR 识别当前持有数量，数量 >= 10 时自动切换页面并执行购买。
     """
 
+    CHECK_ACTIVITY = variant(
+        "ShoppingCoinGachaCheckActivity", "TemplateMatch", template="shopping_gacha_anomaly_coin.png", roi=[296, 135, 62, 66]
+    )
+
     def run(
         self,
         context: Context,
@@ -30,18 +40,8 @@ class ShoppingCoinGachaAuto(CustomAction):
         Returns:
             True 表示动作执行完毕（无论是否实际购买）。
         """
-        image = context.tasker.controller.post_screencap().wait().get()
-        reco_detail = context.run_recognition(
-            "ShoppingCoinGachaCheckActivity",
-            image,
-            pipeline_override={
-                "ShoppingCoinGachaCheckActivity": {
-                    "recognition": "TemplateMatch",
-                    "template": "shopping_gacha_anomaly_coin.png",
-                    "roi": [296, 135, 62, 66],
-                }
-            },
-        )
+        image = screencap(context, newer_than=time.perf_counter())
+        reco_detail = run_recognition(context, self.CHECK_ACTIVITY, image)
         if reco_detail and reco_detail.hit:
             logger.info("检测到活动扭蛋")
             has_activity = True
@@ -103,26 +103,21 @@ class ShoppingCoinGachaAuto(CustomAction):
             }
 
         page = 1
-        image = context.tasker.controller.post_screencap().wait().get()
+        image = screencap(context, newer_than=time.perf_counter())
+        # 各扭蛋数量互不依赖，在同一张截图上依次识别
+        count_override = {"recognition": "OCR", "expected": ".*\\d.*", "order_by": "Horizontal", "only_rec": True}
+        count_details = run_recognitions(
+            context,
+            image,
+            [RecognitionSpec(key, "ShoppingCoinGachaCount", param["roi"], count_override) for key, param in params.items() if param["enabled"]],
+        )
         for key in params.keys():
             if context.tasker.stopping:
                 logger.error("任务中断")
                 return True
 
             if params[key]["enabled"]:
-                reco_detail = context.run_recognition(
-                    "ShoppingCoinGachaCount",
-                    image,
-                    pipeline_override={
-                        "ShoppingCoinGachaCount": {
-                            "recognition": "OCR",
-                            "expected": ".*\\d.*",
-                            "roi": params[key]["roi"],
-                            "order_by": "Horizontal",
-                            "only_rec": True,
-                        }
-                    },
-                )
+                reco_detail = count_details.get(key)
                 if reco_detail and reco_detail.hit:
                     raw_text = "".join([item.text for item in reco_detail.filtered_results]).replace(",", "")
                     count_str = "".join(filter(lambda c: c.isdigit(), raw_text))
@@ -156,6 +151,8 @@ class ShoppingDailyExchangeMoneyAuto(CustomAction):
     支持多页浏览，最多翻页 2 次。
     """
 
+    ITEM_NODE = variant("ShoppingDailyExchangeMoneyRecognition", "TemplateMatch", roi=[30, 300, 660, 698], threshold=0.93)
+
     def run(
         self,
         context: Context,
@@ -214,8 +211,8 @@ class ShoppingDailyExchangeMoneyAuto(CustomAction):
         max_page = 2
         for i in range(max_page):
             logger.debug(f"第{i + 1}页")
-            time.sleep(2)
-            image = context.tasker.controller.post_screencap().wait().get()
+            sleep(context, 2)
+            image = screencap(context, newer_than=time.perf_counter())
             for key, value in wishlist:
                 if key == "recommend":
                     logger.info("购买推荐物品")
@@ -224,18 +221,7 @@ class ShoppingDailyExchangeMoneyAuto(CustomAction):
                     logger.info(f"购买{key}")
                     file_name = f"items/{key}.png"
 
-                reco_detail = context.run_recognition(
-                    "ShoppingDailyExchangeMoneyRecognition",
-                    image,
-                    pipeline_override={
-                        "ShoppingDailyExchangeMoneyRecognition": {
-                            "recognition": "TemplateMatch",
-                            "template": file_name,
-                            "roi": [30, 300, 660, 698],
-                            "threshold": 0.93,
-                        }
-                    },
-                )
+                reco_detail = run_recognition(context, self.ITEM_NODE, image, template=file_name)
 
                 if context.tasker.stopping:
                     logger.error("任务中断")
@@ -244,18 +230,18 @@ class ShoppingDailyExchangeMoneyAuto(CustomAction):
                 if reco_detail and reco_detail.hit:
                     for result in reco_detail.filtered_results:
                         box = result.box
-                        context.tasker.controller.post_click(box[0] + 70, box[1] + 70).wait()
-                        time.sleep(0.5)
+                        tap(context, box[0] + 70, box[1] + 70).wait()
+                        sleep(context, 0.5)
 
-                        image_plus = context.tasker.controller.post_screencap().wait().get()
-                        reco_detail = context.run_recognition("ShoppingPlus", image_plus)
+                        image_plus = screencap(context, newer_than=time.perf_counter())
+                        reco_detail = memo.run_recognition(context, "ShoppingPlus", image_plus)
                         if reco_detail and reco_detail.hit:
                             box = reco_detail.best_result.box
-                            context.tasker.controller.post_click(box[0], box[1]).wait()
+                            tap(context, box[0], box[1]).wait()
                         context.run_task("ShoppingDailyExchangeBuy")
-                        time.sleep(0.8)
+                        sleep(context, 0.8)
 
-                    time.sleep(0.5)
+                    sleep(context, 0.5)
                 else:
                     # 未找到该物品
                     pass
@@ -275,6 +261,8 @@ class ShoppingDailyExchangeAPAuto(CustomAction):
     通过模板匹配在商店页面中定位目标商品，检测并点击加号按钮后执行购买。
     """
 
+    ITEM_NODE = variant("ShoppingDailyExchangeAPRecognition", "TemplateMatch", roi=[27, 311, 669, 230], threshold=0.93)
+
     def run(
         self,
         context: Context,
@@ -307,22 +295,11 @@ class ShoppingDailyExchangeAPAuto(CustomAction):
             logger.info("没有选择任何AP物品，跳过购买")
             return True
         logger.debug("购买AP物品")
-        items_image = context.tasker.controller.post_screencap().wait().get()
+        items_image = screencap(context, newer_than=time.perf_counter())
         for key, value in wishlist:
             logger.info(f"购买{key}")
             file_name = f"items/{key}.png"
-            reco_detail = context.run_recognition(
-                "ShoppingDailyExchangeAPRecognition",
-                items_image,
-                pipeline_override={
-                    "ShoppingDailyExchangeAPRecognition": {
-                        "recognition": "TemplateMatch",
-                        "template": file_name,
-                        "roi": [27, 311, 669, 230],
-                        "threshold": 0.93,
-                    }
-                },
-            )
+            reco_detail = run_recognition(context, self.ITEM_NODE, items_image, template=file_name)
 
             if context.tasker.stopping:
                 logger.error("任务中断")
@@ -330,15 +307,15 @@ class ShoppingDailyExchangeAPAuto(CustomAction):
 
             if reco_detail and reco_detail.hit:
                 box = reco_detail.best_result.box
-                context.tasker.controller.post_click(box[0] + 80, box[1] + 80).wait()
-                time.sleep(0.8)
-                image = context.tasker.controller.post_screencap().wait().get()
-                reco_detail = context.run_recognition("ShoppingPlus", image)
+                tap(context, box[0] + 80, box[1] + 80).wait()
+                sleep(context, 0.8)
+                image = screencap(context, newer_than=time.perf_counter())
+                reco_detail = memo.run_recognition(context, "ShoppingPlus", image)
                 if reco_detail and reco_detail.hit:
                     box = reco_detail.best_result.box
-                    context.tasker.controller.post_click(box[0], box[1]).wait()
+                    tap(context, box[0], box[1]).wait()
                 context.run_task("ShoppingDailyExchangeBuy")
-                time.sleep(0.5)
+                sleep(context, 0.5)
                 # 购买成功
             else:
                 # 未找到该物品
@@ -7,6 +7,7 @@ from difflib import SequenceMatcher
 from utils import logger
 from maa.define import RectType
 from maa.context import Context
+from utils.variants import variant, run_recognition
 from maa.agent.agent_server import AgentServer
 from maa.custom_recognition import CustomRecognition
 
@@ -17,6 +18,10 @@ class ProduceChooseIdolAuto(CustomRecognition):
     自动识别当前偶像名称和歌曲
     """
 
+    TRUE_END = variant("ProduceChooseIdolTrueEnd", "OCR", expected=["True", "End"], roi=[430, 34, 266, 48])
+    IDOL_NAME = variant("ProduceChooseIdolName", "OCR")
+    SONG_NAME = variant("ProduceChooseIdolSong", "OCR")
+
     def analyze(
         self,
         context: Context,
@@ -27,17 +32,7 @@ class ProduceChooseIdolAuto(CustomRecognition):
         recognized_name = ""
         recognized_song = ""
 
-        true_end_detail = context.run_recognition(
-            "ProduceChooseIdolTrueEnd",
-            argv.image,
-            pipeline_override={
-                "ProduceChooseIdolTrueEnd": {
-                    "recognition": "OCR",
-                    "expected": ["True", "End"],
-                    "roi": [430, 34, 266, 48],
-                }
-            },
-        )
+        true_end_detail = run_recognition(context, self.TRUE_END, argv.image)
         if true_end_detail and true_end_detail.hit:
             logger.debug("识别到True End")
             idol_name_roi = [440, 128, 280, 64]
@@ -47,20 +42,12 @@ class ProduceChooseIdolAuto(CustomRecognition):
             idol_name_roi = [400, 98, 320, 64]
             song_name_roi = [340, 60, 380, 45]
 
-        name_detail = context.run_recognition(
-            "ProduceChooseIdolName",
-            argv.image,
-            pipeline_override={"ProduceChooseIdolName": {"recognition": "OCR", "roi": idol_name_roi}},
-        )
+        name_detail = run_recognition(context, self.IDOL_NAME, argv.image, roi=idol_name_roi)
         if name_detail and name_detail.hit:
             recognized_name = "".join([item.text for item in name_detail.all_results]).replace(" ", "")
             logger.info(f"识别到偶像名称: {recognized_name}，相似度: {self.similarity_ratio(recognized_name, idol_name):.2f}")
 
-        song_detail = context.run_recognition(
-            "ProduceChooseIdolSong",
-            argv.image,
-            pipeline_override={"ProduceChooseIdolSong": {"recognition": "OCR", "roi": song_name_roi}},
-        )
+        song_detail = run_recognition(context, self.SONG_NAME, argv.image, roi=song_name_roi)
         if song_detail and song_detail.hit:
             recognized_song = "".join([item.text for item in song_detail.all_results]).replace("[", "").replace("]", "")
             logger.info(f"识别到歌曲名称: {recognized_song}，相似度: {self.similarity_ratio(recognized_song, song_name):.2f}")
@@ -3,6 +3,7 @@ from typing import Union, Optional
 from utils import logger
 from maa.define import RectType
 from maa.context import Context
+from utils.variants import variant, run_recognition
 from maa.agent.agent_server import AgentServer
 from maa.custom_recognition import CustomRecognition
 
@@ -14,23 +15,14 @@ class SocietyRequestAuto(CustomRecognition):
     选择数量最少的物品
     """
 
+    ITEM_COUNT = variant("SocietyRequestChooseItem", "OCR", expected="^\\d{1,3}(,\\d{3})*$", roi=[25, 400, 665, 500], threshold=0.9)
+
     def analyze(
         self,
         context: Context,
         argv: CustomRecognition.AnalyzeArg,
     ) -> Union[CustomRecognition.AnalyzeResult, Optional[RectType]]:
-        reco_detail = context.run_recognition(
-            "SocietyRequestChooseItem",
-            argv.image,
-            pipeline_override={
-                "SocietyRequestChooseItem": {
-                    "recognition": "OCR",
-                    "expected": "^\\d{1,3}(,\\d{3})*$",
-                    "roi": [25, 400, 665, 500],
-                    "threshold": 0.9,
-                }
-            },
-        )
+        reco_detail = run_recognition(context, self.ITEM_COUNT, argv.image)
         if reco_detail and reco_detail.hit:
             items_list = []
             for result in reco_detail.filtered_results:
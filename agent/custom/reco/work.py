@@ -1,10 +1,11 @@
 import json
-import time
 from typing import Union, Optional
 
 from utils import logger
 from maa.define import RectType
 from maa.context import Context
+from utils.cancel import sleep
+from utils.variants import variant, run_recognition
 from maa.agent.agent_server import AgentServer
 from maa.custom_recognition import CustomRecognition
 
@@ -16,6 +17,8 @@ class WorkChooseAuto(CustomRecognition):
     优先选择笑脸，没有笑脸则按照好感度选择
     """
 
+    AFFINITY = variant("WorkIdolAffinity", "OCR", expected="^(?:0|[1-9]\\d?)/[1-9]\\d$", roi=[70, 788, 558, 240])
+
     def analyze(
         self,
         context: Context,
@@ -25,13 +28,7 @@ class WorkChooseAuto(CustomRecognition):
             return context.run_recognition("WorkChooseGood", image, pipeline_override={"WorkChooseGood": {"roi": roi}})
 
         def recognize_affinity(image):
-            return context.run_recognition(
-                "WorkIdolAffinity",
-                image,
-                pipeline_override={
-                    "WorkIdolAffinity": {"recognition": "OCR", "expected": "^(?:0|[1-9]\\d?)/[1-9]\\d$", "roi": [70, 788, 558, 240]}
-                },
-            )
+            return run_recognition(context, self.AFFINITY, image)
 
         def recognize_work(image, box):
             return context.run_recognition(
@@ -55,7 +52,7 @@ class WorkChooseAuto(CustomRecognition):
                         # 笑脸存在且被选中
                         logger.debug("第二页")
                         context.tasker.controller.post_swipe(*swipe_coords, duration=200).wait()
-                        time.sleep(1)
+                        sleep(context, 1)
                 else:
                     # 笑脸存在且未被选中
                     logger.info("已选择笑脸")
@@ -65,7 +62,7 @@ class WorkChooseAuto(CustomRecognition):
                 # 无笑脸
                 logger.debug("返回第一页")
                 context.tasker.controller.post_swipe(*swipe_coords, duration=200).wait()
-                time.sleep(1)
+                sleep(context, 1)
             return None
 
         # 处理第一页笑脸
@@ -108,6 +105,8 @@ class WorkChooseIdol(CustomRecognition):
     选择指定Idol
     """
 
+    IDOL_NODE = variant("WorkChooseIdolRecognition", "TemplateMatch")
+
     def analyze(
         self,
         context: Context,
@@ -115,24 +114,16 @@ class WorkChooseIdol(CustomRecognition):
     ) -> Union[CustomRecognition.AnalyzeResult, Optional[RectType]]:
         idol = json.loads(argv.custom_recognition_param)["idol"]
 
-        reco_detail = context.run_recognition(
-            "WorkChooseIdolRecognition",
-            argv.image,
-            pipeline_override={"WorkChooseIdolRecognition": {"recognition": "TemplateMatch", "template": idol}},
-        )
+        reco_detail = run_recognition(context, self.IDOL_NODE, argv.image, template=idol)
         if reco_detail and reco_detail.hit:
             box = reco_detail.filtered_results[0].box
             return CustomRecognition.AnalyzeResult(box=box, detail={"detail": "已选中"})
         else:
             context.tasker.controller.post_swipe(400, 864, 200, 864, duration=200).wait()
-            time.sleep(0.5)
+            sleep(context, 0.5)
             image = context.tasker.controller.post_screencap().wait().get()
 
-            reco_detail = context.run_recognition(
-                "WorkChooseIdolRecognition",
-                image,
-                pipeline_override={"WorkChooseIdolRecognition": {"recognition": "TemplateMatch", "template": idol}},
-            )
+            reco_detail = run_recognition(context, self.IDOL_NODE, image, template=idol)
             if reco_detail and reco_detail.hit:
                 box = reco_detail.filtered_results[0].box
                 return CustomRecognition.AnalyzeResult(box=box, detail={"detail": "已选中"})
@@ -59,6 +59,63 @@ def read_pip_config() -> dict:
         return default_config
 
 
+def read_agent_config() -> dict:
+    """
+    读取 agent 运行配置文件并返回配置字典，缺失的字段使用默认值
+    """
+    config_dir = Path("./config")
+    config_dir.mkdir(exist_ok=True)
+
+    config_path = config_dir / "agent_config.json"
+    default_config = {
+        "frame_grabber": {
+            "enabled": False,
+            "capacity": 3,
+            "interval": 0.05,
+            "max_age": 0.5,
+            "idle_timeout": 5.0,
+        },
+        "recorder": {
+            "enabled": False,
+            "path": "debug/replay",
+        },
+        "profiler": {
+            "enabled": False,
+            "path": "debug/custom",
+            "turn_actions": ["ProduceChooseEventAuto", "ProduceChooseNIAEventAuto"],
+        },
+        "tracer": {
+            "enabled": False,
+            "path": "debug/trace",
+            "flush_interval": 1.0,
+        },
+        "watchdog": {
+            "enabled": True,
+            "stall": False,
+            "path": "debug/watchdog",
+            "dump": True,
+        },
+    }
+
+    if not config_path.exists():
+        with open(config_path, "w", encoding="utf-8") as f:
+            json.dump(default_config, f, indent=4)
+        return default_config
+
+    try:
+        with open(config_path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+        for key, value in default_config.items():
+            if isinstance(value, dict):
+                config[key] = {**value, **config.get(key, {})}
+            else:
+                config.setdefault(key, value)
+        return config
+    except Exception:
+        logger.exception("读取agent配置失败，使用默认配置")
+        return default_config
+
+
 def get_available_mirror(pip_config: dict | None) -> Optional[str]:
     """
     检查镜像源可用性并返回一个可用的镜像源
@@ -245,11 +302,39 @@ def update_pip_config(version) -> bool:
 def agent():
     try:
         import custom
-        from utils import logger
+        from utils import cancel, frames, logger, watchdog
         from maa.toolkit import Toolkit
         from maa.agent.agent_server import AgentServer
 
         Toolkit.init_option("./")
+        # 任务停止时 TaskCancelled 在 custom action / recognition 边界处结束调用
+        cancel.install()
+
+        agent_config = read_agent_config()
+        frames.configure(**agent_config["frame_grabber"])
+        logger.info(f"后台截图: {'启用' if agent_config['frame_grabber']['enabled'] else '关闭'}")
+        watchdog.configure(**agent_config["watchdog"])
+
+        listeners = []
+        if agent_config["recorder"]["enabled"]:
+            from utils.replay import SessionRecorder
+
+            listeners.append(SessionRecorder(agent_config["recorder"]["path"]))
+        if agent_config["profiler"]["enabled"]:
+            from utils.profiler import Profiler
+
+            listeners.append(Profiler(agent_config["profiler"]["path"], agent_config["profiler"]["turn_actions"]))
+            logger.info("耗时分析: 启用")
+        if agent_config["tracer"]["enabled"]:
+            from utils.tracer import Tracer
+
+            listeners.append(Tracer(agent_config["tracer"]["path"], agent_config["tracer"]["flush_interval"]))
+        if listeners:
+            from utils import hooks
+
+            for listener in listeners:
+                hooks.add_listener(listener)
+            hooks.install()
 
         socket_id = sys.argv[-1]
 
@@ -257,6 +342,9 @@ def agent():
         logger.info("AgentServer 启动")
         AgentServer.join()
         AgentServer.shut_down()
+        for listener in listeners:
+            listener.close()
+        watchdog.write_metrics()
         logger.info("AgentServer 关闭")
     except Exception as e:
         logger.exception("Agent 运行过程中发生异常")
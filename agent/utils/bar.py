@@ -0,0 +1,57 @@
+from typing import Optional, Sequence
+
+import numpy as np
+
+# 一列中符合颜色的像素比例达到该值时，该列视为填充 / 底槽
+MIN_COLUMN_COVERAGE = 0.5
+# 填充部分（从左端到最右一个填充列）中填充列的最低比例，低于该值说明不是进度条（叠加文字造成的少量空洞可以容忍）
+MIN_PREFIX_DENSITY = 0.8
+
+
+def _match(strip: np.ndarray, lower: Sequence[int], upper: Sequence[int]) -> np.ndarray:
+    """每列中颜色位于 [lower, upper]（BGR）内的像素比例"""
+    inside = np.all((strip >= np.asarray(lower, np.uint8)) & (strip <= np.asarray(upper, np.uint8)), axis=2)
+    return inside.mean(axis=0)
+
+
+def fill_ratio(
+    image: np.ndarray,
+    roi: Sequence[int],
+    fill_lower: Sequence[int],
+    fill_upper: Sequence[int],
+    track_lower: Optional[Sequence[int]] = None,
+    track_upper: Optional[Sequence[int]] = None,
+) -> Optional[float]:
+    """
+    测量从左向右填充的进度条的填充比例
+
+    按列统计填充色像素的比例，最右一个填充列的位置即填充长度；
+    给出底槽颜色时，未填充部分须为底槽色，用于区分「空槽」与「不在该界面」。
+
+    Args:
+        image: 截图（BGR）
+        roi: 进度条区域 [x, y, w, h]
+        fill_lower / fill_upper: 填充色范围（BGR）
+        track_lower / track_upper: 底槽色范围（BGR），为 None 时不检查未填充部分
+
+    Returns:
+        0-1 的填充比例；区域内不像进度条时返回 None
+    """
+    x, y, w, h = roi
+    strip = image[y : y + h, x : x + w, :3]
+    if strip.shape[1] == 0:
+        return None
+
+    filled = _match(strip, fill_lower, fill_upper) >= MIN_COLUMN_COVERAGE
+    columns = np.flatnonzero(filled)
+    length = int(columns[-1]) + 1 if columns.size else 0
+    if length and filled[:length].mean() < MIN_PREFIX_DENSITY:
+        return None
+
+    if track_lower is not None and track_upper is not None and length < strip.shape[1]:
+        track = _match(strip[:, length:], track_lower, track_upper) >= MIN_COLUMN_COVERAGE
+        if track.mean() < MIN_PREFIX_DENSITY:
+            return None
+    elif not length:
+        return None
+    return length / strip.shape[1]
@@ -0,0 +1,116 @@
+import time
+import functools
+from typing import Any, List
+
+from utils import hooks, logger
+
+# 等待时检查任务是否停止的间隔（秒），即停止任务后的最大响应延迟
+POLL_INTERVAL = 0.02
+
+
+class TaskCancelled(Exception):
+    """任务已停止，由 install() 安装的包装在 custom action / recognition 边界处捕获"""
+
+
+class CancelToken:
+    """
+    取消令牌
+
+    绑定 tasker，在等待、控制器操作、识别前检查 tasker.stopping。
+    停止后 check() / sleep() 抛出 TaskCancelled，调用栈直接退出到 custom action / recognition 边界，
+    不必在每层循环中逐一判断 stopping 并返回。
+    """
+
+    __slots__ = ("tasker",)
+
+    def __init__(self, tasker):
+        self.tasker = tasker
+
+    @property
+    def cancelled(self) -> bool:
+        return bool(self.tasker.stopping)
+
+    def check(self):
+        """任务已停止时抛出 TaskCancelled"""
+        if self.tasker.stopping:
+            raise TaskCancelled()
+
+    def wait(self, seconds: float) -> bool:
+        """
+        等待 seconds 秒，每 POLL_INTERVAL 检查一次任务是否停止
+
+        整个等待记录为一个 sleep Span，轮询本身不产生 Span
+
+        Returns:
+            完整等待返回 True；期间任务停止时立即返回 False
+        """
+        with hooks.span("sleep", "sleep", args={"seconds": seconds}):
+            deadline = time.perf_counter() + seconds
+            while not self.tasker.stopping:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    return True
+                hooks.sleep(min(remaining, POLL_INTERVAL))
+            return False
+
+    def sleep(self, seconds: float):
+        """可中断的 time.sleep：期间任务停止时抛出 TaskCancelled"""
+        if not self.wait(seconds):
+            raise TaskCancelled()
+
+
+def token(context) -> CancelToken:
+    """当前任务的取消令牌"""
+    return CancelToken(context.tasker)
+
+
+def check(context):
+    """任务已停止时抛出 TaskCancelled"""
+    if context.tasker.stopping:
+        raise TaskCancelled()
+
+
+def sleep(context, seconds: float):
+    """可中断的 time.sleep：期间任务停止时抛出 TaskCancelled"""
+    CancelToken(context.tasker).sleep(seconds)
+
+
+def _wrap(cls, method: str, cancelled_result: Any):
+    func = cls.__dict__.get(method)
+    if func is None or getattr(func, "__cancellable__", False):
+        return
+
+    @functools.wraps(func)
+    def wrapper(self, context, argv):
+        try:
+            return func(self, context, argv)
+        except TaskCancelled as e:
+            logger.info(f"{cls.__name__}: {e or '任务已停止'}")
+            return cancelled_result
+
+    wrapper.__cancellable__ = True
+    setattr(cls, method, wrapper)
+
+
+def _subclasses(cls) -> List[type]:
+    result = []
+    for sub in cls.__subclasses__():
+        result.append(sub)
+        result.extend(_subclasses(sub))
+    return result
+
+
+def install():
+    """
+    为所有已导入的 CustomAction / CustomRecognition 子类安装取消处理：抛出 TaskCancelled 时
+    action 返回 False、recognition 返回未命中，不作为异常上报
+
+    需在 import custom 之后调用；可重复调用，新导入的子类会被补充包装。
+    """
+    from maa.custom_action import CustomAction
+    from maa.custom_recognition import CustomRecognition
+
+    for cls in _subclasses(CustomAction):
+        _wrap(cls, "run", False)
+    for cls in _subclasses(CustomRecognition):
+        _wrap(cls, "analyze", None)
@@ -0,0 +1,184 @@
+import time
+import threading
+from typing import Any, Dict, Optional, NamedTuple
+from collections import deque
+
+from utils import logger
+from utils.cancel import check
+
+# 后台截图配置，由 main.py 在启动时根据 config/agent_config.json 设置
+DEFAULT_CONFIG = {
+    "enabled": False,  # 是否启用后台截图（默认关闭，每次截图都直接请求控制器）
+    "capacity": 3,  # 环形缓冲区保存的帧数上限
+    "interval": 0.05,  # 两次截图之间的最小间隔（秒）
+    "max_age": 0.5,  # 超过该时长的帧视为过期并丢弃（秒）
+    "idle_timeout": 5.0,  # 超过该时长无人读取时停止后台线程（秒）
+}
+
+_config: Dict[str, Any] = dict(DEFAULT_CONFIG)
+_grabbers: Dict[Any, "FrameGrabber"] = {}
+_grabbers_lock = threading.Lock()
+
+
+class Frame(NamedTuple):
+    image: Any
+    timestamp: float  # 发起截图的时间（time.perf_counter），画面不早于该时刻
+
+
+class FrameGrabber:
+    """
+    后台截图线程
+
+    持续截图并将带时间戳的帧保存在容量有限的环形缓冲区中，过期的帧会被丢弃。
+    调用方通过 latest(newer_than=t) 获取 t 时刻之后的最新画面，无需每次等待一次完整的截图往返。
+    一段时间无人读取或任务停止时自动退出，下次读取时重新启动。
+    """
+
+    def __init__(self, tasker, capacity: int = 3, interval: float = 0.05, max_age: float = 0.5, idle_timeout: float = 5.0):
+        self._tasker = tasker
+        self._controller = tasker.controller
+        self.interval = interval
+        self.max_age = max_age
+        self.idle_timeout = idle_timeout
+        self._frames: deque = deque(maxlen=max(capacity, 1))
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self._last_read = time.perf_counter()
+        self.captured = 0
+        self.served = 0
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def start(self):
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+            self._last_read = time.perf_counter()
+            self._thread = threading.Thread(target=self._loop, name="frame-grabber", daemon=True)
+            self._thread.start()
+        logger.debug("后台截图已启动")
+
+    def stop(self):
+        with self._condition:
+            self._running = False
+            self._thread = None
+            self._frames.clear()
+            self._condition.notify_all()
+
+    def _loop(self):
+        # stop 后重新 start 会创建新线程，旧线程发现自己不再是当前线程时退出
+        while self._running and self._thread is threading.current_thread():
+            if time.perf_counter() - self._last_read > self.idle_timeout or self._tasker.stopping:
+                logger.debug(f"后台截图已停止，共截图 {self.captured} 次，提供 {self.served} 次")
+                self.stop()
+                return
+
+            start = time.perf_counter()
+            try:
+                image = self._controller.post_screencap().wait().get()
+            except Exception as e:
+                logger.warning(f"后台截图失败: {e}")
+                image = None
+
+            with self._condition:
+                if image is not None and self._thread is threading.current_thread():
+                    self._frames.append(Frame(image, start))
+                    self.captured += 1
+                    self._drop_stale()
+                    self._condition.notify_all()
+
+            remaining = self.interval - (time.perf_counter() - start)
+            if remaining > 0:
+                time.sleep(remaining)
+
+    def _drop_stale(self):
+        deadline = time.perf_counter() - self.max_age
+        while self._frames and self._frames[0].timestamp < deadline:
+            self._frames.popleft()
+
+    def latest(self, newer_than: Optional[float] = None, timeout: float = 1.0) -> Optional[Frame]:
+        """
+        获取最新一帧
+
+        Args:
+            newer_than: 只接受在该时刻（time.perf_counter）之后发起的截图，为 None 时接受任何未过期的帧
+            timeout: 最长等待时间（秒）
+
+        Returns:
+            Frame: 满足条件的最新帧；超时或后台线程已停止时返回 None
+        """
+        self._last_read = time.perf_counter()
+        if not self._running:
+            self.start()
+
+        deadline = time.perf_counter() + timeout
+        with self._condition:
+            while True:
+                self._drop_stale()
+                if self._frames and (newer_than is None or self._frames[-1].timestamp >= newer_than):
+                    self.served += 1
+                    return self._frames[-1]
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0 or not self._running:
+                    return None
+                self._condition.wait(remaining)
+
+
+def configure(**config):
+    """更新后台截图配置，未知字段会被忽略"""
+    _config.update({key: value for key, value in config.items() if key in DEFAULT_CONFIG})
+    if not _config["enabled"]:
+        with _grabbers_lock:
+            for grabber in _grabbers.values():
+                grabber.stop()
+            _grabbers.clear()
+
+
+def _controller_key(controller) -> Any:
+    handle = getattr(controller, "_handle", None)
+    return getattr(handle, "value", handle)
+
+
+def get_grabber(context) -> Optional[FrameGrabber]:
+    """获取当前控制器对应的后台截图器，未启用时返回 None"""
+    if not _config["enabled"]:
+        return None
+    tasker = context.tasker
+    key = _controller_key(tasker.controller)
+    with _grabbers_lock:
+        grabber = _grabbers.get(key)
+        if grabber is None:
+            grabber = FrameGrabber(
+                tasker,
+                capacity=_config["capacity"],
+                interval=_config["interval"],
+                max_age=_config["max_age"],
+                idle_timeout=_config["idle_timeout"],
+            )
+            _grabbers[key] = grabber
+    return grabber
+
+
+def screencap(context, newer_than: Optional[float] = None, timeout: float = 1.0):
+    """
+    获取截图
+
+    启用后台截图时从缓冲区取 newer_than 之后的最新帧，否则（或等待超时时）直接请求控制器截图。
+
+    Args:
+        context: maa的Context类
+        newer_than: 只接受在该时刻（time.perf_counter）之后发起的截图，为 None 时接受任何未过期（max_age 内）的帧；
+            点击等操作之后取图时应传入操作完成（或画面预计稳定）的时刻，避免拿到操作前的画面
+        timeout: 等待后台截图的最长时间（秒）
+    """
+    check(context)
+    grabber = get_grabber(context)
+    if grabber is not None:
+        frame = grabber.latest(newer_than, timeout)
+        if frame is not None:
+            return frame.image
+    return context.tasker.controller.post_screencap().wait().get()
@@ -0,0 +1,97 @@
+from typing import Dict, List, Tuple, Callable, Iterable, Optional
+from difflib import SequenceMatcher
+from functools import lru_cache
+from collections import Counter
+
+# 每个索引缓存的查询字符串数（OCR 结果在翻页、重复识别时经常相同）
+CACHE_SIZE = 1024
+
+
+def similarity(name1: str, name2: str) -> float:
+    """两个字符串的相似度，与 SequenceMatcher(None, name1, name2).ratio() 一致"""
+    return SequenceMatcher(None, name1, name2).ratio()
+
+
+class FuzzyIndex:
+    """
+    名称模糊匹配索引
+
+    逐个计算 SequenceMatcher.ratio() 的代价为 O(N·L²)。索引按字符建立倒排表，查询时只累计与查询串有共同字符的名称的
+    字符多重集交集大小 M，得到 ratio 的上界 2M / (len(a) + len(b))（即 SequenceMatcher.quick_ratio()）：
+    - 上界低于阈值的名称直接排除
+    - 其余按上界从高到低计算真实相似度，上界低于当前最佳值时提前结束
+
+    结果与按名称顺序线性扫描、取相似度最高（相同时取靠前者）的结果完全一致。查询结果按查询串缓存。
+    """
+
+    def __init__(self, names: Iterable[str], scorer: Callable[[str, str], float] = similarity, cache_size: int = CACHE_SIZE):
+        """
+        Args:
+            names: 名称列表，顺序决定相似度相同时的优先级，重复的名称只保留第一个
+            scorer: 相似度函数，须满足 scorer(a, b) <= 2M / (len(a) + len(b))（M 为字符多重集交集大小）
+            cache_size: 查询结果缓存的条目数
+        """
+        self.names: List[str] = list(dict.fromkeys(names))
+        self.scorer = scorer
+        self._lengths = [len(name) for name in self.names]
+        # 字符 -> [(名称序号, 该字符在名称中出现的次数), ...]
+        self._postings: Dict[str, List[Tuple[int, int]]] = {}
+        for index, name in enumerate(self.names):
+            for char, count in Counter(name).items():
+                self._postings.setdefault(char, []).append((index, count))
+        self.best = lru_cache(maxsize=cache_size)(self._best)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _bounds(self, query: str, threshold: float) -> List[Tuple[float, int]]:
+        """上界不低于 threshold 的 (上界, 名称序号)，按上界从高到低、序号从小到大排列"""
+        shared: Dict[int, int] = {}
+        for char, query_count in Counter(query).items():
+            for index, count in self._postings.get(char, ()):
+                shared[index] = shared.get(index, 0) + min(query_count, count)
+        length = len(query)
+        bounds = []
+        for index, matches in shared.items():
+            bound = 2.0 * matches / (length + self._lengths[index])
+            if bound >= threshold:
+                bounds.append((bound, index))
+        bounds.sort(key=lambda item: (-item[0], item[1]))
+        return bounds
+
+    def candidates(self, query: str, threshold: float = 0.0, limit: Optional[int] = None) -> List[Tuple[str, float]]:
+        """
+        相似度不低于 threshold 的候选名称
+
+        Args:
+            query: 查询串（如 OCR 结果）
+            threshold: 相似度下限，没有共同字符（相似度为 0）的名称不会返回
+            limit: 最多返回的候选数，为 None 时不限制
+
+        Returns:
+            [(名称, 相似度), ...]，按相似度从高到低、名称顺序从前到后排列
+        """
+        results: List[Tuple[float, int]] = []
+        for bound, index in self._bounds(query, threshold):
+            # 已凑够 limit 个候选，且剩余上界都低于第 limit 名，不可能再进入结果
+            if limit is not None and len(results) >= limit and bound < results[limit - 1][0]:
+                break
+            score = self.scorer(query, self.names[index])
+            if score >= threshold:
+                results.append((score, index))
+                results.sort(key=lambda item: (-item[0], item[1]))
+        return [(self.names[index], score) for score, index in results[:limit]]
+
+    def _best(self, query: str, threshold: float = 0.0) -> Optional[Tuple[str, float]]:
+        """相似度最高（相同时取靠前者）且大于 0、不低于 threshold 的名称与相似度，没有时返回 None"""
+        best_score, best_index = 0.0, None
+        for bound, index in self._bounds(query, threshold):
+            # 上界等于当前最佳值时仍需计算：序号更小的名称可能以相同相似度胜出
+            if bound < best_score:
+                break
+            score = self.scorer(query, self.names[index])
+            if score > best_score or (score == best_score and best_index is not None and index < best_index):
+                best_score, best_index = score, index
+        if best_index is None or best_score < threshold:
+            return None
+        return self.names[best_index], best_score
@@ -0,0 +1,314 @@
+import time
+import functools
+import threading
+from typing import Any, Dict, List, Optional
+from contextlib import contextmanager
+
+from utils import logger
+
+# 已注册的监听器，为空时插桩代码直接调用原函数，没有额外开销
+_listeners: List["Listener"] = []
+_listeners_lock = threading.Lock()
+_local = threading.local()
+_task_sink_installed = False
+
+# 仓库内等待（cancel.CancelToken.wait）的实际实现，回放时可通过 set_sleep 替换为虚拟时钟
+# 不替换全局的 time.sleep，maa 与第三方库的等待不受影响，也不会产生 Span
+_original_sleep = time.sleep
+_sleep_impl = time.sleep
+
+
+class Span:
+    """
+    一次被插桩的调用
+
+    Attributes:
+        kind: action / custom_recognition / recognition / task / run_action / controller / sleep
+        name: custom 名称、节点名或控制器方法名
+        start / end: time.perf_counter 时刻
+        owner: 发起调用的 custom action / recognition 名称，不在其中时为 None
+        args: 可序列化的参数（节点 override、点击坐标等）
+        image: 识别使用的截图（recognition / custom_recognition）
+        result: 调用结果（识别结果、截图等）
+    """
+
+    __slots__ = ("kind", "name", "start", "end", "owner", "thread", "args", "image", "result")
+
+    def __init__(self, kind: str, name: str, owner: Optional[str] = None, args: Optional[dict] = None, image: Any = None):
+        self.kind = kind
+        self.name = name
+        self.start = time.perf_counter()
+        self.end = self.start
+        self.owner = owner
+        self.thread = threading.get_ident()
+        self.args = args or {}
+        self.image = image
+        self.result = None
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+    def __repr__(self) -> str:
+        return f"Span({self.kind}, {self.name}, owner={self.owner}, {self.duration * 1000:.1f}ms)"
+
+
+class Listener:
+    """插桩监听器基类，按需重写"""
+
+    def on_begin(self, span: Span):
+        """custom action / recognition 开始执行"""
+
+    def on_span(self, span: Span):
+        """一次调用结束"""
+
+    def on_task_end(self, task_id: int, entry: str):
+        """任务结束（成功或失败）"""
+
+    def close(self):
+        """agent 退出时调用"""
+
+
+def add_listener(listener: Listener):
+    with _listeners_lock:
+        if listener not in _listeners:
+            _listeners.append(listener)
+
+
+def remove_listener(listener: Listener):
+    with _listeners_lock:
+        if listener in _listeners:
+            _listeners.remove(listener)
+
+
+def enabled() -> bool:
+    return bool(_listeners)
+
+
+def _notify(method: str, span: Span):
+    for listener in list(_listeners):
+        try:
+            getattr(listener, method)(span)
+        except Exception as e:
+            logger.warning(f"插桩监听器 {type(listener).__name__} 出错: {e}")
+
+
+def task_finished(task_id: int, entry: str):
+    """通知监听器任务已结束"""
+    for listener in list(_listeners):
+        try:
+            listener.on_task_end(task_id, entry)
+        except Exception as e:
+            logger.warning(f"插桩监听器 {type(listener).__name__} 出错: {e}")
+
+
+def current_owner() -> Optional[str]:
+    """当前线程正在执行的 custom action / recognition"""
+    stack = getattr(_local, "stack", None)
+    return stack[-1] if stack else None
+
+
+@contextmanager
+def span(kind: str, name: str, owner: Optional[str] = None, args: Optional[dict] = None, image: Any = None):
+    """记录一次调用，监听器为空时不做任何事"""
+    if not _listeners:
+        yield None
+        return
+    record = Span(kind, name, owner if owner is not None else current_owner(), args, image)
+    try:
+        yield record
+    finally:
+        record.end = time.perf_counter()
+        _notify("on_span", record)
+
+
+class InstrumentedJob:
+    """控制器 Job 的包装，wait() 返回时记录从发起到完成的耗时"""
+
+    def __init__(self, job, record: Span):
+        self._job = job
+        self._span = record
+        self._done = False
+
+    def __getattr__(self, name):
+        return getattr(self._job, name)
+
+    def wait(self):
+        self._job.wait()
+        if not self._done and _listeners:
+            self._done = True
+            self._span.end = time.perf_counter()
+            if self._span.name == "post_screencap":
+                self._span.result = self._job.get()
+            _notify("on_span", self._span)
+        return self
+
+    def get(self):
+        return self._job.get()
+
+
+class InstrumentedController:
+    """控制器包装，所有 post_* 调用返回 InstrumentedJob"""
+
+    def __init__(self, controller, owner: Optional[str]):
+        self._controller = controller
+        self._owner = owner
+
+    def __getattr__(self, name):
+        attr = getattr(self._controller, name)
+        if name.startswith("post_") and callable(attr):
+            return functools.partial(self._post, name, attr)
+        return attr
+
+    def _post(self, name: str, func, *args, **kwargs):
+        record = Span("controller", name, self._owner, {"args": list(args)} if args else {})
+        return InstrumentedJob(func(*args, **kwargs), record)
+
+
+class InstrumentedTasker:
+    def __init__(self, tasker, owner: Optional[str]):
+        self._tasker = tasker
+        self.controller = InstrumentedController(tasker.controller, owner)
+
+    def __getattr__(self, name):
+        return getattr(self._tasker, name)
+
+
+class InstrumentedContext:
+    """
+    Context 包装
+
+    run_recognition / run_task / run_action 以及 tasker.controller 的 post_* 调用都会生成 Span，
+    其余属性直接转发给原 Context。
+    """
+
+    def __init__(self, context, owner: Optional[str]):
+        self._context = context
+        self._owner = owner
+        self.tasker = InstrumentedTasker(context.tasker, owner)
+
+    def __getattr__(self, name):
+        return getattr(self._context, name)
+
+    def run_recognition(self, entry: str, image, pipeline_override: Optional[dict] = None):
+        pipeline_override = pipeline_override or {}
+        with span("recognition", entry, self._owner, {"override": pipeline_override}, image) as record:
+            result = self._context.run_recognition(entry, image, pipeline_override=pipeline_override)
+            if record is not None:
+                record.result = result
+        return result
+
+    def run_task(self, entry: str, pipeline_override: Optional[dict] = None):
+        pipeline_override = pipeline_override or {}
+        with span("task", entry, self._owner, {"override": pipeline_override}) as record:
+            result = self._context.run_task(entry, pipeline_override=pipeline_override)
+            if record is not None:
+                record.result = result
+        return result
+
+    def run_action(self, entry: str, *args, **kwargs):
+        with span("run_action", entry, self._owner, {"override": kwargs.get("pipeline_override") or {}}) as record:
+            result = self._context.run_action(entry, *args, **kwargs)
+            if record is not None:
+                record.result = result
+        return result
+
+    def clone(self):
+        return InstrumentedContext(self._context.clone(), self._owner)
+
+
+def instrument(context, owner: Optional[str] = None):
+    """包装 Context，已包装或没有监听器时原样返回"""
+    if isinstance(context, InstrumentedContext) or not _listeners:
+        return context
+    return InstrumentedContext(context, owner)
+
+
+def _run_instrumented(kind: str, name: str, func, self, context, argv):
+    if not _listeners:
+        return func(self, context, argv)
+
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    param = getattr(argv, "custom_action_param", None) or getattr(argv, "custom_recognition_param", None)
+    task = getattr(argv, "task_detail", None)
+    args = {
+        "node": getattr(argv, "node_name", None),
+        "param": param,
+        "task_id": getattr(task, "task_id", None),
+        "entry": getattr(task, "entry", None),
+    }
+    record = Span(kind, name, name, args, getattr(argv, "image", None))
+    _notify("on_begin", record)
+    stack.append(name)
+    try:
+        record.result = func(self, instrument(context, name), argv)
+        return record.result
+    finally:
+        stack.pop()
+        record.end = time.perf_counter()
+        _notify("on_span", record)
+
+
+def _wrap(cls, method: str, kind: str, arg_name: str):
+    func = cls.__dict__.get(method)
+    if func is None or getattr(func, "__instrumented__", False):
+        return
+
+    @functools.wraps(func)
+    def wrapper(self, context, argv):
+        name = getattr(argv, arg_name, None) or cls.__name__
+        return _run_instrumented(kind, name, func, self, context, argv)
+
+    wrapper.__instrumented__ = True
+    setattr(cls, method, wrapper)
+
+
+def _subclasses(cls) -> List[type]:
+    result = []
+    for sub in cls.__subclasses__():
+        result.append(sub)
+        result.extend(_subclasses(sub))
+    return result
+
+
+def sleep(seconds: float):
+    """等待的实际实现，不记录 Span；需要记录时由调用方在整个等待外包一层 span("sleep", ...)"""
+    _sleep_impl(seconds)
+
+
+def set_sleep(func=None):
+    """替换 sleep 的实际实现（回放时使用虚拟时钟），为 None 时恢复"""
+    global _sleep_impl
+    _sleep_impl = func or _original_sleep
+
+
+def install():
+    """
+    为所有已导入的 CustomAction / CustomRecognition 子类安装插桩
+
+    需在 import custom 之后、AgentServer.start_up 之前调用；可重复调用，新导入的子类会被补充包装。
+    同时注册任务事件监听，任务结束时调用各监听器的 on_task_end。
+    """
+    global _task_sink_installed
+    from maa.tasker import TaskerEventSink
+    from maa.event_sink import NotificationType
+    from maa.custom_action import CustomAction
+    from maa.agent.agent_server import AgentServer
+    from maa.custom_recognition import CustomRecognition
+
+    for cls in _subclasses(CustomAction):
+        _wrap(cls, "run", "action", "custom_action_name")
+    for cls in _subclasses(CustomRecognition):
+        _wrap(cls, "analyze", "custom_recognition", "custom_recognition_name")
+
+    if not _task_sink_installed:
+        _task_sink_installed = True
+
+        class TaskSink(TaskerEventSink):
+            def on_tasker_task(self, tasker, noti_type, detail):
+                if noti_type in (NotificationType.Succeeded, NotificationType.Failed):
+                    task_finished(detail.task_id, detail.entry)
+
+        AgentServer.add_tasker_sink(TaskSink())
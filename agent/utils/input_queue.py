@@ -0,0 +1,203 @@
+import time
+import queue
+import threading
+from typing import Any, Dict, Optional, Sequence, NamedTuple
+
+from utils import logger
+from utils.cancel import CancelToken, TaskCancelled
+
+# 空闲超过该时长（秒）时后台线程退出，下次提交时重新启动
+IDLE_TIMEOUT = 5.0
+
+_schedulers: Dict[Any, "InputScheduler"] = {}
+_schedulers_lock = threading.Lock()
+# 全局统计：jobs 为提交的输入序列数，posted 为后台线程完成的控制器往返次数（每个操作发起并等待完成一次），
+# waits 与 wait_seconds 为调用方实际阻塞等待的次数与时长。调度只让调用方少阻塞，不减少控制器往返
+_stats: Dict[str, float] = {"jobs": 0, "posted": 0, "waits": 0, "wait_seconds": 0.0}
+_stats_lock = threading.Lock()
+
+
+def _count(**values: float):
+    """调用方线程与各控制器的后台线程都会更新统计"""
+    with _stats_lock:
+        for key, value in values.items():
+            _stats[key] += value
+
+
+class Step(NamedTuple):
+    method: str  # 控制器方法名，如 post_click / post_swipe
+    args: tuple
+    delay: float = 0.0  # 完成后等待的时间（秒），下一步在此之后发起
+
+
+class InputJob:
+    """
+    一组按顺序执行的控制器输入
+
+    提交后立即返回，由后台线程逐步执行；调用方在截图确认结果前必须对最后一个 job 调用 wait()，
+    只有两者之间还有不依赖点击结果的工作（如识别上一张截图）时才能与输入重叠。
+    """
+
+    def __init__(self, controller, steps: Sequence[Step]):
+        self.controller = controller
+        self.steps = list(steps)
+        self.error: Optional[Exception] = None
+        self.cancelled = False
+        self._done = threading.Event()
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    @property
+    def succeeded(self) -> bool:
+        return self.done and self.error is None and not self.cancelled
+
+    def wait(self, timeout: Optional[float] = None) -> "InputJob":
+        """等待所有步骤（含最后一步之后的 delay）完成；任务停止导致剩余步骤被取消时抛出 TaskCancelled"""
+        if not self._done.is_set():
+            start = time.perf_counter()
+            self._done.wait(timeout)
+            _count(waits=1, wait_seconds=time.perf_counter() - start)
+        if self.cancelled:
+            raise TaskCancelled()
+        return self
+
+    def _finish(self):
+        self._done.set()
+
+
+class InputScheduler:
+    """
+    控制器输入调度
+
+    每个控制器一个后台线程，按提交顺序执行输入序列：每一步发起后在后台线程等待完成，
+    再等待该步的 delay 后发起下一步。每一步仍是一次控制器往返；调用方线程提交后可以先做不依赖点击结果的识别，
+    不必在每次点击、每段间隔上阻塞。
+
+    注意：控制器按发起顺序执行操作，后台序列尚未发起的步骤会排在调用方之后发起的截图后面，
+    因此需要截取操作结果的画面时，先 wait() 最后一个 job。
+    """
+
+    def __init__(self, tasker, idle_timeout: float = IDLE_TIMEOUT):
+        self._token = CancelToken(tasker)
+        self.idle_timeout = idle_timeout
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, controller, steps: Sequence[Step]) -> InputJob:
+        """提交一组输入，返回 InputJob；任务已停止时抛出 TaskCancelled"""
+        self._token.check()
+        job = InputJob(controller, steps)
+        _count(jobs=1)
+        with self._lock:
+            self._queue.put(job)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="input-scheduler", daemon=True)
+                self._thread.start()
+        return job
+
+    def _loop(self):
+        while True:
+            try:
+                job = self._queue.get(timeout=self.idle_timeout)
+            except queue.Empty:
+                with self._lock:
+                    if self._queue.empty():
+                        self._thread = None
+                        return
+                continue
+            self._run(job)
+
+    def _run(self, job: InputJob):
+        try:
+            for step in job.steps:
+                if self._token.cancelled:
+                    job.cancelled = True
+                    break
+                getattr(job.controller, step.method)(*step.args).wait()
+                _count(posted=1)
+                if step.delay > 0 and not self._token.wait(step.delay):
+                    job.cancelled = True
+                    break
+        except Exception as e:
+            logger.warning(f"输入执行失败: {e}")
+            job.error = e
+        finally:
+            job._finish()
+
+    def flush(self, timeout: Optional[float] = None):
+        """等待已提交的所有输入完成"""
+        self.submit(None, []).wait(timeout)
+
+
+def _controller_key(controller) -> Any:
+    handle = getattr(controller, "_handle", None)
+    return getattr(handle, "value", handle) if handle is not None else id(controller)
+
+
+def get_scheduler(context) -> InputScheduler:
+    """获取当前控制器对应的输入调度器"""
+    tasker = context.tasker
+    key = _controller_key(tasker.controller)
+    with _schedulers_lock:
+        scheduler = _schedulers.get(key)
+        if scheduler is None:
+            scheduler = _schedulers[key] = InputScheduler(tasker)
+    return scheduler
+
+
+def submit(context, steps: Sequence[Step]) -> InputJob:
+    return get_scheduler(context).submit(context.tasker.controller, steps)
+
+
+def tap(context, x: int, y: int, settle: float = 0.0) -> InputJob:
+    """点击，settle 为点击后等待画面稳定的时间"""
+    return submit(context, [Step("post_click", (x, y), settle)])
+
+
+def double_tap(context, x: int, y: int, interval: float = 0.2, settle: float = 0.0) -> InputJob:
+    """双击：两次点击间隔 interval 秒"""
+    return multi_tap(context, [(x, y)], interval=interval, taps=2, settle=settle)
+
+
+def multi_tap(context, points: Sequence[Sequence[int]], interval: float = 0.1, taps: int = 1, settle: float = 0.0) -> InputJob:
+    """
+    依次点击多个坐标
+
+    Args:
+        points: 坐标列表 [(x, y), ...]
+        interval: 相邻两次点击的间隔（秒）
+        taps: 每个坐标连续点击的次数（2 为双击）
+        settle: 最后一次点击后等待的时间（秒）
+    """
+    clicks = [(int(x), int(y)) for x, y in points for _ in range(taps)]
+    steps = [Step("post_click", point, interval) for point in clicks]
+    if steps:
+        steps[-1] = steps[-1]._replace(delay=settle)
+    return submit(context, steps)
+
+
+def swipe(context, x1: int, y1: int, x2: int, y2: int, duration: int = 200, settle: float = 0.0) -> InputJob:
+    """滑动，settle 为滑动结束后等待惯性停止的时间"""
+    return submit(context, [Step("post_swipe", (x1, y1, x2, y2, duration), settle)])
+
+
+def stats() -> Dict[str, float]:
+    with _stats_lock:
+        return dict(_stats)
+
+
+def reset_stats():
+    with _stats_lock:
+        for key in _stats:
+            _stats[key] = 0
+
+
+def log_stats(title: str = "输入调度"):
+    result = stats()
+    logger.debug(
+        f"{title}: 输入序列 {result['jobs']:.0f} 个，控制器往返 {result['posted']:.0f} 次，"
+        f"调用方阻塞等待 {result['waits']:.0f} 次共 {result['wait_seconds']:.1f}s"
+    )
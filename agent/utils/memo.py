@@ -0,0 +1,92 @@
+import json
+import hashlib
+import weakref
+import threading
+from typing import Any, Dict, Optional
+from collections import OrderedDict
+
+from utils import logger
+from utils.cancel import check
+
+# id(截图) -> (弱引用, 内容哈希)，截图被释放时自动移除
+_frame_keys: Dict[int, tuple] = {}
+
+
+def frame_key(image) -> bytes:
+    """截图内容哈希，同一截图对象只计算一次"""
+    entry = _frame_keys.get(id(image))
+    if entry is not None and entry[0]() is image:
+        return entry[1]
+
+    key = hashlib.blake2b(memoryview(image).cast("B") if image.flags.c_contiguous else image.tobytes(), digest_size=16).digest()
+    try:
+        ref = weakref.ref(image, lambda _, image_id=id(image): _frame_keys.pop(image_id, None))
+    except TypeError:
+        return key
+    _frame_keys[id(image)] = (ref, key)
+    return key
+
+
+class RecognitionMemo:
+    """
+    识别结果缓存
+
+    以 (截图内容哈希, 节点名, 规范化后的 pipeline_override) 为键缓存 context.run_recognition 的结果，
+    同一画面上的重复识别直接返回缓存。按 LRU 淘汰，最多保存 capacity 条。
+    """
+
+    def __init__(self, capacity: int = 64):
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self._cache: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _override_key(pipeline_override: Optional[dict]) -> str:
+        return json.dumps(pipeline_override or {}, sort_keys=True, ensure_ascii=False, default=str)
+
+    def run_recognition(self, context, entry: str, image, pipeline_override: Optional[dict] = None):
+        """与 context.run_recognition 用法一致，命中缓存时不再识别；任务已停止时抛出 TaskCancelled"""
+        check(context)
+        key = (frame_key(image), entry, self._override_key(pipeline_override))
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return self._cache[key]
+            self.misses += 1
+
+        reco_detail = context.run_recognition(entry, image, pipeline_override=pipeline_override or {})
+
+        with self._lock:
+            self._cache[key] = reco_detail
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.capacity:
+                self._cache.popitem(last=False)
+        return reco_detail
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0, "size": len(self._cache)}
+
+    def log_stats(self, title: str = "识别缓存"):
+        stats = self.stats()
+        logger.debug(f"{title}: 命中 {stats['hits']} 次，未命中 {stats['misses']} 次，命中率 {stats['hit_rate']:.1%}")
+
+
+# 全局共享的识别缓存
+memo = RecognitionMemo()
+
+
+def run_recognition(context, entry: str, image, pipeline_override: Optional[dict] = None):
+    """使用全局识别缓存执行识别"""
+    return memo.run_recognition(context, entry, image, pipeline_override)
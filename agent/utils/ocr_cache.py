@@ -0,0 +1,134 @@
+import json
+import hashlib
+import threading
+from typing import Any, Dict, List, Optional, Sequence
+from collections import OrderedDict
+
+import numpy as np
+from utils import logger
+from utils.cancel import check
+
+# 与背景（ROI 亮度中位数）的亮度差超过该值视为文字像素
+FOREGROUND_DIFF = 64
+
+
+def text_mask(crop: np.ndarray) -> np.ndarray:
+    """
+    裁剪图的文字掩码（按位打包）
+
+    以绿色通道近似亮度、ROI 中位数为背景，与背景差异大的像素为文字，作为区域内容的感知哈希：
+    截图压缩噪声、轻微亮度变化不会改变掩码，文字内容变化则会有大量像素不同。
+    """
+    gray = (crop[:, :, 1] if crop.ndim == 3 else crop).astype(np.int16)
+    if gray.size == 0:
+        return np.zeros(0, np.uint8)
+    background = int(np.median(gray[::4, ::4]))
+    return np.packbits(np.abs(gray - background) > FOREGROUND_DIFF)
+
+
+class OcrCache:
+    """
+    缓慢变化文字区域的 OCR 结果缓存
+
+    以 (节点名, ROI, 规范化后的 pipeline_override, ROI 文字掩码的哈希) 为键缓存识别结果，
+    老师建议、得分、休息次数等多帧不变的区域在画面未变化时直接复用上次的识别结果，不必每帧 OCR。
+    与 RecognitionMemo 按整张截图哈希不同，这里只看 ROI 内的内容，画面其他部分变化不影响命中。
+
+    tolerance 为允许不同的文字像素数：为 0 时只有掩码完全一致才命中；调大可容忍动画、光效造成的零星差异，
+    但过大会把内容已变化（如「あと1回」变为「あと0回」，通常有上百个像素不同）的区域误判为未变化而读到旧结果。
+    按 LRU 淘汰，最多保存 capacity 条。
+    """
+
+    def __init__(self, capacity: int = 128, tolerance: int = 4):
+        self.capacity = capacity
+        self.tolerance = tolerance
+        self.hits = 0
+        self.misses = 0
+        self._cache: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _override_key(pipeline_override: Optional[dict]) -> str:
+        return json.dumps(pipeline_override or {}, sort_keys=True, ensure_ascii=False, default=str)
+
+    def _lookup(self, key: tuple, mask: np.ndarray):
+        """查找同一区域中文字掩码相差不超过 tolerance 个像素的条目，返回键或 None"""
+        if key in self._cache:
+            return key
+        if self.tolerance <= 0:
+            return None
+        best, best_distance = None, self.tolerance + 1
+        for cached, (cached_mask, _) in self._cache.items():
+            if cached[:-1] == key[:-1] and cached_mask.shape == mask.shape:
+                distance = int(np.unpackbits(cached_mask ^ mask).sum())
+                if distance < best_distance:
+                    best, best_distance = cached, distance
+        return best
+
+    def get(self, entry: str, image, roi: Sequence[int], override: Optional[dict] = None) -> tuple:
+        """
+        查询缓存
+
+        Returns:
+            (识别结果, 缓存键)：未命中时识别结果为 None，识别后将缓存键与结果传给 put 保存
+        """
+        x, y, w, h = roi
+        mask = text_mask(image[y : y + h, x : x + w])
+        key = (entry, tuple(roi), self._override_key(override), hashlib.blake2b(mask.tobytes(), digest_size=16).digest())
+        with self._lock:
+            cached = self._lookup(key, mask)
+            if cached is not None:
+                self._cache.move_to_end(cached)
+                self.hits += 1
+                return self._cache[cached][1], (key, mask)
+            self.misses += 1
+        return None, (key, mask)
+
+    def put(self, cache_key: tuple, reco_detail):
+        """保存识别结果，识别失败（None）不缓存，下次重新识别"""
+        if reco_detail is None:
+            return
+        key, mask = cache_key
+        with self._lock:
+            self._cache[key] = (mask, reco_detail)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.capacity:
+                self._cache.popitem(last=False)
+
+    def run_recognition(self, context, entry: str, image, roi: List[int], override: Optional[dict] = None):
+        """
+        对 ROI 执行识别，区域内容未变化时直接返回缓存
+
+        Args:
+            context: maa的Context类
+            entry: 识别节点
+            image: 截图
+            roi: 识别区域，同时是判断内容是否变化的区域
+            override: 额外覆盖的节点参数（不含 roi）
+        """
+        reco_detail, cache_key = self.get(entry, image, roi, override)
+        if reco_detail is None:
+            check(context)
+            reco_detail = context.run_recognition(entry, image, pipeline_override={entry: dict(override or {}, roi=list(roi))})
+            self.put(cache_key, reco_detail)
+        return reco_detail
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0, "size": len(self._cache)}
+
+    def log_stats(self, title: str = "OCR 缓存"):
+        stats = self.stats()
+        logger.debug(f"{title}: 命中 {stats['hits']} 次，未命中 {stats['misses']} 次，命中率 {stats['hit_rate']:.1%}")
+
+
+# 全局共享的 OCR 缓存
+ocr_cache = OcrCache()
@@ -0,0 +1,187 @@
+import json
+import time
+import threading
+from typing import Dict, List, Optional, Sequence
+from pathlib import Path
+from collections import defaultdict
+
+from utils import hooks, logger
+
+# 一次调用内的耗时分类
+CATEGORIES = ("sleep", "recognition", "run_task", "run_action", "controller")
+# 每个 custom action 在日志中最多列出的识别节点数
+TOP_NODES = 5
+
+
+def _category(span: hooks.Span) -> Optional[str]:
+    """Span 对应的耗时明细键，形如 recognition:ProduceRecognitionHud、controller:post_click"""
+    if span.kind == "sleep":
+        return "sleep"
+    if span.kind == "recognition":
+        return f"recognition:{span.name}"
+    if span.kind == "task":
+        return f"run_task:{span.name}"
+    if span.kind == "run_action":
+        return f"run_action:{span.name}"
+    if span.kind == "controller":
+        return f"controller:{span.name}"
+    return None
+
+
+class Budget:
+    """一组 custom 调用的耗时分布"""
+
+    def __init__(self):
+        self.count = 0
+        self.wall = 0.0
+        self.details: Dict[str, float] = defaultdict(float)
+        self.calls: Dict[str, int] = defaultdict(int)
+
+    def add(self, key: str, duration: float):
+        self.details[key] += duration
+        self.calls[key] += 1
+
+    def merge(self, other: "Budget"):
+        self.count += other.count
+        self.wall += other.wall
+        for key, duration in other.details.items():
+            self.details[key] += duration
+        for key, count in other.calls.items():
+            self.calls[key] += count
+
+    def categories(self) -> Dict[str, float]:
+        """按大类汇总，other 为 wall 中未被插桩覆盖的部分（自身计算、图像处理等）"""
+        totals = {category: 0.0 for category in CATEGORIES}
+        for key, duration in self.details.items():
+            totals[key.split(":", 1)[0]] += duration
+        # 其他线程中的调用耗时按各自时长累加，可能超过 wall
+        totals["other"] = max(self.wall - sum(totals.values()), 0.0)
+        return totals
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "wall": round(self.wall, 4),
+            "categories": {key: round(value, 4) for key, value in self.categories().items()},
+            "details": {
+                key: {"time": round(self.details[key], 4), "calls": self.calls[key]}
+                for key in sorted(self.details, key=self.details.get, reverse=True)
+            },
+        }
+
+
+class Profiler(hooks.Listener):
+    """
+    custom 耗时分析
+
+    将每次 custom action / recognition 的耗时拆分到等待（sleep）、各节点的 run_recognition、
+    run_task / run_action 与控制器的 post_click / post_swipe / post_screencap 上。
+    任务结束时（以及任务切换、agent 退出时）在 path 下写出本次任务的汇总与逐回合明细；
+    turn_actions 中的 custom action 每执行一次视为进入新的回合（培育中每周的行动选择）。
+    """
+
+    def __init__(self, path: str = "debug/custom", turn_actions: Sequence[str] = ("ProduceChooseEventAuto", "ProduceChooseNIAEventAuto")):
+        self.path = Path(path)
+        self.turn_actions = set(turn_actions)
+        self._lock = threading.Lock()
+        self._open: Dict[str, Budget] = {}
+        self._reset(None, None)
+
+    def _reset(self, task_id: Optional[int], entry: Optional[str]):
+        self.task_id = task_id
+        self.entry = entry
+        self.started = time.strftime("%Y%m%d_%H%M%S")
+        self.actions: Dict[str, Budget] = defaultdict(Budget)
+        self.turns: List[dict] = []
+
+    def on_begin(self, span: hooks.Span):
+        task_id, entry = span.args.get("task_id"), span.args.get("entry")
+        with self._lock:
+            if task_id != self.task_id:
+                if self.actions:
+                    self._flush()
+                self._reset(task_id, entry)
+            if span.name in self.turn_actions and self.actions:
+                # 每回合覆盖写出一次，agent 异常退出时也能保留已有的统计
+                self._flush(log=False)
+            if span.name in self.turn_actions or not self.turns:
+                self.turns.append({"index": len(self.turns), "start": time.strftime("%H:%M:%S"), "budget": Budget(), "actions": []})
+            self._open[span.name] = Budget()
+
+    def on_span(self, span: hooks.Span):
+        with self._lock:
+            if span.kind in ("action", "custom_recognition"):
+                budget = self._open.pop(span.name, None)
+                if budget is None:
+                    return
+                budget.count = 1
+                budget.wall = span.duration
+                self.actions[span.name].merge(budget)
+                turn = self.turns[-1]
+                turn["budget"].merge(budget)
+                turn["actions"].append(span.name)
+                return
+
+            key = _category(span)
+            budget = self._open.get(span.owner) if span.owner else None
+            if key is not None and budget is not None:
+                budget.add(key, span.duration)
+
+    def summary(self) -> dict:
+        total = Budget()
+        for budget in self.actions.values():
+            total.merge(budget)
+        return {
+            "task_id": self.task_id,
+            "entry": self.entry,
+            "started": self.started,
+            "total": total.to_dict(),
+            "actions": {name: budget.to_dict() for name, budget in sorted(self.actions.items(), key=lambda item: item[1].wall, reverse=True)},
+            "turns": [
+                {"index": turn["index"], "start": turn["start"], "actions": turn["actions"], **turn["budget"].to_dict()} for turn in self.turns
+            ],
+        }
+
+    def _flush(self, log: bool = True):
+        summary = self.summary()
+        self.path.mkdir(parents=True, exist_ok=True)
+        file = self.path / f"profile_{self.started}_{summary['entry'] or 'task'}_{summary['task_id']}.json"
+        with open(file, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=4)
+        if not log:
+            return
+
+        total = summary["total"]
+        categories = ", ".join(f"{key} {value:.1f}s" for key, value in total["categories"].items())
+        logger.info(
+            f"耗时分析 {summary['entry']}: custom 共 {total['count']} 次 {total['wall']:.1f}s（{categories}），共 {len(self.turns)} 回合"
+        )
+        for name, action in summary["actions"].items():
+            nodes = [
+                f"{key.split(':', 1)[1]} {value['time']:.2f}s/{value['calls']}次"
+                for key, value in action["details"].items()
+                if key.startswith("recognition:")
+            ]
+            logger.debug(
+                f"  {name}: {action['count']} 次 {action['wall']:.2f}s, sleep {action['categories']['sleep']:.2f}s, "
+                f"控制器 {action['categories']['controller']:.2f}s, 识别 {action['categories']['recognition']:.2f}s: {', '.join(nodes[:TOP_NODES])}"
+            )
+        logger.debug(f"耗时分析已保存: {file}")
+
+    def on_task_end(self, task_id: int, entry: str):
+        """任务结束时立即写出其统计，不必等到下一个任务开始"""
+        with self._lock:
+            if task_id != self.task_id:
+                return
+            if self.actions:
+                self._flush()
+            self._reset(None, None)
+
+    def flush(self):
+        """立即写出当前任务的统计"""
+        with self._lock:
+            if self.actions:
+                self._flush()
+
+    def close(self):
+        self.flush()
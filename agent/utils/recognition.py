@@ -0,0 +1,57 @@
+from typing import Any, Dict, List, Optional, Sequence, NamedTuple
+
+from utils import logger
+from utils.cancel import check
+
+
+class RecognitionSpec(NamedTuple):
+    """
+    一次 ROI 识别的描述
+
+    Attributes:
+        name: 结果字典中的键
+        node: 识别使用的 pipeline 节点
+        roi: 识别区域，为 None 时使用节点自身的 roi
+        override: 额外覆盖的节点参数（如 recognition / expected / order_by）
+    """
+
+    name: str
+    node: str
+    roi: Optional[List[int]] = None
+    override: Optional[dict] = None
+
+    def pipeline_override(self) -> dict:
+        param = dict(self.override or {})
+        if self.roi is not None:
+            param["roi"] = self.roi
+        return {self.node: param} if param else {}
+
+
+def _run_one(context, image, spec: RecognitionSpec):
+    try:
+        return context.run_recognition(spec.node, image, pipeline_override=spec.pipeline_override())
+    except Exception as e:
+        logger.warning(f"识别 {spec.name} 失败: {e}")
+        return None
+
+
+def run_recognitions(context, image, specs: Sequence[RecognitionSpec]) -> Dict[str, Any]:
+    """
+    在同一张截图上依次执行多个相互独立的识别
+
+    各识别之间没有依赖时使用，例如同一画面中多个 ROI 的 OCR。识别逐个在当前线程执行
+    （AgentServer 的 Context 未确认可被多个线程同时调用），单个识别失败时记录警告，不影响其余识别。
+
+    Args:
+        context: maa的Context类
+        image: 截图
+        specs: 识别描述列表，name 不可重复
+
+    Returns:
+        dict: {name: RecognitionDetail}，识别失败时对应值为 None
+    """
+    results = {}
+    for spec in specs:
+        check(context)
+        results[spec.name] = _run_one(context, image, spec)
+    return results
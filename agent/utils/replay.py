@@ -0,0 +1,438 @@
+import json
+import time
+import bisect
+import threading
+import dataclasses
+from enum import Enum
+from types import SimpleNamespace
+from typing import Any, Dict, List, Tuple, Optional
+from pathlib import Path
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+from utils import hooks, logger
+from maa.define import Rect
+from utils.memo import frame_key
+
+EVENTS_FILE = "events.jsonl"
+FRAMES_DIR = "frames"
+# 识别结果中不保存的字段（截图、绘制结果等大对象）
+SKIPPED_FIELDS = ("raw_image", "draws", "raw_detail")
+# 回放超过录制结束时刻多久后置 stopping，让 custom action 自行退出（秒）
+END_GRACE = 3.0
+# 置 stopping 后仍未退出，超过该时长直接中止回放（秒）
+HARD_LIMIT = 60.0
+
+
+class ReplayFinished(Exception):
+    """回放超出录制范围"""
+
+
+def _jsonable(value: Any) -> Any:
+    """将识别结果等对象转为可 JSON 序列化的结构"""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, Enum):
+        return _jsonable(value.value)
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return None
+    if isinstance(value, Rect):
+        return list(value)
+    if dataclasses.is_dataclass(value):
+        return {field.name: _jsonable(getattr(value, field.name)) for field in dataclasses.fields(value) if field.name not in SKIPPED_FIELDS}
+    if isinstance(value, dict):
+        return {str(key): _jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(item) for item in value]
+    return str(value)
+
+
+def _restore(value: Any) -> Any:
+    """将录制的识别结果还原为可按属性访问的对象，box 还原为 Rect"""
+    if isinstance(value, dict):
+        fields = {key: _restore(item) for key, item in value.items()}
+        box = fields.get("box")
+        if isinstance(box, list) and len(box) == 4:
+            fields["box"] = Rect(*box)
+        return SimpleNamespace(**fields)
+    if isinstance(value, list):
+        return [_restore(item) for item in value]
+    return value
+
+
+def _override_key(pipeline_override: Optional[dict]) -> str:
+    return json.dumps(pipeline_override or {}, sort_keys=True, ensure_ascii=False, default=str)
+
+
+class SessionRecorder(hooks.Listener):
+    """
+    会话录制
+
+    作为插桩监听器记录真实运行中的截图序列与识别结果，供离线回放：
+    - frames/<序号>.png: 每张首次出现的截图（内容相同的截图只保存一次）
+    - events.jsonl: 截图、识别、控制器操作、run_task/run_action、custom 执行的时间线，时间为相对录制开始的秒数
+    """
+
+    def __init__(self, root: str = "debug/replay"):
+        self.path = Path(root) / time.strftime("%Y%m%d_%H%M%S")
+        (self.path / FRAMES_DIR).mkdir(parents=True, exist_ok=True)
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self._frames: Dict[bytes, int] = {}
+        self._file = open(self.path / EVENTS_FILE, "a", encoding="utf-8")
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="replay-recorder")
+        logger.info(f"录制会话: {self.path}")
+
+    def _time(self, t: float) -> float:
+        return round(t - self._origin, 4)
+
+    def _write(self, event: dict):
+        line = json.dumps(event, ensure_ascii=False, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def _frame(self, image, t: float) -> Optional[int]:
+        """返回截图序号，首次出现时保存截图"""
+        if not isinstance(image, np.ndarray):
+            return None
+        key = frame_key(image)
+        with self._lock:
+            index = self._frames.get(key)
+            if index is not None:
+                return index
+            index = self._frames[key] = len(self._frames)
+        self._writer.submit(self._save_frame, index, image)
+        self._write({"type": "frame", "index": index, "t": self._time(t), "key": key.hex()})
+        return index
+
+    def _save_frame(self, index: int, image: np.ndarray):
+        # MaaFramework 的截图为 BGR
+        Image.fromarray(np.ascontiguousarray(image[:, :, 2::-1])).save(self.path / FRAMES_DIR / f"{index:06d}.png")
+
+    def on_begin(self, span: hooks.Span):
+        frame = self._frame(span.image, span.start)
+        self._write({"type": "begin", "kind": span.kind, "name": span.name, "t": self._time(span.start), "frame": frame, **span.args})
+
+    def on_span(self, span: hooks.Span):
+        event = {"type": span.kind, "name": span.name, "owner": span.owner, "t": self._time(span.start), "duration": round(span.duration, 4)}
+        if span.kind == "controller":
+            if span.name == "post_screencap":
+                event["frame"] = self._frame(span.result, span.start)
+            else:
+                event["args"] = _jsonable(span.args.get("args", []))
+        elif span.kind == "recognition":
+            event["frame"] = self._frame(span.image, span.start)
+            event["override"] = _jsonable(span.args.get("override"))
+            event["result"] = _jsonable(span.result)
+        elif span.kind in ("task", "run_action"):
+            event["override"] = _jsonable(span.args.get("override"))
+        elif span.kind in ("action", "custom_recognition"):
+            event["result"] = _jsonable(span.result)
+        elif span.kind == "sleep":
+            event["seconds"] = span.args.get("seconds")
+        self._write(event)
+
+    def close(self):
+        self._writer.shutdown(wait=True)
+        with self._lock:
+            self._file.close()
+
+
+class Invocation(SimpleNamespace):
+    """录制中的一次 custom action / recognition 调用"""
+
+    kind: str
+    name: str
+    start: float
+    end: float
+    frame: Optional[int]
+    node: Optional[str]
+    param: Optional[str]
+
+
+class ReplaySession:
+    """读取 SessionRecorder 录制的会话"""
+
+    def __init__(self, path, cache_size: int = 16):
+        self.path = Path(path)
+        self.cache_size = cache_size
+        self._images: OrderedDict = OrderedDict()
+        self._keys: Dict[bytes, int] = {}
+        self._timeline: List[Tuple[float, int]] = []
+        self._recognitions: Dict[tuple, Any] = {}
+        self._recognitions_by_node: Dict[tuple, List[Tuple[int, Any]]] = defaultdict(list)
+        self._durations: Dict[str, List[float]] = defaultdict(list)
+        self.invocations: List[Invocation] = []
+        self._load()
+
+    def _load(self):
+        begins: Dict[tuple, dict] = {}
+        with open(self.path / EVENTS_FILE, "r", encoding="utf-8") as f:
+            for line in f:
+                event = json.loads(line)
+                kind = event["type"]
+                if kind == "begin":
+                    begins[(event["name"], event["t"])] = event
+                    if event.get("frame") is not None:
+                        self._timeline.append((event["t"], event["frame"]))
+                elif kind == "controller":
+                    self._durations[event["name"]].append(event["duration"])
+                    if event["name"] == "post_screencap" and event.get("frame") is not None:
+                        self._timeline.append((event["t"], event["frame"]))
+                elif kind == "recognition" and event.get("frame") is not None:
+                    key = (event["frame"], event["name"], _override_key(event.get("override")))
+                    self._recognitions.setdefault(key, event["result"])
+                    self._recognitions_by_node[key[1:]].append((event["frame"], event["result"]))
+                elif kind in ("task", "run_action"):
+                    self._durations[f"{kind}:{event['name']}"].append(event["duration"])
+                elif kind in ("action", "custom_recognition"):
+                    begin = begins.pop((event["name"], event["t"]), {})
+                    self.invocations.append(
+                        Invocation(
+                            kind=kind,
+                            name=event["name"],
+                            start=event["t"],
+                            end=event["t"] + event["duration"],
+                            frame=begin.get("frame"),
+                            node=begin.get("node"),
+                            param=begin.get("param"),
+                        )
+                    )
+        self._timeline.sort()
+        self._times = [t for t, _ in self._timeline]
+        self.invocations.sort(key=lambda invocation: invocation.start)
+
+    @property
+    def end(self) -> float:
+        return self._times[-1] if self._times else 0.0
+
+    def latency(self, name: str) -> float:
+        """录制中某类操作的平均耗时，用于推进回放时钟"""
+        durations = self._durations.get(name)
+        return sum(durations) / len(durations) if durations else 0.0
+
+    def image(self, index: int) -> np.ndarray:
+        image = self._images.get(index)
+        if image is None:
+            with Image.open(self.path / FRAMES_DIR / f"{index:06d}.png") as img:
+                image = np.ascontiguousarray(np.asarray(img.convert("RGB"))[:, :, ::-1])
+            self._keys[frame_key(image)] = index
+            self._images[index] = image
+            while len(self._images) > self.cache_size:
+                self._images.popitem(last=False)
+        self._images.move_to_end(index)
+        return image
+
+    def frame_at(self, t: float) -> Optional[int]:
+        """t 时刻屏幕上的截图序号"""
+        if not self._timeline:
+            return None
+        position = bisect.bisect_right(self._times, t) - 1
+        return self._timeline[max(position, 0)][1]
+
+    def frame_of(self, image) -> Optional[int]:
+        return self._keys.get(frame_key(image)) if isinstance(image, np.ndarray) else None
+
+    def recognition(self, frame: Optional[int], node: str, pipeline_override: Optional[dict]) -> Tuple[Any, bool]:
+        """
+        查找录制的识别结果
+
+        Returns:
+            (结果, 是否精确匹配)：该截图上没有相同的识别时，退而使用之前最近一张截图上的相同识别
+        """
+        override = _override_key(pipeline_override)
+        key = (frame, node, override)
+        if key in self._recognitions:
+            return self._recognitions[key], True
+        candidates = self._recognitions_by_node.get((node, override), [])
+        earlier = [result for index, result in candidates if frame is not None and index <= frame]
+        if earlier:
+            return earlier[-1], False
+        return None, False
+
+
+class ReplayClock:
+    """
+    回放用虚拟时钟
+
+    仓库内的等待（hooks.sleep）不再真正等待，只推进时钟；time.perf_counter / time.time / time.monotonic
+    返回真实流逝的时间加上累计的虚拟等待，custom action 中基于时间的超时判断因此保持一致。
+    """
+
+    def __init__(self):
+        self._perf_counter = time.perf_counter
+        self._time = time.time
+        self._monotonic = time.monotonic
+        self.offset = 0.0
+        self.slept = 0.0
+
+    def perf_counter(self) -> float:
+        return self._perf_counter() + self.offset
+
+    def time(self) -> float:
+        return self._time() + self.offset
+
+    def monotonic(self) -> float:
+        return self._monotonic() + self.offset
+
+    def sleep(self, seconds: float):
+        if seconds > 0:
+            self.offset += seconds
+            self.slept += seconds
+
+    def advance(self, seconds: float):
+        """模拟控制器操作等耗时"""
+        if seconds > 0:
+            self.offset += seconds
+
+    def install(self):
+        """接管 time 模块的计时函数与 hooks.sleep"""
+        time.perf_counter = self.perf_counter
+        time.time = self.time
+        time.monotonic = self.monotonic
+        hooks.set_sleep(self.sleep)
+
+    def uninstall(self):
+        time.perf_counter = self._perf_counter
+        time.time = self._time
+        time.monotonic = self._monotonic
+        hooks.set_sleep(None)
+
+
+class ReplayJob:
+    def __init__(self, result: Any = True):
+        self._result = result
+
+    @property
+    def done(self) -> bool:
+        return True
+
+    @property
+    def succeeded(self) -> bool:
+        return True
+
+    def wait(self):
+        return self
+
+    def get(self):
+        return self._result
+
+
+class ReplayController:
+    """
+    回放控制器
+
+    按虚拟时钟返回录制中该时刻的截图，点击、滑动等操作只记录不执行。
+    超过录制结束时刻 END_GRACE 秒后置 stopping，再超过 HARD_LIMIT 秒抛出 ReplayFinished。
+    """
+
+    def __init__(self, session: ReplaySession, clock: ReplayClock, start: float = 0.0, end: Optional[float] = None):
+        self.session = session
+        self.clock = clock
+        self.start = start
+        self.end = session.end if end is None else end
+        self.stopping = False
+        self.operations: List[dict] = []
+        self.screencaps = 0
+        self.cached_image = None
+        self._origin = clock.perf_counter()
+
+    def now(self) -> float:
+        """当前对应的录制时刻"""
+        return self.start + self.clock.perf_counter() - self._origin
+
+    def post_screencap(self) -> ReplayJob:
+        self.clock.advance(self.session.latency("post_screencap"))
+        t = self.now()
+        if t > self.end + END_GRACE:
+            self.stopping = True
+        if t > self.end + END_GRACE + HARD_LIMIT:
+            raise ReplayFinished(f"回放超出录制范围 {t:.1f}s")
+        frame = self.session.frame_at(t)
+        self.cached_image = self.session.image(frame) if frame is not None else None
+        self.screencaps += 1
+        return ReplayJob(self.cached_image)
+
+    def _operate(self, name: str, *args, **kwargs) -> ReplayJob:
+        self.operations.append({"name": name, "t": round(self.now(), 3), "args": _jsonable(list(args))})
+        self.clock.advance(self.session.latency(name))
+        return ReplayJob(True)
+
+    def __getattr__(self, name):
+        if name.startswith("post_"):
+            return lambda *args, **kwargs: self._operate(name, *args, **kwargs)
+        raise AttributeError(name)
+
+
+class ReplayTasker:
+    def __init__(self, controller: ReplayController):
+        self.controller = controller
+
+    @property
+    def stopping(self) -> bool:
+        return self.controller.stopping
+
+    @property
+    def running(self) -> bool:
+        return not self.controller.stopping
+
+
+class ReplayContext:
+    """
+    回放用 Context
+
+    run_recognition 返回录制中同一截图、同一节点与 override 的识别结果；
+    run_task / run_action 按录制中的平均耗时推进时钟；get_node_data 读取 pipeline 目录中的节点定义。
+    """
+
+    def __init__(self, session: ReplaySession, controller: ReplayController, pipeline_dir: str = "assets/resource/base/pipeline"):
+        self.session = session
+        self.tasker = ReplayTasker(controller)
+        self.unmatched: Dict[str, int] = defaultdict(int)
+        self.approximate: Dict[str, int] = defaultdict(int)
+        self._pipeline_dir = Path(pipeline_dir)
+        self._nodes: Optional[Dict[str, dict]] = None
+
+    def run_recognition(self, entry: str, image, pipeline_override: Optional[dict] = None):
+        result, exact = self.session.recognition(self.session.frame_of(image), entry, pipeline_override)
+        if result is None:
+            self.unmatched[entry] += 1
+            return None
+        if not exact:
+            self.approximate[entry] += 1
+        return _restore(result)
+
+    def run_task(self, entry: str, pipeline_override: Optional[dict] = None):
+        self.tasker.controller.clock.advance(self.session.latency(f"task:{entry}"))
+        return SimpleNamespace(entry=entry, nodes=[], status=None)
+
+    def run_action(self, entry: str, *args, **kwargs):
+        self.tasker.controller.clock.advance(self.session.latency(f"run_action:{entry}"))
+        return SimpleNamespace(name=entry, success=True)
+
+    def override_pipeline(self, pipeline_override: dict) -> bool:
+        for name, node in pipeline_override.items():
+            self._node_data().setdefault(name, {}).update(node)
+        return True
+
+    def _node_data(self) -> Dict[str, dict]:
+        if self._nodes is None:
+            self._nodes = {}
+            for file in sorted(self._pipeline_dir.rglob("*.json")):
+                try:
+                    with open(file, "r", encoding="utf-8") as f:
+                        self._nodes.update(json.load(f))
+                except Exception as e:
+                    logger.warning(f"读取 pipeline 失败 {file}: {e}")
+        return self._nodes
+
+    def get_node_data(self, name: str) -> Optional[dict]:
+        return self._node_data().get(name)
+
+    def clone(self):
+        return self
@@ -0,0 +1,187 @@
+import json
+import threading
+from typing import Dict, List, Optional, Sequence, NamedTuple
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+from utils import logger
+from utils.template import find_image
+
+# 场景模板目录（相对于 image 目录，按 IMAGE_DIRS 查找）：每个场景一个 <场景名>.png（BGRA 缩略图，alpha 为稳定像素掩码），
+# 阈值保存在 scenes.json
+SCENES_DIR = "scenes"
+THRESHOLDS_FILE = "scenes.json"
+# 缩略图采样步长（像素），720x1280 的截图缩为 45x80
+STRIDE = 16
+# 样本间标准差低于该值的像素视为场景的稳定部分（界面框架），其余（卡牌、文字等）不参与比较
+STABLE_STD = 12.0
+# 场景阈值 = 样本到均值的最大距离 * THRESHOLD_SCALE，且不低于 MIN_THRESHOLD（灰度级）
+THRESHOLD_SCALE = 1.5
+MIN_THRESHOLD = 8.0
+
+_classifier: Optional["SceneClassifier"] = None
+_classifier_loaded = False
+_classifier_lock = threading.Lock()
+
+
+def thumbnail(image: np.ndarray) -> np.ndarray:
+    """按 STRIDE 采样的缩略图（float32，BGR），720x1280 的截图约需 40μs"""
+    offset = STRIDE // 2
+    return image[offset::STRIDE, offset::STRIDE, :3].astype(np.float32)
+
+
+class SceneMatch(NamedTuple):
+    label: str
+    distance: float  # 稳定像素上的平均绝对差（灰度级）
+
+
+class SceneTemplate(NamedTuple):
+    label: str
+    mean: np.ndarray  # 样本缩略图均值
+    mask: np.ndarray  # 稳定像素
+    threshold: float
+
+    @classmethod
+    def from_samples(cls, label: str, thumbs: Sequence[np.ndarray]) -> "SceneTemplate":
+        """由同一场景的多张缩略图生成模板，只有一张样本时所有像素都视为稳定"""
+        stack = np.stack(thumbs)
+        mean = stack.mean(axis=0)
+        mask = stack.std(axis=0).max(axis=2) < STABLE_STD if len(thumbs) > 1 else np.ones(mean.shape[:2], bool)
+        template = cls(label, mean, mask, 0.0)
+        spread = max(template.distance(thumb) for thumb in thumbs)
+        return template._replace(threshold=max(spread * THRESHOLD_SCALE, MIN_THRESHOLD))
+
+    def distance(self, thumb: np.ndarray) -> float:
+        if thumb.shape != self.mean.shape or not self.mask.any():
+            return float("inf")
+        return float(np.abs(thumb[self.mask] - self.mean[self.mask]).mean())
+
+
+class SceneClassifier:
+    """
+    基于缩略图的场景分类
+
+    将截图按 STRIDE 采样为缩略图，与各场景模板在稳定像素（多张样本间几乎不变的界面框架）上比较平均绝对差，
+    距离最小且低于该场景阈值的即为当前场景，全部超出阈值时为未知场景。单次分类远低于 1 毫秒，
+    用于在调用模型、OCR 等较重的识别前排除明显不符的画面。
+    """
+
+    def __init__(self, templates: Sequence[SceneTemplate]):
+        self.templates = list(templates)
+        # 所有模板展平后叠成矩阵，一次计算全部场景的距离
+        self._shape = self.templates[0].mean.shape if self.templates else None
+        self._thresholds = np.array([template.threshold for template in self.templates], np.float32)
+        self._means = np.stack([template.mean.ravel() for template in self.templates]) if self.templates else None
+        weights = []
+        for template in self.templates:
+            mask = np.repeat(template.mask[:, :, None], 3, axis=2).ravel() if template.mean.shape == self._shape else None
+            weights.append(mask / mask.sum() if mask is not None and mask.any() else np.full(template.mean.size, np.nan))
+        self._weights = np.stack(weights).astype(np.float32) if weights else None
+
+    @property
+    def labels(self) -> List[str]:
+        return [template.label for template in self.templates]
+
+    @classmethod
+    def from_directory(cls, path) -> Optional["SceneClassifier"]:
+        """从模板目录加载，目录不存在或没有模板时返回 None"""
+        path = Path(path)
+        if not (path / THRESHOLDS_FILE).is_file():
+            return None
+        with open(path / THRESHOLDS_FILE, "r", encoding="utf-8") as f:
+            thresholds = json.load(f)
+        templates = []
+        for label, threshold in thresholds.items():
+            file = path / f"{label}.png"
+            if not file.is_file():
+                logger.warning(f"场景 {label} 缺少模板文件 {file}")
+                continue
+            with Image.open(file) as img:
+                bgra = np.asarray(img.convert("RGBA"))[:, :, [2, 1, 0, 3]]
+            templates.append(SceneTemplate(label, bgra[:, :, :3].astype(np.float32), bgra[:, :, 3] > 127, float(threshold)))
+        return cls(templates) if templates else None
+
+    def save(self, path):
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        for old in path.glob("*.png"):
+            old.unlink()
+        for template in self.templates:
+            bgra = np.dstack([template.mean.round().clip(0, 255), template.mask * 255]).astype(np.uint8)
+            Image.fromarray(bgra[:, :, [2, 1, 0, 3]], "RGBA").save(path / f"{template.label}.png")
+        with open(path / THRESHOLDS_FILE, "w", encoding="utf-8") as f:
+            json.dump({template.label: round(template.threshold, 2) for template in self.templates}, f, ensure_ascii=False, indent=4)
+
+    def _distances(self, image: np.ndarray) -> np.ndarray:
+        """各模板的距离，截图尺寸与模板不符（如横屏演出）时全部为 inf"""
+        thumb = thumbnail(image)
+        if self._means is None or thumb.shape != self._shape:
+            return np.full(len(self.templates), np.inf, np.float32)
+        distances = np.einsum("tn,tn->t", np.abs(self._means - thumb.ravel()), self._weights)
+        return np.nan_to_num(distances, nan=np.inf)
+
+    def distances(self, image: np.ndarray) -> Dict[str, float]:
+        return {template.label: float(distance) for template, distance in zip(self.templates, self._distances(image))}
+
+    def _matches(self, image: np.ndarray) -> List[SceneMatch]:
+        """距离低于阈值的场景，按距离从小到大排列"""
+        distances = self._distances(image)
+        hits = np.flatnonzero(distances <= self._thresholds)
+        return sorted((SceneMatch(self.templates[i].label, float(distances[i])) for i in hits), key=lambda match: match.distance)
+
+    def classify(self, image: np.ndarray) -> Optional[SceneMatch]:
+        """当前场景，不属于任何已知场景时返回 None"""
+        matches = self._matches(image)
+        return matches[0] if matches else None
+
+    def conflicting(self, image: np.ndarray, expected: str) -> Optional[SceneMatch]:
+        """画面符合另一个场景且不符合 expected 时返回该场景"""
+        matches = self._matches(image)
+        if not matches or any(match.label == expected for match in matches):
+            return None
+        return matches[0]
+
+
+def get_classifier() -> Optional[SceneClassifier]:
+    """获取场景分类器（首次使用时加载模板），没有模板时返回 None"""
+    global _classifier, _classifier_loaded
+    with _classifier_lock:
+        if not _classifier_loaded:
+            path = find_image(f"{SCENES_DIR}/{THRESHOLDS_FILE}")
+            _classifier = SceneClassifier.from_directory(Path(path).parent) if path else None
+            _classifier_loaded = True
+            if _classifier is None:
+                logger.debug("没有场景模板，不使用场景分类")
+            else:
+                logger.debug(f"已加载场景模板: {', '.join(_classifier.labels)}")
+        return _classifier
+
+
+def classify(image: np.ndarray) -> Optional[str]:
+    """当前场景名，没有模板或不属于任何已知场景时返回 None"""
+    classifier = get_classifier()
+    if classifier is None:
+        return None
+    match = classifier.classify(image)
+    return match.label if match else None
+
+
+def conflicting_scene(image: np.ndarray, expected: str) -> Optional[str]:
+    """
+    画面明确属于另一个已知场景时返回该场景名，用于跳过不可能命中的识别
+
+    只做排除、不做确认：没有模板、未知场景或画面也符合 expected 时都返回 None，调用方照常识别。
+
+    Args:
+        image: 截图
+        expected: 期望的场景名，须有由实机截图生成的同名模板
+    """
+    classifier = get_classifier()
+    if classifier is None:
+        return None
+    match = classifier.conflicting(image, expected)
+    if match is None:
+        return None
+    logger.debug(f"场景分类为 {match.label}（{match.distance:.1f}），跳过 {expected} 识别")
+    return match.label
@@ -0,0 +1,201 @@
+import os
+from typing import Dict, List, Optional, NamedTuple
+
+import numpy as np
+from PIL import Image
+
+# 模板图片目录（安装目录 / 源码目录）
+IMAGE_DIRS = ["resource/base/image", "assets/resource/base/image"]
+
+_template_cache: Dict[tuple, tuple] = {}
+
+
+class TemplateHit(NamedTuple):
+    name: str
+    score: float
+    box: List[int]
+
+
+def find_image(path: str) -> Optional[str]:
+    """在资源目录中查找模板图片路径"""
+    for image_dir in IMAGE_DIRS:
+        full_path = os.path.join(image_dir, path)
+        if os.path.exists(full_path):
+            return full_path
+    return None
+
+
+def load_template(path: str, green_mask: bool = False) -> tuple:
+    """
+    加载模板图片
+
+    Args:
+        path: 相对于 image 目录的模板路径，与 pipeline 中 template 字段写法一致
+        green_mask: 是否将纯绿色 (0, 255, 0) 像素视为掩码
+
+    Returns:
+        (template, mask): BGR 格式的 float64 模板与掩码（无掩码时为 None）
+    """
+    key = (path, green_mask)
+    if key in _template_cache:
+        return _template_cache[key]
+
+    full_path = find_image(path)
+    if full_path is None:
+        raise FileNotFoundError(f"模板不存在: {path}")
+
+    with Image.open(full_path) as img:
+        template = np.asarray(img.convert("RGB"))[:, :, ::-1].astype(np.float64)
+
+    mask = None
+    if green_mask:
+        green = (template[:, :, 0] == 0) & (template[:, :, 1] == 255) & (template[:, :, 2] == 0)
+        if green.any():
+            mask = (~green).astype(np.float64)
+
+    _template_cache[key] = (template, mask)
+    return template, mask
+
+
+def _integral(array: np.ndarray) -> np.ndarray:
+    """计算积分图，首行首列补零"""
+    integral = np.zeros((array.shape[0] + 1, array.shape[1] + 1) + array.shape[2:], dtype=np.float64)
+    np.cumsum(array, axis=0, out=integral[1:, 1:])
+    np.cumsum(integral[1:, 1:], axis=1, out=integral[1:, 1:])
+    return integral
+
+
+def _window_sum(integral: np.ndarray, h: int, w: int) -> np.ndarray:
+    """由积分图计算所有 h*w 窗口内的和，返回 (H-h+1, W-w+1, ...) 数组"""
+    return integral[h:, w:] - integral[:-h, w:] - integral[h:, :-w] + integral[:-h, :-w]
+
+
+class TemplateScan:
+    """一次扫描的结果，保存各模板在 ROI 内的得分图"""
+
+    def __init__(self, roi: List[int], scores: Dict[str, np.ndarray], sizes: Dict[str, tuple], threshold: float):
+        self.roi = roi
+        self.threshold = threshold
+        self._scores = scores
+        self._sizes = sizes
+
+    def best(self, name: str, roi: Optional[List[int]] = None, threshold: Optional[float] = None) -> Optional[TemplateHit]:
+        """
+        获取模板的最佳匹配
+
+        Args:
+            name: 模板名称
+            roi: 进一步限定匹配范围（绝对坐标），模板需完整落在该范围内
+            threshold: 覆盖默认阈值
+
+        Returns:
+            TemplateHit: 得分达到阈值时返回，否则返回 None
+        """
+        score_map = self._scores.get(name)
+        if score_map is None:
+            return None
+        h, w = self._sizes[name]
+        x0 = y0 = 0
+        if roi is not None:
+            x0 = max(roi[0] - self.roi[0], 0)
+            y0 = max(roi[1] - self.roi[1], 0)
+            x1 = min(roi[0] + roi[2] - w - self.roi[0], score_map.shape[1] - 1)
+            y1 = min(roi[1] + roi[3] - h - self.roi[1], score_map.shape[0] - 1)
+            if x1 < x0 or y1 < y0:
+                return None
+            score_map = score_map[y0 : y1 + 1, x0 : x1 + 1]
+
+        y, x = np.unravel_index(np.argmax(score_map), score_map.shape)
+        score = float(score_map[y, x])
+        if score < (self.threshold if threshold is None else threshold):
+            return None
+        return TemplateHit(name, score, [int(self.roi[0] + x0 + x), int(self.roi[1] + y0 + y), w, h])
+
+
+class TemplateMatcher:
+    """
+    多模板一次性匹配
+
+    模板只在构造时加载一次；每次 scan 只裁剪一次 ROI、对其做一次 FFT，
+    所有模板共用该频谱完成归一化相关系数 (TM_CCOEFF_NORMED) 计算。
+    """
+
+    def __init__(self, templates: Dict[str, str], roi: List[int], threshold: float = 0.7, green_mask: bool = False):
+        self.roi = list(roi)
+        self.threshold = threshold
+        self._templates = {name: load_template(path, green_mask) for name, path in templates.items()}
+        self._spectra: Dict[tuple, tuple] = {}
+
+    def _crop(self, image: np.ndarray, roi: List[int]) -> tuple:
+        x, y, w, h = roi
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + w, image.shape[1]), min(y + h, image.shape[0])
+        return [x0, y0, max(x1 - x0, 0), max(y1 - y0, 0)], image[y0:y1, x0:x1, :3].astype(np.float64)
+
+    def _template_spectrum(self, name: str, shape: tuple) -> tuple:
+        """计算模板在当前裁剪尺寸下的频谱，按尺寸缓存"""
+        key = (name, shape)
+        if key not in self._spectra:
+            template, mask = self._templates[name]
+            weight = np.ones(template.shape[:2]) if mask is None else mask
+            count = weight.sum()
+            mean = (template * weight[:, :, None]).sum(axis=(0, 1)) / count
+            centered = (template - mean) * weight[:, :, None]
+            norm = (centered**2).sum()
+            spectrum = np.fft.rfft2(centered, s=shape, axes=(0, 1))
+            mask_spectrum = None if mask is None else np.fft.rfft2(mask, s=shape)
+            self._spectra[key] = (spectrum, mask_spectrum, count, norm)
+        return self._spectra[key]
+
+    def scan(self, image: np.ndarray, roi: Optional[List[int]] = None) -> TemplateScan:
+        """
+        对截图执行一次扫描，返回所有模板的得分图
+
+        Args:
+            image: 截图
+            roi: 本次扫描的范围，默认为构造时的 roi；范围随画面变化时模板频谱按尺寸缓存
+        """
+        roi, crop = self._crop(image, self.roi if roi is None else roi)
+        shape = crop.shape[:2]
+        scores: Dict[str, np.ndarray] = {}
+        sizes: Dict[str, tuple] = {}
+        if crop.size == 0:
+            return TemplateScan(roi, scores, sizes, self.threshold)
+
+        image_spectrum = np.fft.rfft2(crop, axes=(0, 1))
+        square_spectrum = None
+        integrals = None
+        window_stats: Dict[tuple, np.ndarray] = {}
+
+        for name, (template, mask) in self._templates.items():
+            h, w = template.shape[:2]
+            if h > shape[0] or w > shape[1]:
+                continue
+            spectrum, mask_spectrum, count, norm = self._template_spectrum(name, shape)
+            corr = np.fft.irfft2(np.einsum("ijk,ijk->ij", image_spectrum, np.conj(spectrum)), s=shape)[: shape[0] - h + 1, : shape[1] - w + 1]
+
+            if mask is None:
+                # 无掩码：窗口均值/方差用积分图计算，同尺寸模板间共享
+                if integrals is None:
+                    integrals = (_integral(crop), _integral((crop**2).sum(axis=2)))
+                if (h, w) not in window_stats:
+                    s1 = _window_sum(integrals[0], h, w)
+                    s2 = _window_sum(integrals[1], h, w)
+                    window_stats[(h, w)] = s2 - (s1**2).sum(axis=2) / count
+                variance = window_stats[(h, w)]
+            else:
+                if square_spectrum is None:
+                    square_spectrum = np.fft.rfft2(crop**2, axes=(0, 1))
+                conj_mask = np.conj(mask_spectrum)[:, :, None]
+                s1 = np.fft.irfft2(image_spectrum * conj_mask, s=shape, axes=(0, 1))[: shape[0] - h + 1, : shape[1] - w + 1]
+                s2 = np.fft.irfft2(square_spectrum * conj_mask, s=shape, axes=(0, 1))[: shape[0] - h + 1, : shape[1] - w + 1]
+                variance = (s2 - s1**2 / count).sum(axis=2)
+
+            denominator = np.sqrt(np.clip(variance, 0, None) * norm)
+            score = np.zeros_like(corr)
+            valid = denominator > 1e-6
+            score[valid] = corr[valid] / denominator[valid]
+            scores[name] = np.clip(score, -1.0, 1.0)
+            sizes[name] = (h, w)
+
+        return TemplateScan(roi, scores, sizes, self.threshold)
@@ -0,0 +1,116 @@
+import os
+import json
+import time
+import threading
+from typing import List, Optional
+from pathlib import Path
+
+from utils import hooks, logger
+
+# 缓冲区超过该事件数时立即唤醒写出线程
+FLUSH_SIZE = 2000
+
+
+def _hit(result) -> Optional[bool]:
+    return getattr(result, "hit", None) if result is not None else None
+
+
+class Tracer(hooks.Listener):
+    """
+    Chrome Trace Event 时间线导出
+
+    为每次 custom action / recognition 执行、每次识别与控制器操作记录一个 Complete 事件（ph=X），
+    节点名、override 等作为 args。事件先缓存在内存中，由后台线程每隔 flush_interval 秒写出，
+    不阻塞 custom 的执行。输出文件可直接拖入 chrome://tracing 或 https://ui.perfetto.dev 查看。
+    """
+
+    def __init__(self, path: str = "debug/trace", flush_interval: float = 1.0):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.file = self.path / f"trace_{time.strftime('%Y%m%d_%H%M%S')}.json"
+        self.flush_interval = flush_interval
+        self._origin = time.perf_counter()
+        self._pid = os.getpid()
+        self._buffer: List[dict] = []
+        self._threads = set()
+        self._condition = threading.Condition()
+        self._running = True
+        self._written = 0
+        # JSON 数组格式，异常退出导致缺少结尾的 ] 时 chrome://tracing 与 Perfetto 仍可读取
+        with open(self.file, "w", encoding="utf-8") as f:
+            f.write("[\n")
+        self._thread = threading.Thread(target=self._loop, name="tracer", daemon=True)
+        self._thread.start()
+        logger.info(f"时间线追踪: {self.file}")
+
+    def _timestamp(self, t: float) -> float:
+        """perf_counter 时刻转为相对开始的微秒"""
+        return round((t - self._origin) * 1e6, 1)
+
+    def _append(self, event: dict):
+        with self._condition:
+            if event["tid"] not in self._threads:
+                self._threads.add(event["tid"])
+                name = threading.current_thread().name if event["tid"] == threading.get_ident() else str(event["tid"])
+                self._buffer.append({"name": "thread_name", "ph": "M", "pid": self._pid, "tid": event["tid"], "args": {"name": name}})
+            self._buffer.append(event)
+            if len(self._buffer) >= FLUSH_SIZE:
+                self._condition.notify()
+
+    def on_span(self, span: hooks.Span):
+        args = {key: value for key, value in span.args.items() if value is not None}
+        if span.owner and span.owner != span.name:
+            args["owner"] = span.owner
+        if span.kind == "recognition":
+            args["hit"] = _hit(span.result)
+            box = getattr(span.result, "box", None)
+            if box is not None:
+                args["box"] = list(box)
+        elif span.kind in ("action", "custom_recognition"):
+            args["result"] = span.result if isinstance(span.result, (bool, int, float, str, type(None))) else str(span.result)
+
+        self._append(
+            {
+                "name": span.name,
+                "cat": span.kind,
+                "ph": "X",
+                "ts": self._timestamp(span.start),
+                "dur": round(span.duration * 1e6, 1),
+                "pid": self._pid,
+                "tid": span.thread,
+                "args": args,
+            }
+        )
+
+    def _loop(self):
+        while True:
+            with self._condition:
+                if self._running:
+                    self._condition.wait(self.flush_interval)
+                running = self._running
+            self._flush()
+            if not running:
+                return
+
+    def _flush(self):
+        with self._condition:
+            events, self._buffer = self._buffer, []
+        if not events:
+            return
+        try:
+            lines = "".join(json.dumps(event, ensure_ascii=False, default=str) + ",\n" for event in events)
+            with open(self.file, "a", encoding="utf-8") as f:
+                f.write(lines)
+            self._written += len(events)
+        except Exception as e:
+            logger.warning(f"写出时间线失败: {e}")
+
+    def close(self):
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        self._thread.join(timeout=5)
+        self._flush()
+        with open(self.file, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"name": "process_name", "ph": "M", "pid": self._pid, "args": {"name": "MaaGakumasu agent"}}) + "\n]\n")
+        logger.info(f"时间线已保存: {self.file}，共 {self._written} 个事件")
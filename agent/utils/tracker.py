@@ -0,0 +1,108 @@
+from typing import List, Optional, Sequence
+
+
+def iou(a: Sequence[int], b: Sequence[int]) -> float:
+    """两个 [x, y, w, h] 框的交并比"""
+    x0, y0 = max(a[0], b[0]), max(a[1], b[1])
+    x1, y1 = min(a[0] + a[2], b[0] + b[2]), min(a[1] + a[3], b[1] + b[3])
+    inter = max(x1 - x0, 0) * max(y1 - y0, 0)
+    union = a[2] * a[3] + b[2] * b[3] - inter
+    return inter / union if union > 0 else 0.0
+
+
+class Track:
+    """单个目标的跨帧跟踪记录"""
+
+    def __init__(self, track_id: int, label: str, box: Sequence[int], score: float):
+        self.id = track_id
+        self.label = label
+        self._box = [float(v) for v in box]
+        self.score = score
+        self.hits = 1  # 累计命中帧数
+        self.misses = 0  # 连续丢失帧数
+
+    @property
+    def box(self) -> List[int]:
+        """平滑后的 [x, y, w, h]"""
+        return [round(v) for v in self._box]
+
+    def update(self, box: Sequence[int], score: float, smoothing: float):
+        self._box = [old * smoothing + new * (1 - smoothing) for old, new in zip(self._box, box)]
+        self.score = self.score * smoothing + score * (1 - smoothing)
+        self.hits += 1
+        self.misses = 0
+
+    def __repr__(self) -> str:
+        return f"Track({self.id}, {self.label}, box={self.box}, score={self.score:.2f}, hits={self.hits}, misses={self.misses})"
+
+
+class BoxTracker:
+    """
+    基于 IoU 的多帧目标跟踪
+
+    每帧将检测框与已有轨迹按标签、IoU 贪心匹配：
+    - 匹配成功的轨迹累计命中次数，框坐标与得分做指数平滑
+    - 未匹配的轨迹累计丢失次数，连续丢失超过 max_misses 帧才删除，用于平滑检测结果的闪烁
+    - 命中次数达到 confirm_frames 的轨迹视为已确认
+    """
+
+    def __init__(self, iou_threshold: float = 0.5, confirm_frames: int = 3, max_misses: int = 2, smoothing: float = 0.5):
+        self.iou_threshold = iou_threshold
+        self.confirm_frames = confirm_frames
+        self.max_misses = max_misses
+        self.smoothing = smoothing
+        self.tracks: List[Track] = []
+        self._next_id = 0
+
+    def reset(self):
+        self.tracks = []
+
+    def update(self, detections: Sequence[tuple]) -> List[Track]:
+        """
+        输入一帧的检测结果
+
+        Args:
+            detections: [(label, box, score), ...]，box 为 [x, y, w, h]
+
+        Returns:
+            当前存活的轨迹
+        """
+        pairs = []
+        for d, (label, box, _) in enumerate(detections):
+            for t, track in enumerate(self.tracks):
+                if track.label == label:
+                    overlap = iou(track.box, box)
+                    if overlap >= self.iou_threshold:
+                        pairs.append((overlap, d, t))
+
+        matched_detections, matched_tracks = set(), set()
+        for _, d, t in sorted(pairs, reverse=True):
+            if d in matched_detections or t in matched_tracks:
+                continue
+            matched_detections.add(d)
+            matched_tracks.add(t)
+            _, box, score = detections[d]
+            self.tracks[t].update(box, score, self.smoothing)
+
+        for t, track in enumerate(self.tracks):
+            if t not in matched_tracks:
+                track.misses += 1
+        self.tracks = [track for track in self.tracks if track.misses <= self.max_misses]
+
+        for d, (label, box, score) in enumerate(detections):
+            if d not in matched_detections:
+                self.tracks.append(Track(self._next_id, label, box, score))
+                self._next_id += 1
+        return self.tracks
+
+    def is_confirmed(self, track: Track) -> bool:
+        return track.hits >= self.confirm_frames
+
+    def confirmed(self, label: Optional[str] = None) -> List[Track]:
+        """已确认的轨迹（按得分从高到低）"""
+        tracks = [track for track in self.tracks if self.is_confirmed(track) and (label is None or track.label == label)]
+        return sorted(tracks, key=lambda track: track.score, reverse=True)
+
+    def alive(self, label: Optional[str] = None) -> List[Track]:
+        """存活的轨迹（含未确认、短暂丢失的轨迹）"""
+        return [track for track in self.tracks if label is None or track.label == label]
@@ -0,0 +1,80 @@
+import threading
+from typing import Any, Dict
+
+from utils import logger
+from utils.cancel import check
+
+# 由 tools/sync_variants.py 生成的 pipeline 文件（相对资源目录）
+VARIANTS_FILE = "pipeline/AgentVariants.json"
+
+# 节点名 -> 定义（v1 平铺格式：recognition 为识别类型，其余为识别参数）
+_variants: Dict[str, dict] = {}
+# 节点名 -> 是否已在资源中（每个进程只查询一次）
+_loaded: Dict[str, bool] = {}
+_loaded_lock = threading.Lock()
+
+
+def variant(name: str, recognition: str, **param) -> str:
+    """
+    声明一个识别变体节点
+
+    在模块加载时声明，定义写入生成的 pipeline 文件随资源加载；调用时只需通过 override 传入真正变化的参数（如 roi、template）。
+
+    Args:
+        name: 节点名，不可与 pipeline 中已有的节点重名
+        recognition: 识别类型，如 OCR / TemplateMatch
+        param: 固定不变的识别参数
+
+    Returns:
+        节点名，便于作为类属性保存
+    """
+    definition = {"recognition": recognition, **param}
+    if _variants.get(name, definition) != definition:
+        raise ValueError(f"变体节点 {name} 重复声明且定义不同")
+    _variants[name] = definition
+    return name
+
+
+def pipeline() -> Dict[str, dict]:
+    """所有变体节点的 pipeline 定义（与资源中其他 pipeline 相同的 v2 格式）"""
+    result = {}
+    for name, definition in sorted(_variants.items()):
+        param = {key: value for key, value in definition.items() if key != "recognition"}
+        result[name] = {"recognition": {"type": definition["recognition"], "param": param}}
+    return result
+
+
+def _is_loaded(context, name: str) -> bool:
+    with _loaded_lock:
+        if name not in _loaded:
+            _loaded[name] = context.get_node_data(name) is not None
+            if not _loaded[name]:
+                logger.warning(f"变体节点 {name} 不在资源中，将随每次调用传入完整定义，请运行 tools/sync_variants.py 重新生成 {VARIANTS_FILE}")
+        return _loaded[name]
+
+
+def override(context, name: str, **vary: Any) -> dict:
+    """
+    运行节点所需的 pipeline_override
+
+    变体节点已随资源加载时只包含与定义不同的参数；资源中缺少该节点（生成文件未更新）时退回为完整定义加变化参数。
+    未声明为变体的节点原样使用 vary。
+    """
+    definition = _variants.get(name)
+    if definition is not None:
+        if _is_loaded(context, name):
+            vary = {key: value for key, value in vary.items() if definition.get(key) != value}
+        else:
+            vary = dict(definition, **vary)
+    return {name: vary} if vary else {}
+
+
+def run_recognition(context, name: str, image, **vary: Any):
+    """
+    执行变体节点识别
+
+    Example:
+        run_recognition(context, cls.LOCK, image, roi=[x, y, 100, 100])
+    """
+    check(context)
+    return context.run_recognition(name, image, pipeline_override=override(context, name, **vary))
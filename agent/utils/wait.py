@@ -0,0 +1,136 @@
+import time
+from typing import List, Optional
+
+import numpy as np
+from utils.cancel import token
+
+# 缩略图采样步长：每 8 个像素取 1 个，720x1280 的截图缩为 90x160
+THUMBNAIL_STRIDE = 8
+# 缩略图平均灰度差低于该值视为画面未变化（0-255）
+DIFF_THRESHOLD = 1.5
+# 两次截图之间的最小间隔
+POLL_INTERVAL = 0.1
+
+
+def thumbnail(image: np.ndarray, roi: Optional[List[int]] = None) -> np.ndarray:
+    """将截图缩为低分辨率灰度图，用于快速比较画面变化"""
+    if roi is not None:
+        x, y, w, h = roi
+        image = image[y : y + h, x : x + w]
+    return image[::THUMBNAIL_STRIDE, ::THUMBNAIL_STRIDE, :3].mean(axis=2, dtype=np.float32)
+
+
+def frame_diff(a: np.ndarray, b: np.ndarray) -> float:
+    """两张缩略图的平均灰度差"""
+    if a.shape != b.shape:
+        return float("inf")
+    return float(np.abs(a - b).mean())
+
+
+def _screencap(context) -> np.ndarray:
+    return context.tasker.controller.post_screencap().wait().get()
+
+
+def _poll_sleep(context, start: float, deadline: float):
+    """保证两次截图之间至少间隔 POLL_INTERVAL，且不超过截止时间；任务停止时立即返回"""
+    remaining = min(POLL_INTERVAL - (time.perf_counter() - start), deadline - time.perf_counter())
+    if remaining > 0:
+        token(context).wait(remaining)
+
+
+def wait_until_changed(
+    context, reference: Optional[np.ndarray] = None, timeout: float = 1.0, roi: Optional[List[int]] = None
+) -> Optional[np.ndarray]:
+    """
+    等待画面发生变化
+
+    Args:
+        context: maa的Context类
+        reference: 参照截图，为 None 时以调用时的截图为参照
+        timeout: 最长等待时间（秒），超时后返回最后一张截图
+        roi: 只比较该区域
+
+    Returns:
+        最后一张截图；任务中止时返回 None
+    """
+    deadline = time.perf_counter() + timeout
+    image = reference if reference is not None else _screencap(context)
+    base = thumbnail(image, roi)
+    while time.perf_counter() < deadline:
+        if context.tasker.stopping:
+            return None
+        start = time.perf_counter()
+        image = _screencap(context)
+        if frame_diff(base, thumbnail(image, roi)) > DIFF_THRESHOLD:
+            break
+        _poll_sleep(context, start, deadline)
+    return image
+
+
+def wait_until_settled(
+    context,
+    timeout: float = 3.0,
+    stable_time: float = 0.3,
+    require_change: bool = False,
+    reference: Optional[np.ndarray] = None,
+    roi: Optional[List[int]] = None,
+) -> Optional[np.ndarray]:
+    """
+    等待画面静止，替代固定时长的 sleep
+
+    连续截图比较低分辨率缩略图，画面保持不变达到 stable_time 即返回，
+    最长等待 timeout（与原先的固定等待时长一致即可保证不会更慢）。
+
+    Args:
+        context: maa的Context类
+        timeout: 最长等待时间（秒）
+        stable_time: 画面保持不变多久视为静止（秒）
+        require_change: 是否要求画面先发生变化（点击后等待动画开始再结束）
+        reference: require_change 时的参照截图，为 None 时以调用时的截图为参照
+        roi: 只比较该区域
+
+    Returns:
+        画面静止后的截图（可直接用于后续识别）；超时返回最后一张截图；任务中止时返回 None
+    """
+    deadline = time.perf_counter() + timeout
+    image = reference if reference is not None else _screencap(context)
+    last = thumbnail(image, roi)
+    changed = not require_change
+    stable_since = time.perf_counter()
+
+    while time.perf_counter() < deadline:
+        if context.tasker.stopping:
+            return None
+        start = time.perf_counter()
+        image = _screencap(context)
+        current = thumbnail(image, roi)
+        if frame_diff(last, current) > DIFF_THRESHOLD:
+            changed = True
+            stable_since = time.perf_counter()
+        elif changed and time.perf_counter() - stable_since >= stable_time:
+            break
+        last = current
+        _poll_sleep(context, start, deadline)
+    return image
+
+
+class Backoff:
+    """
+    自适应轮询间隔
+
+    状态没有变化时逐步拉长间隔（最长 maximum），状态变化或执行了操作后恢复为 initial。
+    """
+
+    def __init__(self, initial: float = 0.2, maximum: float = 1.0, factor: float = 1.5):
+        self.initial = initial
+        self.maximum = maximum
+        self.factor = factor
+        self.delay = initial
+
+    def reset(self) -> float:
+        self.delay = self.initial
+        return self.delay
+
+    def next(self) -> float:
+        self.delay = min(self.delay * self.factor, self.maximum)
+        return self.delay
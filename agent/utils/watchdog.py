@@ -0,0 +1,255 @@
+import json
+import time
+import hashlib
+import threading
+from typing import Any, Dict, Callable, Hashable, Optional
+from pathlib import Path
+from datetime import datetime
+from collections import deque
+
+import numpy as np
+from PIL import Image
+from utils import logger
+from utils.cancel import TaskCancelled
+
+# 看门狗配置，由 main.py 在启动时根据 config/agent_config.json 设置
+DEFAULT_CONFIG = {
+    "enabled": True,  # 关闭后 tick 不做任何检查，也不记录指标
+    "stall": False,  # 是否检查画面不变与重复决策；卡住阈值尚未按实机数据校准，默认只检查时间与迭代次数预算
+    "path": "debug/watchdog",  # 诊断快照与指标的保存目录
+    "dump": True,  # 触发时是否保存诊断快照（截图与循环状态）
+}
+
+# 画面哈希的采样步长与量化级数：忽略压缩噪声与轻微亮度变化
+HASH_STRIDE = 8
+HASH_LEVELS = 16
+# 诊断快照中保留的最近决策数
+HISTORY_SIZE = 20
+
+_config: Dict[str, Any] = dict(DEFAULT_CONFIG)
+# 循环名 -> 指标
+_metrics: Dict[str, Dict[str, float]] = {}
+_metrics_lock = threading.Lock()
+
+
+class StallDetected(TaskCancelled):
+    """循环超出预算或没有进展，由 cancel.install() 安装的包装在 custom action / recognition 边界处捕获"""
+
+
+def configure(**config):
+    """更新看门狗配置，未知字段会被忽略"""
+    _config.update({key: value for key, value in config.items() if key in DEFAULT_CONFIG})
+
+
+def frame_hash(image: np.ndarray) -> bytes:
+    """截图的粗粒度哈希：降采样、量化后取哈希，画面内容变化时才会改变"""
+    sample = image[::HASH_STRIDE, ::HASH_STRIDE, :3] // (256 // HASH_LEVELS)
+    return hashlib.blake2b(np.ascontiguousarray(sample).tobytes(), digest_size=8).digest()
+
+
+def _record(name: str, **values: float):
+    if not _config["enabled"]:
+        return
+    with _metrics_lock:
+        metrics = _metrics.setdefault(
+            name, {"runs": 0, "run_seconds": 0.0, "stalls": 0, "escalations": 0, "aborts": 0, "stalled_seconds": 0.0, "longest_stall": 0.0}
+        )
+        for key, value in values.items():
+            if key == "longest_stall":
+                metrics[key] = max(metrics[key], value)
+            else:
+                metrics[key] += value
+
+
+def metrics() -> Dict[str, Dict[str, float]]:
+    """各循环的指标：运行次数与总时长、卡住次数、升级处理次数、中止次数、卡住总时长与最长一次"""
+    with _metrics_lock:
+        return {name: dict(values) for name, values in _metrics.items()}
+
+
+def write_metrics(path: Optional[str] = None) -> Optional[Path]:
+    """将指标写入 <path>/metrics.json，看门狗关闭或没有指标时不写"""
+    data = metrics()
+    if not _config["enabled"] or not data:
+        return None
+    output = Path(path or _config["path"]) / "metrics.json"
+    try:
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+    except OSError as e:
+        logger.warning(f"看门狗指标保存失败: {e}")
+        return None
+    return output
+
+
+def log_stats(title: str = "看门狗"):
+    for name, values in metrics().items():
+        logger.debug(
+            f"{title} {name}: 运行 {values['runs']} 次，卡住 {values['stalls']} 次（共 {values['stalled_seconds']:.1f}s，最长 {values['longest_stall']:.1f}s），"
+            f"升级处理 {values['escalations']} 次，中止 {values['aborts']} 次"
+        )
+
+
+class Watchdog:
+    """
+    循环看门狗
+
+    为没有上限的循环声明预算（总时长、迭代次数），每次迭代调用 tick() 检查：
+    - 超出总时长或迭代次数预算
+    - 画面哈希连续 stall_time 秒没有变化（配置 stall 开启时）
+    - 画面不变时连续 max_repeats 次做出相同的决策（如反复点击同一位置却没有效果，配置 stall 开启时）
+
+    触发时保存诊断快照并记录指标；提供 escalate 时先执行一次升级处理（如关闭弹窗）并重新计时，
+    再次触发或没有 escalate 时抛出 StallDetected 结束本次调用。
+
+    Example:
+        with Watchdog("ProduceCardsAuto", budget=900, stall_time=60) as watchdog:
+            while True:
+                ...
+                watchdog.tick(image, decision)
+
+        也可以不使用 with，在循环结束后调用 close() 记录运行时长。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        budget: Optional[float] = None,
+        max_iterations: Optional[int] = None,
+        stall_time: Optional[float] = None,
+        max_repeats: Optional[int] = None,
+        escalate: Optional[Callable[[], Any]] = None,
+    ):
+        """
+        Args:
+            name: 循环名，用于日志、快照目录与指标
+            budget: 总时长预算（秒），为 None 时不限制
+            max_iterations: 迭代次数预算，为 None 时不限制
+            stall_time: 画面多久不变视为卡住（秒），为 None 时不检查
+            max_repeats: 画面不变时相同决策连续出现多少次视为卡住，为 None 时不检查
+            escalate: 第一次卡住时的升级处理，为 None 时直接中止；超出预算时不升级
+        """
+        self.name = name
+        self.budget = budget
+        self.max_iterations = max_iterations
+        self.stall_time = stall_time
+        self.max_repeats = max_repeats
+        self.escalate = escalate
+        self.iterations = 0
+        self.start = time.perf_counter()
+        self._escalated = False
+        self._last_hash: Optional[bytes] = None
+        self._last_change = self.start
+        self._last_decision: Any = None
+        self._repeats = 0
+        self._history: deque = deque(maxlen=HISTORY_SIZE)
+        self._image = None
+        self._closed = False
+        _record(name, runs=1)
+
+    def __enter__(self) -> "Watchdog":
+        self.start = self._last_change = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def close(self):
+        """循环结束，记录本次运行的时长；中止时已记录，重复调用不会重复计入"""
+        if not self._closed:
+            self._closed = True
+            _record(self.name, run_seconds=self.elapsed)
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+    def tick(self, image: Optional[np.ndarray] = None, decision: Optional[Hashable] = None):
+        """
+        每次迭代调用一次
+
+        Args:
+            image: 本次迭代的截图，用于判断画面是否变化
+            decision: 本次迭代做出的决策（如点击的目标），用于判断是否反复做同一件事
+        """
+        if not _config["enabled"]:
+            return
+        now = time.perf_counter()
+        self.iterations += 1
+
+        if self.budget is not None and now - self.start > self.budget:
+            self._abort(f"超出时间预算 {self.budget:.0f}s")
+        if self.max_iterations is not None and self.iterations > self.max_iterations:
+            self._abort(f"超出迭代次数预算 {self.max_iterations}")
+
+        changed = False
+        if image is not None:
+            self._image = image
+            current = frame_hash(image)
+            if current != self._last_hash:
+                self._last_hash, self._last_change = current, now
+                changed = True
+            elif _config["stall"] and self.stall_time is not None and now - self._last_change > self.stall_time:
+                self._stall(f"画面 {now - self._last_change:.0f}s 没有变化", now - self._last_change)
+
+        if decision is not None:
+            self._history.append({"t": round(now - self.start, 3), "decision": repr(decision)})
+            # 画面变化说明上一次决策有效果，重新计数
+            self._repeats = self._repeats + 1 if decision == self._last_decision and not changed else 1
+            self._last_decision = decision
+            if _config["stall"] and self.max_repeats is not None and self._repeats >= self.max_repeats:
+                self._stall(f"连续 {self._repeats} 次做出相同决策 {decision!r}", now - self._last_change)
+
+    def _reset_stall(self):
+        self._last_hash = None
+        self._last_change = time.perf_counter()
+        self._last_decision = None
+        self._repeats = 0
+
+    def _stall(self, reason: str, duration: float):
+        _record(self.name, stalls=1, stalled_seconds=duration, longest_stall=duration)
+        self._dump(reason)
+        if self.escalate is not None and not self._escalated:
+            self._escalated = True
+            _record(self.name, escalations=1)
+            logger.warning(f"{self.name}: {reason}，尝试升级处理")
+            self.escalate()
+            self._reset_stall()
+            return
+        self._abort(reason, dumped=True)
+
+    def _abort(self, reason: str, dumped: bool = False):
+        if not dumped:
+            self._dump(reason)
+        _record(self.name, aborts=1)
+        self.close()
+        write_metrics()
+        logger.error(f"{self.name}: {reason}，中止本次执行")
+        raise StallDetected(f"{self.name}: {reason}")
+
+    def _dump(self, reason: str):
+        """保存诊断快照：最后一张截图与循环状态"""
+        if not _config["dump"]:
+            return
+        folder = Path(_config["path"]) / f"{datetime.now():%Y%m%d_%H%M%S_%f}_{self.name}"
+        snapshot = {
+            "name": self.name,
+            "reason": reason,
+            "elapsed": round(self.elapsed, 3),
+            "iterations": self.iterations,
+            "unchanged_for": round(time.perf_counter() - self._last_change, 3),
+            "repeats": self._repeats,
+            "escalated": self._escalated,
+            "history": list(self._history),
+            "metrics": metrics().get(self.name, {}),
+        }
+        try:
+            folder.mkdir(parents=True, exist_ok=True)
+            (folder / "snapshot.json").write_text(json.dumps(snapshot, ensure_ascii=False, indent=2), encoding="utf-8")
+            if self._image is not None:
+                Image.fromarray(np.ascontiguousarray(self._image[:, :, 2::-1])).save(folder / "frame.png")
+        except OSError as e:
+            logger.warning(f"看门狗快照保存失败: {e}")
+            return
+        logger.info(f"{self.name}: 诊断快照已保存到 {folder}")
@@ -0,0 +1,91 @@
+"""
+测试共用的假 tasker / 控制器 / Context，不需要模拟器与资源
+"""
+
+import os
+import sys
+import time
+from types import SimpleNamespace
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "agent"))
+os.chdir(ROOT)
+
+# 假控制器每次操作的耗时（秒）
+CONTROLLER_LATENCY = 0.005
+# 假识别的耗时（秒）
+RECOGNITION_LATENCY = 0.01
+
+
+class FakeJob:
+    def __init__(self, result=True):
+        self._result = result
+
+    def wait(self):
+        time.sleep(CONTROLLER_LATENCY)
+        return self
+
+    def get(self):
+        return self._result
+
+
+class FakeController:
+    """记录发起的每个操作（含截图）"""
+
+    def __init__(self):
+        self.image = np.full((1280, 720, 3), 128, np.uint8)
+        self.operations = []
+
+    def post_screencap(self):
+        self.operations.append("post_screencap")
+        return FakeJob(self.image.copy())
+
+    def __getattr__(self, name):
+        if name.startswith("post_"):
+
+            def post(*args, **kwargs):
+                self.operations.append(name)
+                return FakeJob()
+
+            return post
+        raise AttributeError(name)
+
+
+class FakeTasker:
+    def __init__(self):
+        self.controller = FakeController()
+        self.stopping = False
+
+
+class FakeContext:
+    """识别全部未命中，run_task / run_action 直接返回"""
+
+    def __init__(self):
+        self.tasker = FakeTasker()
+        self.recognitions = []
+
+    def run_recognition(self, entry, image, pipeline_override=None):
+        self.recognitions.append(entry)
+        time.sleep(RECOGNITION_LATENCY)
+        return SimpleNamespace(hit=False, box=None, filtered_results=[], all_results=[], best_result=None)
+
+    def run_task(self, entry, pipeline_override=None):
+        return None
+
+    def run_action(self, entry, *args, **kwargs):
+        return None
+
+    def get_node_data(self, name):
+        return {}
+
+
+@pytest.fixture
+def context():
+    from utils.memo import memo
+
+    memo.clear()
+    return FakeContext()
@@ -0,0 +1,95 @@
+"""
+停止任务的响应延迟：在各类长时间等待进行中置 tasker.stopping，调用应在 LATENCY_LIMIT 内退出
+"""
+
+import time
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+# 停止到退出的延迟上限（秒），等待、输入与识别包装每 cancel.POLL_INTERVAL 检查一次
+LATENCY_LIMIT = 0.1
+# 开始后多久停止任务（秒），错开停止时刻以覆盖等待、操作、识别进行中等不同位置
+STOP_DELAYS = [0.2, 0.237, 0.274, 0.311, 0.348]
+
+
+def _support_page(context):
+    from custom.action.SupportCards import SupportCardsAuto
+
+    SupportCardsAuto()._recognize_page_cards(context, None, 1, set(), {})
+
+
+def _scenarios() -> dict:
+    from utils import cancel, input_queue
+    from utils.wait import wait_until_settled
+
+    return {
+        "sleep": lambda context: cancel.sleep(context, 10),
+        "input": lambda context: input_queue.multi_tap(context, [(100, 100)] * 10, interval=1.0).wait(),
+        "settled": lambda context: wait_until_settled(context, timeout=10, require_change=True),
+        "support": _support_page,
+    }
+
+
+def _measure(context, scenario, delay: float) -> float:
+    """在 delay 秒后置 stopping，返回停止到退出的延迟"""
+    from utils.cancel import TaskCancelled
+
+    result = {}
+
+    def target():
+        try:
+            scenario(context)
+        except TaskCancelled:
+            pass
+        result["end"] = time.perf_counter()
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    time.sleep(delay)
+    stop = time.perf_counter()
+    context.tasker.stopping = True
+    thread.join(timeout=15)
+    assert not thread.is_alive(), "停止任务后调用没有退出"
+    return result["end"] - stop
+
+
+@pytest.mark.parametrize("name", ["sleep", "input", "settled", "support"])
+@pytest.mark.parametrize("delay", STOP_DELAYS)
+def test_stop_latency(context, name, delay):
+    latency = _measure(context, _scenarios()[name], delay)
+    assert latency < LATENCY_LIMIT, f"{name}: 停止后 {latency * 1000:.1f}ms 才退出"
+
+
+def test_checked_calls_after_stop(context):
+    """任务停止后截图、识别与点击都不再发往控制器"""
+    from utils.memo import memo
+    from utils.cancel import TaskCancelled
+    from utils.frames import screencap
+    from utils.input_queue import tap
+
+    context.tasker.stopping = True
+    with pytest.raises(TaskCancelled):
+        screencap(context, newer_than=time.perf_counter())
+    with pytest.raises(TaskCancelled):
+        memo.run_recognition(context, "ProduceRecognitionHealthFlag", context.tasker.controller.image)
+    with pytest.raises(TaskCancelled):
+        tap(context, 100, 100).wait()
+    assert context.tasker.controller.operations == []
+    assert context.recognitions == []
+
+
+def test_actions_return_after_stop(context):
+    """已停止时 custom action 在第一次截图前退出，返回 False 而不是抛出异常"""
+    import custom  # noqa: F401  注册所有 custom
+    from utils import cancel
+    from custom.action.produce import ProduceCardsAuto, ProduceKeepDrinkAuto
+
+    cancel.install()
+    context.tasker.stopping = True
+    argv = SimpleNamespace(custom_action_param="{}", node_name="", box=None, reco_detail=None)
+    for action in (ProduceKeepDrinkAuto(), ProduceCardsAuto()):
+        assert action.run(context, argv) is False
+    assert context.tasker.controller.operations == []
+    assert context.recognitions == []
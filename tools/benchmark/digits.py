@@ -0,0 +1,169 @@
+"""
+数字字形模板的生成与验证
+
+标注集为一个目录，包含数值 ROI 的裁剪图与 labels.json（{文件名: 文本}，多行文本用 \\n 分隔，如 "120\\n/1500"）。
+与数字相邻的图标等非数字字形标注为 #，保存为 skip 模板，读取时丢弃。
+tools/benchmark/data/digits/<字体> 为从实机截图（docs/img/button_example.png）裁剪的标注集，只来自一张截图，
+缺少部分数字，因此暂不附带模板；需要补充实机截图的标注，凑齐 0-9 后再生成。
+
+build: 从标注集切出字形，按字符保存为模板（assets/resource/base/image/digits/<字体>/<字符>_<序号>.png），
+    缺少任何数字时不保存（get_reader 也不会使用缺字的字体）
+validate: 用模板读取标注集，统计准确率、置信读取覆盖率与耗时；可选与 OCR 对比耗时
+    --leave-one-out: 每张样本只用其余样本的字形作模板读取，模板中没有的字符应被判为置信度不足而不是误读
+
+使用方式:
+    python tools/benchmark/digits.py build tools/benchmark/data/digits/produce_hud produce_hud
+    python tools/benchmark/digits.py validate tools/benchmark/data/digits/produce_hud produce_hud
+    python tools/benchmark/digits.py validate tools/benchmark/data/digits/produce_score produce_score --leave-one-out
+    python tools/benchmark/digits.py validate <标注集目录> produce_hud --ocr
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "agent"))
+os.chdir(ROOT)
+
+# 每个字符最多保存的模板数
+MAX_TEMPLATES = 4
+# 与已有模板的相关系数超过该值视为重复，不再保存
+DUPLICATE_SCORE = 0.97
+
+
+def load_labelled(path: Path) -> list:
+    with open(path / "labels.json", "r", encoding="utf-8") as f:
+        labels = json.load(f)
+    samples = []
+    for name, text in labels.items():
+        with Image.open(path / name) as img:
+            samples.append((name, np.ascontiguousarray(np.asarray(img.convert("RGB"))[:, :, ::-1]), text))
+    return samples
+
+
+def template_dir(font: str) -> Path:
+    return ROOT / "assets" / "resource" / "base" / "image" / "digits" / font
+
+
+def collect(samples: list) -> dict:
+    """从标注集切出字形，返回 {字符: [二值字形, ...]}；切分结果与标注字符数不一致的样本跳过"""
+    from utils.digits import segment, binarize, normalize
+
+    templates = {}
+    for name, crop, text in samples:
+        mask = binarize(crop)
+        lines = segment(mask)
+        expected = text.split("\n")
+        if len(lines) != len(expected) or any(len(glyphs) != len(line) for glyphs, line in zip(lines, expected)):
+            print(f"跳过 {name}: 切分出 {[len(glyphs) for glyphs in lines]} 个字形，标注为 {[len(line) for line in expected]} 个字符")
+            continue
+        for glyphs, line in zip(lines, expected):
+            for (x0, y0, x1, y1), char in zip(glyphs, line):
+                glyph = mask[y0:y1, x0:x1]
+                saved = templates.setdefault(char, [])
+                vector = normalize(glyph)
+                if len(saved) < MAX_TEMPLATES and all(float(vector @ normalize(other)) < DUPLICATE_SCORE for other in saved):
+                    saved.append(glyph)
+    return templates
+
+
+def build(samples: list, font: str):
+    from utils.digits import CHAR_NAMES, DIGIT_CHARS
+
+    file_names = {char: name for name, char in CHAR_NAMES.items()}
+    templates = collect(samples)
+    missing = "".join(char for char in DIGIT_CHARS if char not in templates)
+    if missing:
+        raise SystemExit(f"标注集缺少数字 {missing}，请补充包含这些数字的实机截图标注后再生成")
+    output = template_dir(font)
+    output.mkdir(parents=True, exist_ok=True)
+    for old in output.glob("*.png"):
+        old.unlink()
+    for char, glyphs in sorted(templates.items()):
+        for i, glyph in enumerate(glyphs):
+            Image.fromarray((glyph * 255).astype(np.uint8)).save(output / f"{file_names.get(char, char)}_{i}.png")
+    print(f"字符 {''.join(sorted(templates))} 共 {sum(len(g) for g in templates.values())} 个模板已保存到 {output}")
+
+
+def measure_ocr(samples: list, samples_dir: Path) -> list:
+    """用 Tasker.post_recognition 对每张裁剪图执行一次 OCR（only_rec），返回耗时列表"""
+    from event_detect import TaskerRecognizer
+    from maa.pipeline import JOCR, JRecognitionType
+
+    recognizer = TaskerRecognizer(samples_dir)
+    times = []
+    for _, crop, _ in samples:
+        param = JOCR(roi=(0, 0, crop.shape[1], crop.shape[0]), only_rec=True)
+        start = time.perf_counter()
+        recognizer.tasker.post_recognition(JRecognitionType.OCR, param, crop).wait()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def summarize(label: str, times: list):
+    times_ms = [t * 1000 for t in times]
+    print(f"{label:<10} mean={statistics.mean(times_ms):.3f}ms  median={statistics.median(times_ms):.3f}ms  max={max(times_ms):.3f}ms")
+
+
+def validate(samples: list, font: str, repeat: int, leave_one_out: bool = False):
+    from utils.digits import SKIP_CHAR, DigitReader
+
+    reader = DigitReader.from_directory(template_dir(font))
+    if reader is None and not leave_one_out:
+        raise SystemExit(f"字体 {font} 没有模板，请先执行 build")
+
+    correct = confident = confident_correct = 0
+    times = []
+    for i, (name, crop, text) in enumerate(samples):
+        if leave_one_out:
+            reader = DigitReader(collect(samples[:i] + samples[i + 1 :]))
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = reader.read(crop)
+            times.append(time.perf_counter() - start)
+        expected = text.replace(SKIP_CHAR, "")
+        expected = expected if "," in reader.labels else expected.replace(",", "")
+        ok = result.text == expected
+        correct += ok
+        if reader.confident(result):
+            confident += 1
+            confident_correct += ok
+        if not ok or leave_one_out:
+            print(f"{name}: 读取 {result.text!r} ({result.confidence:.2f})，标注 {expected!r}")
+
+    total = len(samples)
+    print()
+    print(f"样本 {total} 张，准确率 {correct / total:.1%}")
+    print(f"置信读取 {confident} 张（{confident / total:.1%}），其中准确率 {confident_correct / max(confident, 1):.1%}，其余退回 OCR")
+    summarize("glyph", times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="数字字形模板的生成与验证")
+    parser.add_argument("command", choices=["build", "validate"])
+    parser.add_argument("samples", type=Path, help="标注集目录（裁剪图 + labels.json）")
+    parser.add_argument("font", help="字体名，如 produce_hud / produce_score")
+    parser.add_argument("--repeat", type=int, default=20, help="validate 时每张重复读取次数")
+    parser.add_argument("--leave-one-out", action="store_true", help="validate 时每张样本只用其余样本的字形作模板")
+    parser.add_argument("--ocr", action="store_true", help="validate 时同时测量 OCR 耗时（需要 maafw 与 OCR 模型）")
+    args = parser.parse_args()
+
+    samples = load_labelled(args.samples)
+    if args.command == "build":
+        build(samples, args.font)
+    else:
+        validate(samples, args.font, args.repeat, args.leave_one_out)
+        if args.ocr:
+            summarize("ocr", measure_ocr(samples, args.samples))
+
+
+if __name__ == "__main__":
+    main()
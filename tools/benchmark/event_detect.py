@@ -0,0 +1,123 @@
+"""
+培育事件识别耗时对比
+
+原方案：EVENT_CONFIG 中每个模板单独调用一次 TemplateMatch（命中属性课时再追加 3 次 SP 识别）
+新方案：TemplateMatcher 对事件栏只裁剪、FFT 一次，所有模板共用
+
+使用方式:
+    python tools/benchmark/event_detect.py <截图目录>
+    python tools/benchmark/event_detect.py <截图目录> --nia --repeat 10
+    python tools/benchmark/event_detect.py <截图目录> --skip-pipeline   # 未安装 maafw 时只测新方案
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "agent"))
+os.chdir(ROOT)
+
+
+def load_screenshots(path: Path) -> list:
+    """加载截图目录下的所有 png/jpg，转换为与 MaaFramework 一致的 BGR 数组"""
+    files = [path] if path.is_file() else sorted(p for p in path.iterdir() if p.suffix.lower() in (".png", ".jpg"))
+    images = []
+    for file in files:
+        with Image.open(file) as img:
+            images.append((file.name, np.ascontiguousarray(np.asarray(img.convert("RGB"))[:, :, ::-1])))
+    return images
+
+
+class TaskerRecognizer:
+    """用 Tasker.post_recognition 代替 context.run_recognition，仅支持 TemplateMatch 覆盖"""
+
+    def __init__(self, screenshot_dir: Path):
+        from maa.tasker import Tasker
+        from maa.resource import Resource
+        from maa.controller import DbgController
+
+        self.resource = Resource()
+        self.resource.post_bundle(ROOT / "assets" / "resource" / "base").wait()
+        self.controller = DbgController(screenshot_dir)
+        self.controller.post_connection().wait()
+        self.tasker = Tasker()
+        self.tasker.bind(self.resource, self.controller)
+        if not self.tasker.inited:
+            raise RuntimeError("Tasker 初始化失败")
+
+    def run_recognition(self, entry: str, image, pipeline_override: dict):
+        from maa.pipeline import JTemplateMatch, JRecognitionType
+
+        param = pipeline_override[entry]
+        reco_param = JTemplateMatch(template=[param["template"]], roi=tuple(param["roi"]))
+        detail = self.tasker.post_recognition(JRecognitionType.TemplateMatch, reco_param, image).wait().get()
+        if not (detail and detail.nodes):
+            return None
+        return detail.nodes[0].recognition
+
+
+def event_names(events: list) -> list:
+    return [key for event in events for key in event if key != "SP"] + [f"SP{i}" for i, event in enumerate(events) if event.get("SP")]
+
+
+def summarize(label: str, times: list):
+    times_ms = [t * 1000 for t in times]
+    print(f"{label:<10} mean={statistics.mean(times_ms):8.2f}ms  median={statistics.median(times_ms):8.2f}ms  max={max(times_ms):8.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="培育事件识别耗时对比")
+    parser.add_argument("screenshots", type=Path, help="截图目录或单张截图（1280x720 竖屏）")
+    parser.add_argument("--nia", action="store_true", help="使用 NIA 的事件配置")
+    parser.add_argument("--repeat", type=int, default=5, help="每张截图重复次数")
+    parser.add_argument("--skip-pipeline", action="store_true", help="跳过原方案（无需 maafw）")
+    args = parser.parse_args()
+
+    from custom.action.produce import ProduceChooseEventAuto, ProduceChooseNIAEventAuto
+
+    action = ProduceChooseNIAEventAuto() if args.nia else ProduceChooseEventAuto()
+    images = load_screenshots(args.screenshots)
+    if not images:
+        print("未找到截图")
+        return
+
+    matcher = action._get_event_matcher()
+    recognizer = None if args.skip_pipeline else TaskerRecognizer(args.screenshots if args.screenshots.is_dir() else args.screenshots.parent)
+
+    scan_times, pipeline_times = [], []
+    mismatch = 0
+    for name, image in images:
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            scan_events, _ = action._match_events(matcher.scan(image))
+            scan_times.append(time.perf_counter() - start)
+
+            if recognizer:
+                start = time.perf_counter()
+                pipeline_events, _ = action._match_events_by_pipeline(recognizer, image)
+                pipeline_times.append(time.perf_counter() - start)
+
+        line = f"{name}: {event_names(scan_events)}"
+        if recognizer:
+            same = event_names(scan_events) == event_names(pipeline_events)
+            mismatch += not same
+            line += "" if same else f"  (原方案: {event_names(pipeline_events)})"
+        print(line)
+
+    print()
+    print(f"截图 {len(images)} 张，每张 {args.repeat} 次")
+    summarize("scan", scan_times)
+    if recognizer:
+        summarize("pipeline", pipeline_times)
+        print(f"加速比: {statistics.mean(pipeline_times) / statistics.mean(scan_times):.2f}x，结果不一致 {mismatch} 张")
+
+
+if __name__ == "__main__":
+    main()
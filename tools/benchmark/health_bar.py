@@ -0,0 +1,92 @@
+"""
+体力槽读取的校验与耗时测量
+
+对截图目录中的每张培育截图测量体力槽填充比例，可与 OCR 读出的 cur/max 对比，
+并输出体力槽区域两端的颜色，用于核对 ProduceHudSnapshot.HEALTH_BAR_* 的区域与颜色范围。
+体力槽目前只在 OCR 失败时使用，在足够多的截图上误差都在 TOLERANCE 以内后才适合用于校验 OCR。
+
+使用方式:
+    python tools/benchmark/health_bar.py <截图目录>
+    python tools/benchmark/health_bar.py <截图目录> --ocr      # 与 OCR 对比（需要 maafw 与 OCR 模型）
+    python tools/benchmark/health_bar.py <截图目录> --colors   # 输出体力槽两端颜色
+"""
+
+import time
+import argparse
+import statistics
+from pathlib import Path
+
+import numpy as np
+from event_detect import TaskerRecognizer, load_screenshots
+
+# 体力槽与 OCR 的比例误差容差
+TOLERANCE = 0.15
+
+
+def edge_colors(image: np.ndarray, roi: list) -> tuple:
+    """体力槽最左、最右 10% 区域的颜色中位数（BGR）"""
+    x, y, w, h = roi
+    strip = image[y : y + h, x : x + w, :3]
+    edge = max(w // 10, 1)
+    return tuple(np.median(strip[:, :edge].reshape(-1, 3), axis=0).astype(int)), tuple(
+        np.median(strip[:, -edge:].reshape(-1, 3), axis=0).astype(int)
+    )
+
+
+def ocr_health(recognizer: TaskerRecognizer, image: np.ndarray, roi: list, pattern):
+    from maa.pipeline import JOCR, JRecognitionType
+
+    detail = recognizer.tasker.post_recognition(JRecognitionType.OCR, JOCR(roi=tuple(roi)), image).wait().get()
+    if not (detail and detail.nodes and detail.nodes[0].recognition and detail.nodes[0].recognition.hit):
+        return None
+    text = "".join(result.text for result in detail.nodes[0].recognition.filtered_results).replace(" ", "")
+    match = pattern.search(text)
+    return (int(match.group(1)), int(match.group(2))) if match and int(match.group(2)) else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="体力槽读取的校验与耗时测量")
+    parser.add_argument("screenshots", type=Path, help="截图目录或单张截图（1280x720 竖屏）")
+    parser.add_argument("--ocr", action="store_true", help="与 OCR 读出的体力对比")
+    parser.add_argument("--colors", action="store_true", help="输出体力槽两端的颜色")
+    parser.add_argument("--repeat", type=int, default=20, help="每张截图重复次数")
+    args = parser.parse_args()
+
+    from utils.bar import fill_ratio
+    from custom.action.produce_hud import ProduceHudSnapshot as Hud
+
+    images = load_screenshots(args.screenshots)
+    recognizer = TaskerRecognizer(args.screenshots if args.screenshots.is_dir() else args.screenshots.parent) if args.ocr else None
+
+    times, errors = [], []
+    for name, image in images:
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            ratio = fill_ratio(image, Hud.HEALTH_BAR_ROI, *Hud.HEALTH_BAR_FILL, *Hud.HEALTH_BAR_TRACK)
+            times.append(time.perf_counter() - start)
+
+        line = f"{name}: 体力槽 {'-' if ratio is None else f'{ratio:.1%}'}"
+        if recognizer:
+            health = ocr_health(recognizer, image, Hud.HEALTH_ROI, Hud.HEALTH_PATTERN)
+            if health:
+                line += f"  OCR {health[0]}/{health[1]} ({health[0] / health[1]:.1%})"
+                if ratio is not None:
+                    errors.append(abs(ratio - health[0] / health[1]))
+            else:
+                line += "  OCR -"
+        if args.colors:
+            left, right = edge_colors(image, Hud.HEALTH_BAR_ROI)
+            line += f"  左端 {left} 右端 {right}"
+        print(line)
+
+    times_ms = [t * 1000 for t in times]
+    print()
+    print(f"截图 {len(images)} 张，体力槽读取 mean={statistics.mean(times_ms):.3f}ms  median={statistics.median(times_ms):.3f}ms")
+    if errors:
+        print(
+            f"与 OCR 的比例误差 mean={statistics.mean(errors):.1%}  max={max(errors):.1%}，超过容差 {TOLERANCE:.0%} 的 {sum(e > TOLERANCE for e in errors)} 张"
+        )
+
+
+if __name__ == "__main__":
+    main()
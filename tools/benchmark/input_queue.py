@@ -0,0 +1,117 @@
+"""
+输入调度的控制器往返次数与调用方耗时
+
+使用 stop_latency 中的假 tasker / 控制器 / Context（每次控制器操作耗时 CONTROLLER_LATENCY），
+分别以逐个阻塞调用控制器（inline）与输入调度（queue）两种方式执行同一组输入，统计：
+- 控制器往返次数（每个 post_* 发起并等待完成一次，含截图）
+- 调用方阻塞等待输入调度的次数
+- 调用方总耗时
+
+场景:
+    event        事件选项的双击（两次点击间隔 0.2 秒），点击完成后才截图确认
+    support      SupportCardsAuto 的一页网格遍历（12 张卡牌，每张点击后等待 0.5 秒再截图识别）
+
+使用方式:
+    python tools/benchmark/input_queue.py
+"""
+
+import time
+import argparse
+
+from stop_latency import FakeJob, FakeContext, FakeController
+
+INTERVAL = 0.2
+
+
+class CountingController(FakeController):
+    """统计控制器往返次数"""
+
+    def __init__(self):
+        super().__init__()
+        self.round_trips = 0
+
+    def _count(self, job: FakeJob) -> FakeJob:
+        wait = job.wait
+
+        def counted():
+            self.round_trips += 1
+            return wait()
+
+        job.wait = counted
+        return job
+
+    def post_screencap(self):
+        return self._count(super().post_screencap())
+
+    def __getattr__(self, name):
+        post = super().__getattr__(name)
+        return lambda *args, **kwargs: self._count(post(*args, **kwargs))
+
+
+def make_context() -> FakeContext:
+    context = FakeContext()
+    context.tasker.controller = CountingController()
+    return context
+
+
+def event_inline(context):
+    controller = context.tasker.controller
+    controller.post_click(100, 100).wait()
+    time.sleep(INTERVAL)
+    controller.post_click(100, 100).wait()
+
+
+def event_queue(context):
+    from utils.input_queue import double_tap
+
+    double_tap(context, 100, 100, interval=INTERVAL).wait()
+
+
+def support_inline(context):
+    from custom.action.SupportCards import SupportCardsAuto
+
+    action = SupportCardsAuto()
+    controller = context.tasker.controller
+    for row in range(action.GRID_ROWS):
+        for col in range(action.GRID_COLS):
+            controller.post_click(action.GRID_ROI[0] + col * action.CARD_WIDTH, action.GRID_ROI[1] + row * action.CARD_HEIGHT).wait()
+            time.sleep(action.ACTION_DELAY)
+            image = controller.post_screencap().wait().get()
+            action._recognize_card_name(context, image)
+            action._recognize_star_count(context, image)
+
+
+def support_queue(context):
+    from custom.action.SupportCards import SupportCardsAuto
+
+    SupportCardsAuto()._recognize_page_cards(context, None, 1, set(), {})
+
+
+SCENARIOS = {
+    "event": (event_inline, event_queue),
+    "support": (support_inline, support_queue),
+}
+
+
+def measure(scenario) -> tuple:
+    """返回 (控制器往返次数, 调用方阻塞等待次数, 耗时)"""
+    from utils import input_queue
+
+    context = make_context()
+    input_queue.reset_stats()
+    start = time.perf_counter()
+    scenario(context)
+    elapsed = time.perf_counter() - start
+    return context.tasker.controller.round_trips, input_queue.stats()["waits"], elapsed
+
+
+def main():
+    argparse.ArgumentParser(description="输入调度的控制器往返次数与调用方耗时").parse_args()
+    for name, (inline, queued) in SCENARIOS.items():
+        for kind, scenario in (("inline", inline), ("queue", queued)):
+            round_trips, waits, elapsed = measure(scenario)
+            print(f"{name:<8} {kind:<6} 控制器往返 {round_trips:3d} 次  调用方等待调度 {waits:3.0f} 次  耗时 {elapsed:6.2f}s")
+
+
+if __name__ == "__main__":
+    main()
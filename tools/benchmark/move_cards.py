@@ -0,0 +1,43 @@
+"""
+移动卡牌定位的校验
+
+对截图目录中的每张移动卡牌界面截图执行 ProduceCardsAuto._find_move_card_slots，输出定位到的卡牌框，
+并将卡牌框画在截图副本上保存到输出目录，用于人工核对饱和度与亮度阈值。
+在足够多的实机截图上定位结果都正确后，才适合开启 ProduceCardsAuto.MOVE_CARD_LOCATE 按定位结果直接点击。
+
+使用方式:
+    python tools/benchmark/move_cards.py <截图目录>
+    python tools/benchmark/move_cards.py <截图目录> --output debug/move_cards
+"""
+
+import argparse
+from pathlib import Path
+
+from PIL import Image, ImageDraw
+from event_detect import ROOT, load_screenshots
+
+
+def main():
+    parser = argparse.ArgumentParser(description="移动卡牌定位的校验")
+    parser.add_argument("screenshots", type=Path, help="移动卡牌界面的截图目录（720x1280）")
+    parser.add_argument("--output", type=Path, default=ROOT / "debug" / "move_cards", help="画出卡牌框的截图保存目录")
+    args = parser.parse_args()
+
+    from custom.action.produce import ProduceCardsAuto
+
+    args.output.mkdir(parents=True, exist_ok=True)
+    for name, image in load_screenshots(args.screenshots):
+        slots = ProduceCardsAuto._find_move_card_slots(image)
+        print(f"{name}: {len(slots)} 张 {slots}")
+        preview = Image.fromarray(image[:, :, ::-1])
+        draw = ImageDraw.Draw(preview)
+        x, y, w, h = ProduceCardsAuto.MOVE_CARDS_AREA
+        draw.rectangle([x, y, x + w, y + h], outline=(0, 0, 255), width=2)
+        for x, y, w, h in slots:
+            draw.rectangle([x, y, x + w, y + h], outline=(255, 0, 0), width=3)
+        preview.save(args.output / f"{Path(name).stem}.png")
+    print(f"已保存到 {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""
+离线回放 custom action / recognition
+
+读取 SessionRecorder 录制的会话（开启 config/agent_config.json 中的 recorder 后正常运行一次即可得到），
+用回放 Context 代替模拟器在 Linux 上无界面地重跑指定的 custom，报告每次调用的耗时、sleep 时长与识别次数。
+等待由虚拟时钟代替，不会真正等待；截图按虚拟时钟返回录制中该时刻的画面。
+
+使用方式:
+    python tools/benchmark/replay.py <会话目录> --list
+    python tools/benchmark/replay.py <会话目录> ProduceCardsAuto
+    python tools/benchmark/replay.py <会话目录> WorkChooseAuto --limit 3 --verbose
+"""
+
+import os
+import sys
+import time
+import argparse
+from types import SimpleNamespace
+from pathlib import Path
+from collections import Counter, defaultdict
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "agent"))
+os.chdir(ROOT)
+
+
+class ReplayStats:
+    """统计一次回放中每个 custom 的 sleep、识别与控制器操作"""
+
+    def __init__(self):
+        self.sleep = 0.0
+        self.recognitions = Counter()
+        self.controller = Counter()
+
+    def on_begin(self, span):
+        pass
+
+    def on_span(self, span):
+        if span.kind == "sleep":
+            self.sleep += span.duration
+        elif span.kind == "recognition":
+            self.recognitions[span.name] += 1
+        elif span.kind in ("task", "run_action"):
+            self.controller[f"{span.kind}:{span.name}"] += 1
+
+
+def find_custom(name: str):
+    from maa.agent.agent_server import AgentServer
+
+    if name in AgentServer._custom_action_holder:
+        return "action", AgentServer._custom_action_holder[name]
+    if name in AgentServer._custom_recognition_holder:
+        return "custom_recognition", AgentServer._custom_recognition_holder[name]
+    raise SystemExit(f"未注册的 custom: {name}")
+
+
+def replay_once(session, kind: str, instance, invocation, clock, param: str = None):
+    from utils import hooks
+    from utils.replay import ReplayContext, ReplayFinished, ReplayController
+
+    controller = ReplayController(session, clock, start=invocation.start, end=invocation.end)
+    context = ReplayContext(session, controller)
+    stats = ReplayStats()
+    hooks.add_listener(stats)
+
+    name = invocation.name
+    param = param if param is not None else invocation.param or "{}"
+    slept = clock.slept
+    wall = time.perf_counter()  # 回放开始前已替换为虚拟时钟，需区分真实耗时
+    real = clock._perf_counter()
+    result, error = None, None
+    try:
+        if kind == "action":
+            argv = SimpleNamespace(
+                task_detail=None, node_name=invocation.node, custom_action_name=name, custom_action_param=param, reco_detail=None, box=None
+            )
+            result = instance.run(context, argv)
+        else:
+            image = session.image(invocation.frame if invocation.frame is not None else session.frame_at(invocation.start))
+            argv = SimpleNamespace(
+                task_detail=None,
+                node_name=invocation.node,
+                custom_recognition_name=name,
+                custom_recognition_param=param,
+                image=image,
+                roi=None,
+            )
+            result = instance.analyze(context, argv)
+    except ReplayFinished as e:
+        error = str(e)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    finally:
+        hooks.remove_listener(stats)
+
+    return {
+        "name": name,
+        "recorded": invocation.end - invocation.start,
+        "replayed": time.perf_counter() - wall,
+        "compute": clock._perf_counter() - real,
+        "sleep": clock.slept - slept,
+        "recognitions": stats.recognitions,
+        "tasks": stats.controller,
+        "screencaps": controller.screencaps,
+        "operations": Counter(op["name"] for op in controller.operations),
+        "unmatched": dict(context.unmatched),
+        "approximate": dict(context.approximate),
+        "result": result,
+        "error": error,
+    }
+
+
+def print_report(index: int, report: dict, verbose: bool):
+    print(
+        f"#{index} {report['name']}: 录制 {report['recorded']:.2f}s, 回放 {report['replayed']:.2f}s "
+        f"(计算 {report['compute']:.2f}s, sleep {report['sleep']:.2f}s), "
+        f"识别 {sum(report['recognitions'].values())} 次, 截图 {report['screencaps']} 次, "
+        f"操作 {dict(report['operations'])}"
+    )
+    if report["unmatched"]:
+        print(f"    录制中缺少的识别: {report['unmatched']}")
+    if report["approximate"]:
+        print(f"    使用相邻截图结果的识别: {report['approximate']}")
+    if report["error"]:
+        print(f"    {report['error']}")
+    if verbose:
+        for node, count in report["recognitions"].most_common():
+            print(f"    {node:<40} {count}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="离线回放 custom action / recognition")
+    parser.add_argument("session", type=Path, help="SessionRecorder 录制的会话目录")
+    parser.add_argument("name", nargs="?", help="custom action / recognition 名称")
+    parser.add_argument("--list", action="store_true", help="列出会话中录制到的 custom 调用")
+    parser.add_argument("--param", help="覆盖 custom 参数（JSON 字符串），默认使用录制时的参数")
+    parser.add_argument("--limit", type=int, default=0, help="最多回放的调用次数，0 为全部")
+    parser.add_argument("--verbose", action="store_true", help="输出每个节点的识别次数")
+    args = parser.parse_args()
+
+    import custom  # noqa: F401  注册所有 custom
+    from utils import hooks, cancel, frames
+    from utils.replay import Invocation, ReplayClock, ReplaySession
+
+    session = ReplaySession(args.session)
+    if args.list or not args.name:
+        counts = Counter(invocation.name for invocation in session.invocations)
+        durations = defaultdict(float)
+        for invocation in session.invocations:
+            durations[invocation.name] += invocation.end - invocation.start
+        for name, count in counts.most_common():
+            print(f"{name:<32} {count:>4} 次  共 {durations[name]:.1f}s")
+        return
+
+    kind, instance = find_custom(args.name)
+    invocations = [invocation for invocation in session.invocations if invocation.name == args.name]
+    if not invocations:
+        print(f"会话中没有 {args.name} 的调用，回放整个会话")
+        invocations = [Invocation(kind=kind, name=args.name, start=0.0, end=session.end, frame=None, node=None, param=None)]
+    if args.limit:
+        invocations = invocations[: args.limit]
+
+    frames.configure(enabled=False)
+    hooks.install()
+    cancel.install()
+    clock = ReplayClock()
+    clock.install()
+    try:
+        reports = [replay_once(session, kind, instance, invocation, clock, args.param) for invocation in invocations]
+    finally:
+        clock.uninstall()
+
+    for index, report in enumerate(reports):
+        print_report(index, report, args.verbose)
+
+    print()
+    print(f"{args.name} 共回放 {len(reports)} 次")
+    print(f"录制总耗时 {sum(r['recorded'] for r in reports):.2f}s，回放总耗时 {sum(r['replayed'] for r in reports):.2f}s")
+    print(f"计算 {sum(r['compute'] for r in reports):.2f}s，sleep {sum(r['sleep'] for r in reports):.2f}s")
+    total = Counter()
+    for report in reports:
+        total.update(report["recognitions"])
+    print(f"识别 {sum(total.values())} 次: {dict(total.most_common())}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+场景模板的生成与验证
+
+样本目录下每个子目录为一个场景，目录名即场景名（cards / event / options / mirror / shop / work / society 等），
+其中放该场景的截图；名为 unknown 的子目录放不属于任何场景的截图，只用于验证。
+样本须为实机原始分辨率（720x1280）的截图，缩小、裁剪或画有标注框的图片（如模型验证拼图）不能代表实机画面，会被跳过。
+仓库暂无足够的实机截图，因此没有附带样本与模板。
+
+build: 由样本生成场景模板（assets/resource/base/image/scenes/<场景>.png 与 scenes.json）
+validate: 统计分类准确率、误排除（本属于该场景却被判为其他场景，会导致识别被跳过）与耗时
+    --leave-one-out: 每张样本只用其余样本生成的模板分类
+
+使用方式:
+    python tools/benchmark/scene.py build tools/benchmark/data/scenes
+    python tools/benchmark/scene.py validate tools/benchmark/data/scenes
+    python tools/benchmark/scene.py validate tools/benchmark/data/scenes --leave-one-out
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+from pathlib import Path
+from collections import Counter
+
+import numpy as np
+from PIL import Image
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "agent"))
+os.chdir(ROOT)
+
+UNKNOWN = "unknown"
+# 截图尺寸 (宽, 高)
+SCREEN_SIZE = (720, 1280)
+
+
+def load_samples(path: Path) -> dict:
+    """{场景名: [(文件名, BGR 截图), ...]}，尺寸不是 720x1280 的图片跳过"""
+    samples = {}
+    for folder in sorted(p for p in path.iterdir() if p.is_dir()):
+        images = []
+        for file in sorted(p for p in folder.iterdir() if p.suffix.lower() in (".png", ".jpg")):
+            with Image.open(file) as img:
+                if img.size != SCREEN_SIZE:
+                    print(f"跳过 {folder.name}/{file.name}: 尺寸 {img.size[0]}x{img.size[1]} 不是实机截图的 {SCREEN_SIZE[0]}x{SCREEN_SIZE[1]}")
+                    continue
+                img = img.convert("RGB")
+                images.append((file.name, np.ascontiguousarray(np.asarray(img)[:, :, ::-1])))
+        if images:
+            samples[folder.name] = images
+    return samples
+
+
+def scenes_dir() -> Path:
+    return ROOT / "assets" / "resource" / "base" / "image" / "scenes"
+
+
+def make_templates(samples: dict, verbose: bool = False) -> list:
+    from utils.scene import SceneTemplate, thumbnail
+
+    templates = []
+    for label, images in samples.items():
+        if label == UNKNOWN or not images:
+            continue
+        template = SceneTemplate.from_samples(label, [thumbnail(image) for _, image in images])
+        templates.append(template)
+        if verbose:
+            print(f"{label}: {len(images)} 张，稳定像素 {template.mask.mean():.0%}，阈值 {template.threshold:.1f}")
+    return templates
+
+
+def build(samples: dict):
+    from utils.scene import SceneClassifier
+
+    templates = make_templates(samples, verbose=True)
+    SceneClassifier(templates).save(scenes_dir())
+    print(f"{len(templates)} 个场景模板已保存到 {scenes_dir()}")
+
+
+def validate(samples: dict, repeat: int, leave_one_out: bool = False):
+    from utils.scene import SceneClassifier
+
+    classifier = SceneClassifier.from_directory(scenes_dir())
+    if classifier is None:
+        raise SystemExit("没有场景模板，请先执行 build")
+
+    total = correct = 0
+    false_exclusions = 0
+    confusion = Counter()
+    times = []
+    for label, images in samples.items():
+        for i, (name, image) in enumerate(images):
+            if leave_one_out:
+                classifier = SceneClassifier(make_templates({**samples, label: images[:i] + images[i + 1 :]}))
+            for _ in range(repeat):
+                start = time.perf_counter()
+                match = classifier.classify(image)
+                times.append(time.perf_counter() - start)
+            predicted = match.label if match else UNKNOWN
+            total += 1
+            correct += predicted == label
+            if predicted != label:
+                confusion[(label, predicted)] += 1
+                print(f"{label}/{name}: 分类为 {predicted}，距离 {classifier.distances(image)}")
+            if label != UNKNOWN and classifier.conflicting(image, label):
+                false_exclusions += 1
+
+    print()
+    print(f"样本 {total} 张，准确率 {correct / total:.1%}，误排除 {false_exclusions} 张")
+    for (label, predicted), count in confusion.most_common():
+        print(f"  {label} -> {predicted}: {count}")
+    times_ms = [t * 1000 for t in times]
+    print(f"分类耗时 mean={statistics.mean(times_ms):.3f}ms  median={statistics.median(times_ms):.3f}ms  max={max(times_ms):.3f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="场景模板的生成与验证")
+    parser.add_argument("command", choices=["build", "validate"])
+    parser.add_argument("samples", type=Path, help="样本目录（每个场景一个子目录）")
+    parser.add_argument("--repeat", type=int, default=20, help="validate 时每张重复分类次数")
+    parser.add_argument("--leave-one-out", action="store_true", help="validate 时每张样本只用其余样本生成的模板")
+    args = parser.parse_args()
+
+    samples = load_samples(args.samples)
+    if args.command == "build":
+        build(samples)
+    else:
+        validate(samples, args.repeat, args.leave_one_out)
+
+
+if __name__ == "__main__":
+    main()
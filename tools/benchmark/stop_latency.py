@@ -0,0 +1,165 @@
+"""
+停止任务的响应延迟
+
+使用假的 tasker / 控制器 / Context（不需要模拟器与资源），在各类长时间等待进行中置 tasker.stopping，
+测量从置位到调用退出的时间。等待、输入与识别包装每 POLL_INTERVAL 检查一次取消令牌，延迟应低于 --limit。
+
+场景:
+    sleep        cancel.sleep 长时间等待
+    input        输入队列中的多次点击（每次间隔 1 秒）
+    settled      wait_until_settled 等待一直不变化的画面
+    support      SupportCardsAuto 的网格遍历（12 张卡牌，每张点击后等待 0.5 秒）
+
+使用方式:
+    python tools/benchmark/stop_latency.py
+    python tools/benchmark/stop_latency.py --repeat 20 --limit 0.1
+"""
+
+import os
+import sys
+import time
+import argparse
+import threading
+import statistics
+from types import SimpleNamespace
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "agent"))
+os.chdir(ROOT)
+
+# 假控制器每次操作的耗时（秒）
+CONTROLLER_LATENCY = 0.005
+# 假识别的耗时（秒）
+RECOGNITION_LATENCY = 0.01
+
+
+class FakeJob:
+    def __init__(self, result=True):
+        self._result = result
+
+    def wait(self):
+        time.sleep(CONTROLLER_LATENCY)
+        return self
+
+    def get(self):
+        return self._result
+
+
+class FakeController:
+    def __init__(self):
+        self.image = np.full((1280, 720, 3), 128, np.uint8)
+        self.operations = 0
+
+    def post_screencap(self):
+        return FakeJob(self.image)
+
+    def __getattr__(self, name):
+        if name.startswith("post_"):
+
+            def post(*args, **kwargs):
+                self.operations += 1
+                return FakeJob()
+
+            return post
+        raise AttributeError(name)
+
+
+class FakeTasker:
+    def __init__(self):
+        self.controller = FakeController()
+        self.stopping = False
+
+
+class FakeContext:
+    """识别全部未命中，run_task / run_action 直接返回"""
+
+    def __init__(self):
+        self.tasker = FakeTasker()
+
+    def run_recognition(self, entry, image, pipeline_override=None):
+        time.sleep(RECOGNITION_LATENCY)
+        return SimpleNamespace(hit=False, filtered_results=[], all_results=[], best_result=None)
+
+    def run_task(self, entry, pipeline_override=None):
+        return None
+
+    def run_action(self, entry, *args, **kwargs):
+        return None
+
+    def get_node_data(self, name):
+        return {}
+
+
+def scenarios() -> dict:
+    from utils import cancel, input_queue
+    from utils.wait import wait_until_settled
+
+    def support(context):
+        from custom.action.SupportCards import SupportCardsAuto
+
+        SupportCardsAuto()._recognize_page_cards(context, None, 1, set(), {})
+
+    return {
+        "sleep": lambda context: cancel.sleep(context, 10),
+        "input": lambda context: input_queue.multi_tap(context, [(100, 100)] * 10, interval=1.0).wait(),
+        "settled": lambda context: wait_until_settled(context, timeout=10, require_change=True),
+        "support": support,
+    }
+
+
+def measure(scenario, delay: float) -> tuple:
+    """在 delay 秒后置 stopping，返回 (停止到退出的延迟, 退出方式)"""
+    from utils.cancel import TaskCancelled
+
+    context = FakeContext()
+    result = {}
+
+    def target():
+        try:
+            scenario(context)
+            result["exit"] = "return"
+        except TaskCancelled:
+            result["exit"] = "cancelled"
+        result["end"] = time.perf_counter()
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    time.sleep(delay)
+    stop = time.perf_counter()
+    context.tasker.stopping = True
+    thread.join(timeout=15)
+    if thread.is_alive():
+        return float("inf"), "timeout"
+    return result["end"] - stop, result["exit"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="停止任务的响应延迟")
+    parser.add_argument("--repeat", type=int, default=10, help="每个场景的重复次数")
+    parser.add_argument("--delay", type=float, default=0.3, help="开始后多久停止任务（秒），每次重复会错开一些")
+    parser.add_argument("--limit", type=float, default=0.1, help="延迟上限（秒），超过时返回 1")
+    args = parser.parse_args()
+
+    failed = False
+    for name, scenario in scenarios().items():
+        latencies, exits = [], set()
+        for i in range(args.repeat):
+            # 错开停止时刻，覆盖等待、操作、识别进行中等不同位置
+            latency, exit_kind = measure(scenario, args.delay + i * 0.037)
+            latencies.append(latency)
+            exits.add(exit_kind)
+        worst = max(latencies)
+        ok = worst < args.limit
+        failed |= not ok
+        print(
+            f"{'✓' if ok else '✗'} {name:<8} median={statistics.median(latencies) * 1000:6.1f}ms  "
+            f"max={worst * 1000:6.1f}ms  退出方式: {', '.join(sorted(exits))}"
+        )
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
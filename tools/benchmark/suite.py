@@ -0,0 +1,174 @@
+"""
+custom recognition / action 基准测试
+
+以 SessionRecorder 录制的会话目录作为截图语料（每个会话是 corpus 下的一个子目录），
+对 agent/custom 中注册的每个 custom，用回放 Context 重跑语料中录制到的每一次调用，统计：
+- 计算耗时 p50 / p95 / p99（真实耗时，不含 sleep；sleep 由虚拟时钟代替）
+- 回放耗时 p50（含虚拟 sleep 与控制器耗时，接近真机上的耗时）
+- 平均 run_recognition 次数与控制器往返次数（截图、点击、滑动、run_task、run_action）
+结果写入 JSON 文件，可用 --compare 与之前版本的结果对比。
+
+使用方式:
+    python tools/benchmark/suite.py <语料目录>
+    python tools/benchmark/suite.py <语料目录> --repeat 5 --output debug/benchmark/v1.json
+    python tools/benchmark/suite.py <语料目录> --only ProduceCardsAuto --compare debug/benchmark/v1.json
+"""
+
+import json
+import math
+import time
+import argparse
+import platform
+import statistics
+from pathlib import Path
+
+from replay import ROOT, find_custom, replay_once
+
+# 对比时耗时变化超过该比例视为回归
+REGRESSION_RATIO = 0.1
+
+
+def percentile(values: list, p: float) -> float:
+    """最近秩百分位数"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(math.ceil(p / 100 * len(ordered)) - 1, 0)]
+
+
+def registered_customs() -> list:
+    import custom  # noqa: F401  注册所有 custom
+    from maa.agent.agent_server import AgentServer
+
+    return sorted(AgentServer._custom_recognition_holder) + sorted(AgentServer._custom_action_holder)
+
+
+def load_corpus(corpus: Path) -> list:
+    from utils.replay import EVENTS_FILE, ReplaySession
+
+    sessions = [path.parent for path in sorted(corpus.rglob(EVENTS_FILE))]
+    return [ReplaySession(path) for path in sessions]
+
+
+def bench_custom(name: str, sessions: list, clock, repeat: int) -> dict:
+    from utils.memo import memo
+    from utils.ocr_cache import ocr_cache
+    from custom.action.produce_hud import ProduceHudSnapshot
+
+    kind, instance = find_custom(name)
+    compute, replayed = [], []
+    recognitions, round_trips, errors = [], [], 0
+    scenes = 0
+    for session in sessions:
+        for invocation in session.invocations:
+            if invocation.name != name:
+                continue
+            scenes += 1
+            for _ in range(repeat):
+                memo.clear()
+                ocr_cache.clear()
+                ProduceHudSnapshot.clear_shared_state()
+                report = replay_once(session, kind, instance, invocation, clock)
+                compute.append(report["compute"])
+                replayed.append(report["replayed"])
+                recognitions.append(sum(report["recognitions"].values()))
+                round_trips.append(report["screencaps"] + sum(report["operations"].values()) + sum(report["tasks"].values()))
+                errors += report["error"] is not None
+
+    if not scenes:
+        return {"kind": kind, "scenes": 0}
+    return {
+        "kind": kind,
+        "scenes": scenes,
+        "runs": len(compute),
+        "p50_ms": percentile(compute, 50) * 1000,
+        "p95_ms": percentile(compute, 95) * 1000,
+        "p99_ms": percentile(compute, 99) * 1000,
+        "replayed_p50_s": percentile(replayed, 50),
+        "recognitions": statistics.mean(recognitions),
+        "round_trips": statistics.mean(round_trips),
+        "errors": errors,
+    }
+
+
+def compare(results: dict, baseline_path: Path):
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)["customs"]
+
+    print()
+    print(f"与 {baseline_path} 对比:")
+    for name, current in results.items():
+        old = baseline.get(name)
+        if not (old and old.get("scenes") and current.get("scenes")):
+            continue
+        changes = []
+        for key in ("p50_ms", "p95_ms", "recognitions", "round_trips"):
+            before, after = old[key], current[key]
+            ratio = (after - before) / before if before else 0.0
+            mark = " !" if ratio > REGRESSION_RATIO else ""
+            changes.append(f"{key} {before:.1f}->{after:.1f} ({ratio:+.0%}){mark}")
+        print(f"{name:<32} " + ", ".join(changes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="custom recognition / action 基准测试")
+    parser.add_argument("corpus", type=Path, help="语料目录（包含一个或多个录制会话）")
+    parser.add_argument("--repeat", type=int, default=3, help="每个场景重复次数")
+    parser.add_argument("--only", nargs="*", help="只测试这些 custom")
+    parser.add_argument("--output", type=Path, default=ROOT / "debug" / "benchmark" / f"suite_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    parser.add_argument("--compare", type=Path, help="与之前的结果文件对比")
+    args = parser.parse_args()
+
+    from utils import hooks, cancel, frames
+    from utils.replay import ReplayClock
+
+    available = registered_customs()
+    names = args.only or available
+    sessions = load_corpus(args.corpus)
+    if not sessions:
+        print(f"{args.corpus} 中没有录制会话")
+        return
+
+    frames.configure(enabled=False)
+    hooks.install()
+    cancel.install()
+    clock = ReplayClock()
+    clock.install()
+    try:
+        results = {name: bench_custom(name, sessions, clock, args.repeat) for name in names}
+    finally:
+        clock.uninstall()
+
+    print(f"{'custom':<32} {'场景':>4} {'p50':>9} {'p95':>9} {'p99':>9} {'回放p50':>8} {'识别':>6} {'往返':>6}")
+    for name, result in results.items():
+        if not result["scenes"]:
+            print(f"{name:<32} {'-':>4}  语料中没有该 custom 的调用")
+            continue
+        print(
+            f"{name:<32} {result['scenes']:>4} {result['p50_ms']:>7.1f}ms {result['p95_ms']:>7.1f}ms {result['p99_ms']:>7.1f}ms "
+            f"{result['replayed_p50_s']:>7.2f}s {result['recognitions']:>6.1f} {result['round_trips']:>6.1f}"
+            + (f"  回放中止 {result['errors']} 次" if result["errors"] else "")
+        )
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "python": platform.python_version(),
+                "corpus": str(args.corpus),
+                "repeat": args.repeat,
+                "customs": results,
+            },
+            f,
+            ensure_ascii=False,
+            indent=4,
+        )
+    print(f"\n结果已保存: {args.output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
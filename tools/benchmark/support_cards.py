@@ -0,0 +1,126 @@
+"""
+支持卡牌名称模糊匹配：名称索引与线性扫描对比
+
+对 support_cards.json 中的全部名称生成模拟 OCR 结果的查询串（原名、替换/删除/插入字符、截断、无关文本），
+分别用原方案（逐个计算 SequenceMatcher.ratio()）与 FuzzyIndex 查询，校验两者结果完全一致并对比耗时。
+FuzzyIndex 分别测量不使用缓存与重复查询命中缓存的耗时。
+
+使用方式:
+    python tools/benchmark/support_cards.py
+    python tools/benchmark/support_cards.py --repeat 10 --scale 4   # 名称复制为 4 倍，模拟更大的卡池
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import statistics
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "agent"))
+os.chdir(ROOT)
+
+DATA_FILE = ROOT / "assets" / "data" / "support_cards.json"
+# 与 SupportCardsAuto.SIMILARITY_THRESHOLD 一致
+THRESHOLD = 0.7
+
+
+def load_names(scale: int) -> list:
+    with open(DATA_FILE, "r", encoding="utf-8") as f:
+        names = [card["name"] for card in json.load(f)]
+    # 扩大卡池：复制的名称加上序号后缀，与原名相似但不相同
+    return names + [f"{name}{i}" for i in range(1, scale) for name in names]
+
+
+def make_queries(names: list, rng: random.Random) -> list:
+    """模拟 OCR 结果：原名、1~2 处字符错误、截断，以及与任何卡牌都无关的文本"""
+    alphabet = "".join(sorted(set("".join(names))))
+    queries = []
+    for name in names:
+        queries.append(name)
+        for errors in (1, 2):
+            chars = list(name)
+            for _ in range(errors):
+                kind, pos = rng.choice("sdi"), rng.randrange(len(chars))
+                if kind == "s":
+                    chars[pos] = rng.choice(alphabet)
+                elif kind == "d" and len(chars) > 1:
+                    del chars[pos]
+                else:
+                    chars.insert(pos, rng.choice(alphabet))
+            queries.append("".join(chars))
+        queries.append(name[: max(1, len(name) * 2 // 3)])
+    queries += ["".join(rng.choice(alphabet) for _ in range(rng.randint(2, 10))) for _ in range(len(names) // 4)]
+    queries += ["", "SSR", "1/2"]
+    return queries
+
+
+def linear_best(query: str, names: list):
+    """原方案：SupportCardsAuto.match_card 中的线性扫描"""
+    from utils.fuzzy import similarity
+
+    best_similarity, best_name = 0, None
+    for name in names:
+        score = similarity(query, name)
+        if score > best_similarity:
+            best_similarity, best_name = score, name
+    if best_similarity >= THRESHOLD and best_name is not None:
+        return best_name, best_similarity
+    return None
+
+
+def timed(func, queries: list, repeat: int) -> float:
+    """每次查询的中位耗时（秒）"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for query in queries:
+            func(query)
+        times.append((time.perf_counter() - start) / len(queries))
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="支持卡牌名称模糊匹配：名称索引与线性扫描对比")
+    parser.add_argument("--repeat", type=int, default=3, help="每种方案的重复轮数")
+    parser.add_argument("--scale", type=int, default=1, help="卡池扩大倍数")
+    parser.add_argument("--seed", type=int, default=0, help="生成查询串的随机种子")
+    args = parser.parse_args()
+
+    from utils.fuzzy import FuzzyIndex
+
+    names = load_names(args.scale)
+    queries = make_queries(names, random.Random(args.seed))
+
+    start = time.perf_counter()
+    index = FuzzyIndex(names)
+    build = time.perf_counter() - start
+
+    # 结果校验：名称与相似度都必须与线性扫描一致
+    mismatches = [(query, linear_best(query, names), index._best(query, THRESHOLD)) for query in queries]
+    mismatches = [item for item in mismatches if item[1] != item[2]]
+    matched = sum(1 for query in queries if index._best(query, THRESHOLD) is not None)
+
+    linear = timed(lambda query: linear_best(query, names), queries, args.repeat)
+    uncached = timed(lambda query: index._best(query, THRESHOLD), queries, args.repeat)
+    for query in queries:
+        index.best(query, THRESHOLD)
+    cached = timed(lambda query: index.best(query, THRESHOLD), queries, args.repeat)
+
+    print(f"卡池 {len(names)} 个名称，查询 {len(queries)} 个（命中阈值 {matched} 个），建立索引 {build * 1000:.2f}ms")
+    print(f"  线性扫描         {linear * 1e6:9.1f}μs/次")
+    print(f"  名称索引（无缓存） {uncached * 1e6:9.1f}μs/次  加速 {linear / uncached:5.1f}x")
+    print(f"  名称索引（缓存）   {cached * 1e6:9.1f}μs/次  加速 {linear / cached:5.1f}x")
+    if mismatches:
+        print(f"✗ {len(mismatches)} 个查询结果与线性扫描不一致:")
+        for query, expected, actual in mismatches[:10]:
+            print(f"  {query!r}: 线性扫描 {expected}，名称索引 {actual}")
+        sys.exit(1)
+    print("✓ 结果与线性扫描完全一致")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+识别变体节点的单次调用开销对比
+
+原方案：每次调用构造完整的嵌套 pipeline_override（识别类型 + 全部参数），由框架序列化、合并
+新方案：变体节点随资源加载（AgentVariants.json），调用时只传入真正变化的参数
+
+在真实的 Context 中（以自定义动作运行）对同一张空白截图分别执行两种调用。为避免识别本身的耗时淹没调用开销，
+两种调用都额外把 roi 覆盖为 1x1 的区域（识别立即结束），差值即每次调用构造、序列化、合并 override 的开销。
+同时测量只在 Python 侧构造并序列化 override 的耗时（不需要 maafw）。
+
+使用方式:
+    python tools/benchmark/variants.py
+    python tools/benchmark/variants.py --repeat 500
+    python tools/benchmark/variants.py --python-only   # 未安装 maafw 时只测 Python 侧开销
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "agent"))
+os.chdir(ROOT)
+
+
+VARIANTS_FILE = ROOT / "assets" / "resource" / "base" / "pipeline" / "AgentVariants.json"
+
+
+def load_variants():
+    """
+    从生成的 AgentVariants.json 注册变体节点
+
+    不导入 custom 模块：导入 AgentServer 后无法在同一进程中创建 Resource
+    """
+    from utils.variants import variant
+
+    with open(VARIANTS_FILE, "r", encoding="utf-8") as f:
+        for name, node in json.load(f).items():
+            variant(name, node["recognition"]["type"], **node["recognition"]["param"])
+
+
+def cases() -> list:
+    """(名称, 节点, 变化参数)：只选用 TemplateMatch 节点，不依赖 OCR 模型"""
+    return [
+        ("lock(roi)", "ProduceRecognitionLock", {"roi": [400, 500, 100, 100]}),
+        ("mirror_flag", "ProduceMirrorFlag_1", {}),
+        ("event(template)", "ProduceRecognitionEvent", {"template": "produce/lesson.png"}),
+        ("shop_item(template)", "ShoppingDailyExchangeMoneyRecognition", {"template": "shopping_recommend.png"}),
+    ]
+
+
+def inline_override(node: str, vary: dict) -> dict:
+    """原方案：完整定义 + 变化参数"""
+    from utils.variants import _variants
+
+    return {node: dict(_variants[node], **vary)}
+
+
+def bench_python(repeat: int):
+    print("Python 侧构造并序列化 override:")
+    for name, node, vary in cases():
+        for label, build in (("inline", lambda: inline_override(node, vary)), ("variant", lambda: {node: vary} if vary else {})):
+            times = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                json.dumps(build(), ensure_ascii=False)
+                times.append(time.perf_counter() - start)
+            print(f"  {name:<20} {label:<8} median={statistics.median(times) * 1e6:6.2f}μs")
+
+
+def bench_context(repeat: int):
+    from utils import variants
+    from maa.tasker import Tasker, LoggingLevelEnum
+    from maa.resource import Resource
+    from maa.controller import DbgController
+    from maa.custom_action import CustomAction
+
+    Tasker.set_stdout_level(LoggingLevelEnum.Off)
+    image = np.zeros((1280, 720, 3), np.uint8)
+    results = {}
+    tiny_roi = {"roi": [0, 0, 1, 1]}
+
+    class Bench(CustomAction):
+        def run(self, context, argv) -> bool:
+            for name, node, vary in cases():
+                vary = dict(vary, **tiny_roi)
+                for label, call in (
+                    ("inline", lambda: context.run_recognition(node, image, pipeline_override=inline_override(node, vary))),
+                    ("variant", lambda: variants.run_recognition(context, node, image, **vary)),
+                ):
+                    call()  # 预热（变体节点首次调用时查询是否已加载）
+                    times = []
+                    for _ in range(repeat):
+                        start = time.perf_counter()
+                        call()
+                        times.append(time.perf_counter() - start)
+                    results[(name, label)] = times
+            return True
+
+    with tempfile.TemporaryDirectory() as screenshots:
+        Image.fromarray(image).save(Path(screenshots) / "blank.png")
+        resource = Resource()
+        resource.post_bundle(ROOT / "assets" / "resource" / "base").wait()
+        controller = DbgController(screenshots)
+        controller.post_connection().wait()
+        tasker = Tasker()
+        tasker.bind(resource, controller)
+        if not tasker.inited:
+            raise RuntimeError("Tasker 初始化失败")
+        bench = Bench()
+        resource.register_custom_action("VariantsBench", bench)
+        tasker.post_task("VariantsBench", {"VariantsBench": {"action": {"type": "Custom", "param": {"custom_action": "VariantsBench"}}}}).wait()
+
+    print("Context.run_recognition 单次调用（roi 为 1x1）:")
+    for name, _, _ in cases():
+        inline, variant = results[(name, "inline")], results[(name, "variant")]
+        saved = statistics.median(inline) - statistics.median(variant)
+        print(
+            f"  {name:<20} inline={statistics.median(inline) * 1e6:8.1f}μs  variant={statistics.median(variant) * 1e6:8.1f}μs  节省 {saved * 1e6:7.1f}μs"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="识别变体节点的单次调用开销对比")
+    parser.add_argument("--repeat", type=int, default=200, help="每种调用的重复次数")
+    parser.add_argument("--python-only", action="store_true", help="只测 Python 侧开销（未安装 maafw 时使用）")
+    args = parser.parse_args()
+
+    load_variants()
+    bench_python(args.repeat)
+    if not args.python_only:
+        print()
+        bench_context(args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+识别变体节点同步脚本
+
+导入 agent/custom 下的所有模块，收集通过 utils.variants.variant() 声明的识别变体节点，
+生成 assets/resource/base/pipeline/AgentVariants.json 随资源加载，调用时只需传入真正变化的参数。
+
+使用方式:
+    python tools/sync_variants.py           # 重新生成
+    python tools/sync_variants.py --check   # 只检查生成文件是否为最新（CI 使用），过期时返回 1
+"""
+
+import os
+import sys
+import json
+import argparse
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+OUTPUT = ROOT / "assets" / "resource" / "base" / "pipeline" / "AgentVariants.json"
+
+
+def render() -> str:
+    sys.path.insert(0, str(ROOT / "agent"))
+    os.chdir(ROOT)
+    import custom  # noqa: F401  导入时注册所有变体节点
+    from utils.variants import pipeline
+
+    return json.dumps(pipeline(), ensure_ascii=False, indent=4) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="识别变体节点同步")
+    parser.add_argument("--check", action="store_true", help="只检查生成文件是否为最新")
+    args = parser.parse_args()
+
+    content = render()
+    current = OUTPUT.read_text(encoding="utf-8") if OUTPUT.exists() else None
+    if args.check:
+        if current != content:
+            print(f"✗ {OUTPUT.relative_to(ROOT)} 已过期，请运行 python tools/sync_variants.py")
+            sys.exit(1)
+        print(f"✓ {OUTPUT.relative_to(ROOT)} 为最新")
+        return
+
+    if current == content:
+        print(f"✓ {OUTPUT.relative_to(ROOT)} 无变化")
+        return
+    OUTPUT.write_text(content, encoding="utf-8")
+    print(f"✓ 已生成 {OUTPUT.relative_to(ROOT)}，共 {len(json.loads(content))} 个节点")
+
+
+if __name__ == "__main__":
+    main()